@@ -4,6 +4,17 @@ import numpy as np
 from datetime import time, timedelta, datetime
 from QuantConnect.Brokerages import BrokerageName
 from QuantConnect import AccountType
+from common.chain_index import ChainIndex
+from common.position_book import SpreadBook
+from common.event_log import EventLog, DEBUG
+from common.regime import RegimeEngine, ThresholdRegime, ABOVE, BELOW
+from common.window_scheduler import WindowScheduler
+from common.trading_calendar import get_calendar
+from common.greeks import GreeksEngine
+from common.trade_journal import TradeJournal
+from common.history_cache import HistoryCache
+from common.indicators import SMA
+from common.metrics import PerformanceMetrics
 
 # Custom fee models
 class CustomOptionsFeeModel(FeeModel):
@@ -38,6 +49,14 @@ class CombinedStrategy(QCAlgorithm):
         # Set brokerage model to Interactive Brokers for options trading
         self.SetBrokerageModel(BrokerageName.InteractiveBrokersBrokerage, AccountType.Margin)
 
+        # Per-minute and per-fill chatter is logged at DEBUG; set log_level=DEBUG to see it
+        self.events = EventLog(self, level=self.GetParameter("log_level") or "INFO")
+
+        # Running performance statistics; trades are counted per closed spread
+        self.metrics = PerformanceMetrics(self.Portfolio.TotalPortfolioValue,
+                                          capacity=(self.EndDate - self.StartDate).days + 1,
+                                          trades_from_fills=False)
+
         # Initialize SPX Options Strategy
         self.InitializeSPXOptionsStrategy()
         
@@ -47,116 +66,181 @@ class CombinedStrategy(QCAlgorithm):
         
         self.spx_index = self.AddIndex("SPX", Resolution.Minute).Symbol
         self.vix = self.AddIndex("VIX", Resolution.Minute).Symbol
-        self.daily_sma = self.SMA(self.spx_index, 3, Resolution.Daily)
-        self.weekly_sma = self.SMA(self.spx_index, 20, Resolution.Daily)
+        # 3- and 20-day SMAs of daily SPX closes, fed by OnDailySPXBar
+        self.daily_sma = SMA(3)
+        self.weekly_sma = SMA(20)
+        daily_bars = TradeBarConsolidator(timedelta(days=1))
+        daily_bars.DataConsolidated += self.OnDailySPXBar
+        self.SubscriptionManager.AddConsolidator(self.spx_index, daily_bars)
+
+        # Market regime: SPX above 20-day SMA AND VIX < 25, thresholds refreshed each session
+        self.spx_price = 0
+        self.vix_price = 0
+        self.regime = RegimeEngine()
+        self.regime.register("spx_options", ThresholdRegime([
+            ("spx", ABOVE, lambda: self.weekly_sma.value if self.weekly_sma.is_ready else None),
+            ("vix", BELOW, 25),
+        ]))
+        self.regime.add_listener(self.OnRegimeChange)
         
         option = self.AddIndexOption("SPX", "SPXW", Resolution.Minute)
         option.SetFilter(self.OptionFilter)
         self.option_symbol = option.Symbol
 
-        # Strategy parameters
-        self.bp_spread = 15
-        self.bc_spread = 15
-        self.otm_threshold_pct = 0.001
+        # Strategy parameters (all overridable through algorithm parameters)
+        self.bp_spread = int(self.GetParameter("bp_spread") or 15)
+        self.bc_spread = int(self.GetParameter("bc_spread") or 15)
+        self.otm_threshold_pct = float(self.GetParameter("otm_threshold_pct") or 0.001)
+
+        # Optional delta targets for the short legs (0 keeps the strike-based rules above)
+        self.bp_short_delta = float(self.GetParameter("bp_short_delta") or 0)
+        self.bc_short_delta = float(self.GetParameter("bc_short_delta") or 0)
+
+        # VIX sizing tiers: (VIX below, base contracts), then the size above the last tier
+        self.vix_tiers = self.GetTiersParameter("vix_tiers", [(15, 20), (20, 15), (25, 10)])
+        self.vix_high_qty = int(self.GetParameter("vix_high_qty") or 5)
 
         # Trade windows
-        self.bp_trade_window_start = time(13, 30)
-        self.bp_trade_window_end = time(15, 30)
-        self.bc_trade_window_start = time(15, 0)
-        self.bc_trade_window_end = time(15, 30)
+        self.bp_trade_window_start = self.GetTimeParameter("bp_window_start", time(13, 30))
+        self.bp_trade_window_end = self.GetTimeParameter("bp_window_end", time(15, 30))
+        self.bc_trade_window_start = self.GetTimeParameter("bc_window_start", time(15, 0))
+        self.bc_trade_window_end = self.GetTimeParameter("bc_window_end", time(15, 30))
         
         # Position management windows
-        self.profit_check_start = time(14, 0)
-        self.profit_check_end = time(15, 45)
-        self.profit_target_pct = 0.25
-        self.stop_loss_pct = 0.50
+        self.profit_check_start = self.GetTimeParameter("profit_check_start", time(14, 0))
+        self.profit_check_end = self.GetTimeParameter("profit_check_end", time(15, 45))
+        self.profit_target_pct = float(self.GetParameter("profit_target_pct") or 0.25)
+        self.stop_loss_pct = float(self.GetParameter("stop_loss_pct") or 0.50)
         
         self.market_close = time(16, 0)
+
+        # Compile trade and profit-check windows; OnData does nothing outside them
+        self.windows = WindowScheduler()
+        self.windows.add_window("bull_put", self.bp_trade_window_start, self.bp_trade_window_end, include_start=False)
+        self.windows.add_window("bear_call", self.bc_trade_window_start, self.bc_trade_window_end)
+        self.windows.add_window("profit_check", self.profit_check_start, self.profit_check_end)
+
         self.last_bp_trade_date = None
         self.last_bc_trade_date = None
 
         # Track trades and positions
         self.session_trade_count = 0
         self.current_session_date = None
-        self.open_positions = {}
-
-        # FOMC blackout dates
-        self.fomc_dates = {
-            datetime(2022, 5, 4).date(), datetime(2022, 6, 15).date(),
-            datetime(2022, 7, 27).date(), datetime(2022, 9, 21).date(),
-            datetime(2022, 11, 2).date(), datetime(2022, 12, 14).date(),
-            datetime(2023, 2, 1).date(), datetime(2023, 3, 22).date(),
-            datetime(2023, 5, 3).date(), datetime(2023, 6, 14).date(),
-            datetime(2023, 7, 26).date(), datetime(2023, 9, 20).date(),
-            datetime(2023, 11, 1).date(), datetime(2023, 12, 13).date(),
-            datetime(2024, 1, 31).date(), datetime(2024, 3, 20).date(),
-            datetime(2024, 5, 1).date(), datetime(2024, 6, 12).date(),
-            datetime(2024, 7, 31).date(), datetime(2024, 9, 17).date(),
-            datetime(2024, 11, 5).date(), datetime(2024, 12, 17).date(),
-            datetime(2025, 1, 29).date()
-        }
+        self.spread_book = SpreadBook()  # the one record of every spread held
+
+        # Binary record of every order event, spread entry and exit (see common.trade_journal)
+        self.journal = TradeJournal.in_object_store(self, "journal/0dte_spx_options")
+
+        # Option chain index, built at most once per slice
+        self.chain_index = None
+        self.chain_index_time = None
+        self.greeks = GreeksEngine()
+
+        # FOMC blackout dates come from the shared trading calendar
+        self.calendar = get_calendar()
         
         # Set security initializer for options
         seeder = FuncSecuritySeeder(self.GetLastKnownPrices)
         self.SetSecurityInitializer(CustomInitializer(self.BrokerageModel, seeder, self))
         
-        self.SetWarmUp(timedelta(days=25))
-        
+        # Daily SPX closes (what the SMAs consume) kept across runs; resume=1 seeds the SMAs from them
+        self.spx_history = HistoryCache(self, "history/spx_daily", Resolution.Daily)
+        if not (self.GetParameter("resume") == "1" and self.Resume()):
+            self.SetWarmUp(timedelta(days=25))
+
+    def Resume(self):
+        """Replay cached daily closes (plus any days missed since) into the SMAs instead of warming up"""
+        missed = self.spx_history.fill(self.spx_index, self.StartDate)
+        times, closes = self.spx_history.history(self.spx_index, self.weekly_sma.period, end=self.StartDate)
+        if len(closes) < self.weekly_sma.period:
+            self.events.info("state", "Only %d cached SPX closes, warming up", len(closes))
+            return False
+        self.daily_sma.update_many(closes)
+        self.weekly_sma.update_many(closes)
+        self.events.info("state", "Resumed SMAs from cached SPX closes up to %s (+%d missed)", times[-1], missed)
+        return True
+        
+    def OnDailySPXBar(self, sender, bar):
+        self.daily_sma.update(bar.Close)
+        self.weekly_sma.update(bar.Close)
+        self.spx_history.append(bar.Symbol, bar.EndTime, bar.Close)
+
+    def GetTimeParameter(self, name, default):
+        """HH:MM parameter as a time"""
+        value = self.GetParameter(name)
+        if not value:
+            return default
+        hour, minute = value.split(":")
+        return time(int(hour), int(minute))
+
+    def GetTiersParameter(self, name, default):
+        """'15:20,20:15,25:10' parameter as [(15.0, 20), (20.0, 15), (25.0, 10)]"""
+        value = self.GetParameter(name)
+        if not value:
+            return default
+        tiers = []
+        for tier in value.split(","):
+            limit, qty = tier.split(":")
+            tiers.append((float(limit), int(qty)))
+        return sorted(tiers)
+
     def OptionFilter(self, universe):
         return universe.IncludeWeeklys() \
                        .Expiration(timedelta(0), timedelta(0)) \
                        .Strikes(-10, 10)
 
+    def GetChainIndex(self, data):
+        """SPXW chain index for the current slice, shared by all handlers"""
+        if self.chain_index_time != self.Time:
+            self.chain_index_time = self.Time
+            chain = data.OptionChains.get(self.option_symbol, None)
+            self.chain_index = ChainIndex(chain) if chain else None
+        return self.chain_index
+
+    def GetChainGreeks(self, data):
+        """Implied vol and Greeks for the SPXW chain, computed at most once per minute"""
+        chain = data.OptionChains.get(self.option_symbol, None)
+        if not chain or not self.spx_price:
+            return None
+        return self.greeks.get(chain, self.spx_price, self.Time)
+
+    def UpdateMarketInputs(self, data):
+        """Cache SPX/VIX prices from the slice and feed the regime engine"""
+        self.regime.session_open(self.Time.date())
+
+        bars = data.Bars
+        if bars.ContainsKey(self.spx_index):
+            self.spx_price = bars[self.spx_index].Close
+            self.regime.update("spx", self.spx_price)
+        if bars.ContainsKey(self.vix):
+            self.vix_price = bars[self.vix].Close
+            self.regime.update("vix", self.vix_price)
+
+    def OnRegimeChange(self, name, favorable):
+        sma_value = self.weekly_sma.value if self.weekly_sma.is_ready else "N/A"
+        self.events.info("regime", "%s regime: SPX %.2f vs 20-day SMA %s, VIX at %.2f",
+                         "Favorable" if favorable else "Unfavorable", self.spx_price, sma_value, self.vix_price)
+
     def IsMarketRegimeFavorable(self):
-        """Market regime filter"""
-        if not self.weekly_sma.IsReady:
-            return False
-        
-        if self.vix not in self.Securities:
-            return False
-        
-        spx_price = self.Securities[self.spx_index].Price
-        vix_value = self.Securities[self.vix].Price
-        
-        if spx_price == 0 or vix_value == 0:
-            return False
-        
-        # Regime requirements: SPX above 20-day SMA AND VIX < 25
-        sma_trend = spx_price > self.weekly_sma.Current.Value
-        low_vol = vix_value < 25
-        
-        favorable = sma_trend and low_vol
-        
-        if not favorable:
-            trend_msg = "above" if sma_trend else "below"
-            debug_msg = str(self.Time) + " - Unfavorable regime: SPX " + trend_msg + " 20-day SMA"
-            self.Debug(debug_msg)
-            self.Debug("VIX at " + str(round(vix_value, 2)))
-        
-        return favorable
+        """Market regime filter (cached, updated only on boundary crosses)"""
+        return self.regime.is_favorable("spx_options")
 
     def CalculateVIXBasedPositionSize(self, spx_price, spread_width):
         """VIX-based position sizing with natural portfolio scaling"""
-        if self.vix not in self.Securities:
-            return 15
-        
-        vix_value = self.Securities[self.vix].Price
+        vix_value = self.vix_price
         if vix_value == 0:
             return 15
         
         # VIX-based base position sizing
-        if vix_value < 15:
-            base_qty = 20
-        elif vix_value < 20:
-            base_qty = 15
-        elif vix_value < 25:
-            base_qty = 10
-        else:
-            base_qty = 5
+        base_qty = self.vix_high_qty
+        for vix_limit, tier_qty in self.vix_tiers:
+            if vix_value < vix_limit:
+                base_qty = tier_qty
+                break
         
         # Natural Portfolio Scaling
         current_value = self.Portfolio.TotalPortfolioValue
-        portfolio_growth_factor = current_value / 100000
+        portfolio_growth_factor = current_value / self.metrics.initial_value
         
         # Apply scaling with caps
         if portfolio_growth_factor <= 1.5:
@@ -176,97 +260,68 @@ class CombinedStrategy(QCAlgorithm):
         final_qty = max(5, min(scaled_qty, max_position))
         
         # Debug scaling information once per hour
-        if self.Time.minute % 60 == 0:
-            debug_msg = "Position Scaling: Portfolio $" + str(int(current_value))
-            debug_msg += " (" + str(round(portfolio_growth_factor, 1)) + "x growth), VIX " + str(round(vix_value, 1))
-            debug_msg += ", Base " + str(base_qty) + " -> Scaled " + str(final_qty) + " contracts"
-            self.Debug(str(self.Time) + " - " + debug_msg)
+        self.events.debug("sizing", "Position Scaling: Portfolio $%d (%.1fx growth), VIX %.1f, Base %d -> Scaled %d contracts",
+                          current_value, portfolio_growth_factor, vix_value, base_qty, final_qty,
+                          every=timedelta(hours=1))
         
         return final_qty
 
     def CheckPositionManagement(self, data):
         """Check for both profit taking AND stop losses"""
-        current_time = self.Time.time()
-        
         # Only check during position management window
-        if not (self.profit_check_start <= current_time <= self.profit_check_end):
+        if not self.windows.is_open("profit_check", self.Time):
             return
         
-        positions_to_close = []
-        
-        for symbol, position_info in self.open_positions.items():
-            try:
-                if symbol not in data:
-                    continue
-                    
-                # Get current option data
-                option_data = data[symbol]
-                if not option_data or not hasattr(option_data, 'BidPrice') or not hasattr(option_data, 'AskPrice'):
-                    continue
-                
-                # Calculate current P&L
-                is_short = position_info["is_short"]
-                entry_price = position_info.get("entry_price", 0)
-                
-                if is_short:
-                    # For short positions
-                    current_price = option_data.AskPrice
-                    if entry_price > 0 and current_price > 0:
-                        pnl_pct = (entry_price - current_price) / entry_price
-                        
-                        # Check profit target
-                        if pnl_pct >= self.profit_target_pct:
-                            reason = "PROFIT TARGET: " + str(round(pnl_pct*100, 1)) + "%"
-                            positions_to_close.append((symbol, reason))
-                        # Check stop loss
-                        elif pnl_pct <= -self.stop_loss_pct:
-                            reason = "STOP LOSS: " + str(round(pnl_pct*100, 1)) + "%"
-                            positions_to_close.append((symbol, reason))
-                else:
-                    # For long positions
-                    current_price = option_data.BidPrice
-                    if entry_price > 0 and current_price > 0:
-                        pnl_pct = (current_price - entry_price) / entry_price
-                        
-                        # Check profit target
-                        if pnl_pct >= self.profit_target_pct:
-                            reason = "PROFIT TARGET: " + str(round(pnl_pct*100, 1)) + "%"
-                            positions_to_close.append((symbol, reason))
-                        # Check stop loss  
-                        elif pnl_pct <= -self.stop_loss_pct:
-                            reason = "STOP LOSS: " + str(round(pnl_pct*100, 1)) + "%"
-                            positions_to_close.append((symbol, reason))
-                            
-            except Exception as e:
-                continue
-        
-        # Close positions that meet exit criteria
-        for symbol, reason in positions_to_close:
-            self.ClosePosition(symbol, reason)
+        if not self.spread_book.has_open():
+            return
 
-    def ClosePosition(self, symbol, reason):
-        """Close a position early for profit taking OR stop loss"""
-        if symbol not in self.open_positions:
+        index = self.GetChainIndex(data)
+        if index is None:
             return
-            
-        position_info = self.open_positions[symbol]
-        quantity = position_info["quantity"]
+
+        # Evaluate every open spread in one pass
+        slots, pnl_pcts, is_profit = self.spread_book.evaluate(
+            index.quotes, self.profit_target_pct, self.stop_loss_pct)
+
+        # Close spreads that meet exit criteria
+        for slot, pnl_pct, profit in zip(slots, pnl_pcts, is_profit):
+            label = "PROFIT TARGET: " if profit else "STOP LOSS: "
+            self.CloseSpread(slot, label + str(round(pnl_pct*100, 1)) + "%")
+
+    def CloseSpread(self, slot, reason):
+        """Close both legs of a spread for profit taking OR stop loss"""
+        book = self.spread_book
+        short_symbol = book.short_symbols[slot]
+        long_symbol = book.long_symbols[slot]
         
         try:
-            # Close the position
-            self.MarketOrder(symbol, -quantity)
+            # Close both legs together
+            book.mark_closing(slot, reason)
+            short_held = int(book.short_held[slot])
+            long_held = int(book.long_held[slot])
+            if long_held == -short_held:
+                self.SendSpread(long_symbol, short_symbol, -long_held, reason)
+            else:
+                # Partially entered: flatten leg by leg
+                for symbol, held in ((long_symbol, long_held), (short_symbol, short_held)):
+                    if held:
+                        self.MarketOrder(symbol, -held, tag=reason)
             
-            strategy = position_info["strategy"]
-            debug_msg = str(self.Time) + " - POSITION MANAGEMENT: Closed " + strategy + " " + str(symbol)
-            self.Debug(debug_msg)
-            self.Debug("Qty: " + str(-quantity) + ", Reason: " + reason)
+            self.events.info("exits", "POSITION MANAGEMENT: Closed %s %s / %s, Qty: %d, Reason: %s",
+                             book.strategy_name(slot), short_symbol, long_symbol, book.quantity[slot], reason)
             
         except Exception as e:
-            self.Debug("Error closing position " + str(symbol) + ": " + str(e))
+            self.events.error("exits", "Error closing spread %s: %s", short_symbol, e)
 
     def OnData(self, data):
+        self.UpdateMarketInputs(data)
+
         if self.IsWarmingUp:
             return
+
+        # Skip handler dispatch (and chain indexing) outside active windows
+        if not self.windows.dispatch(self.Time):
+            return
         
         # Check for position management first
         self.CheckPositionManagement(data)
@@ -278,10 +333,10 @@ class CombinedStrategy(QCAlgorithm):
         """Main strategy execution logic"""
         current_date = self.Time.date()
         current_time = self.Time.time()
-        spx_price = self.Securities[self.spx_index].Price
+        spx_price = self.spx_price
 
         # Skip FOMC dates
-        if current_date in self.fomc_dates:
+        if self.calendar.is_fomc(current_date):
             return
 
         # Market regime filter
@@ -292,11 +347,10 @@ class CombinedStrategy(QCAlgorithm):
         if self.current_session_date != current_date:
             self.current_session_date = current_date
             self.session_trade_count = 0
-            vix_value = self.Securities[self.vix].Price if self.vix in self.Securities else "N/A"
-            sma20_value = self.weekly_sma.Current.Value if self.weekly_sma.IsReady else "N/A"
-            debug_msg = str(self.Time) + " - New trading session: SPX " + str(spx_price)
-            self.Debug(debug_msg)
-            self.Debug("VIX " + str(vix_value) + ", 20-day SMA " + str(sma20_value))
+            vix_value = self.vix_price if self.vix_price else "N/A"
+            sma20_value = self.weekly_sma.value if self.weekly_sma.is_ready else "N/A"
+            self.events.info("session", "New trading session: SPX %s, VIX %s, 20-day SMA %s",
+                             spx_price, vix_value, sma20_value)
 
         if spx_price == 0:
             return
@@ -312,40 +366,36 @@ class CombinedStrategy(QCAlgorithm):
             return
 
         # Check trade window
-        if not (self.bp_trade_window_start < current_time <= self.bp_trade_window_end):
+        if not self.windows.is_open("bull_put", current_time):
             return
 
-        if not self.daily_sma.IsReady:
+        if not self.daily_sma.is_ready:
             return
 
         # Entry condition: SPX > SMA
-        if spx_price <= self.daily_sma.Current.Value:
+        if spx_price <= self.daily_sma.value:
             return
 
-        chain = data.OptionChains.get(self.option_symbol, None)
-        if not chain:
+        index = self.GetChainIndex(data)
+        if index is None:
             return
 
-        # Filter for puts expiring today
-        options = [c for c in chain
-                   if c.Expiry.date() == current_date and
-                   c.Right == OptionRight.Put]
-
-        if len(options) < 2:
+        # Puts expiring today, sorted by strike
+        puts = index.side(current_date, OptionRight.Put)
+        if puts is None or len(puts) < 2:
             return
 
-        # Sort puts by strike price
-        options.sort(key=lambda c: c.Strike, reverse=True)
-        
-        # Find OTM puts
-        otm_puts = [p for p in options if p.Strike < spx_price]
-        
-        if len(otm_puts) < 2:
+        # Select strikes: second OTM put (or the put nearest the target delta),
+        # long leg one spread width below
+        if self.bp_short_delta > 0:
+            chain_greeks = self.GetChainGreeks(data)
+            short_put = chain_greeks.nearest_delta(OptionRight.Put, -self.bp_short_delta, current_date) \
+                if chain_greeks else None
+        else:
+            short_put = puts.nth_below(spx_price, 2)
+        if short_put is None:
             return
-
-        # Select strikes
-        short_put = otm_puts[1]
-        long_put = next((p for p in options if p.Strike == short_put.Strike - self.bp_spread), None)
+        long_put = puts.offset(short_put.Strike, -self.bp_spread)
 
         if not long_put or short_put.AskPrice <= 0 or long_put.BidPrice <= 0:
             return
@@ -353,35 +403,19 @@ class CombinedStrategy(QCAlgorithm):
         # Position sizing
         qty = self.CalculateVIXBasedPositionSize(spx_price, self.bp_spread)
         if qty <= 0:
-            self.Debug(str(self.Time) + " - Bull Put: No available capital")
+            self.events.warning("trades", "Bull Put: No available capital")
             return
 
-        # Execute trades
+        # Track the spread, then execute trades
         self.session_trade_count += 1
-        self.MarketOrder(long_put.Symbol, qty)
-        self.MarketOrder(short_put.Symbol, -qty)
-
-        # Track positions
-        self.open_positions[long_put.Symbol] = {
-            "quantity": qty, 
-            "strike": long_put.Strike, 
-            "is_short": False, 
-            "strategy": "BullPut",
-            "entry_price": long_put.AskPrice
-        }
-        self.open_positions[short_put.Symbol] = {
-            "quantity": -qty, 
-            "strike": short_put.Strike, 
-            "is_short": True, 
-            "strategy": "BullPut",
-            "entry_price": short_put.BidPrice
-        }
+        self.spread_book.open("BullPut", short_put.Symbol, long_put.Symbol, qty,
+                              short_put.BidPrice, long_put.AskPrice)
+        self.SendSpread(long_put.Symbol, short_put.Symbol, qty, "BullPut")
+        self.journal.entry(long_put.Symbol, qty, long_put.AskPrice - short_put.BidPrice, "SPX above SMA", "BullPut")
 
         # Debug output
-        debug_msg = str(self.Time) + " - Bull Put placed: Long " + str(long_put.Strike) + ", Short " + str(short_put.Strike)
-        self.Debug(debug_msg)
-        sma_val = round(self.daily_sma.Current.Value, 2)
-        self.Debug("SPX @ " + str(round(spx_price, 2)) + " > SMA " + str(sma_val) + ", Qty " + str(qty))
+        self.events.info("trades", "Bull Put placed: Long %s, Short %s, SPX @ %.2f > SMA %.2f, Qty %d",
+                         long_put.Strike, short_put.Strike, spx_price, self.daily_sma.value, qty)
 
         self.last_bp_trade_date = current_date
 
@@ -392,38 +426,31 @@ class CombinedStrategy(QCAlgorithm):
             return
 
         # Check trade window
-        if not (self.bc_trade_window_start <= current_time <= self.bc_trade_window_end):
+        if not self.windows.is_open("bear_call", current_time):
             return
 
-        chain = data.OptionChains.get(self.option_symbol, None)
-        if not chain:
+        index = self.GetChainIndex(data)
+        if index is None:
             return
 
-        # Filter for calls
-        opts = [c for c in chain
-                if c.Expiry.date() == current_date
-                and c.Right == OptionRight.Call
-                and c.Strike > spx_price]
-
-        if len(opts) < 10:
+        # Calls expiring today, need at least 10 OTM strikes
+        calls = index.side(current_date, OptionRight.Call)
+        if calls is None or calls.count_above(spx_price) < 10:
             return
 
-        # Sort by strike
-        opts.sort(key=lambda c: c.Strike)
-
         # Find suitable strikes
-        threshold_price = spx_price * (1 + self.otm_threshold_pct)
-        
-        short_call = None
-        for opt in opts:
-            if opt.Strike > threshold_price:
-                short_call = opt
-                break
+        if self.bc_short_delta > 0:
+            chain_greeks = self.GetChainGreeks(data)
+            short_call = chain_greeks.nearest_delta(OptionRight.Call, self.bc_short_delta, current_date) \
+                if chain_greeks else None
+        else:
+            threshold_price = spx_price * (1 + self.otm_threshold_pct)
+            short_call = calls.first_above(threshold_price)
         
         if not short_call:
             return
 
-        long_call = next((p for p in opts if p.Strike == short_call.Strike + self.bc_spread), None)
+        long_call = calls.offset(short_call.Strike, self.bc_spread)
 
         if not long_call:
             return
@@ -451,50 +478,49 @@ class CombinedStrategy(QCAlgorithm):
         # Position sizing
         quantity = self.CalculateVIXBasedPositionSize(spx_price, self.bc_spread)
         if quantity <= 0:
-            self.Debug(str(self.Time) + " - Bear Call: No available capital")
+            self.events.warning("trades", "Bear Call: No available capital")
             return
 
         # Execute trades
         self.session_trade_count += 1
 
+        # Track the spread
+        slot = self.spread_book.open("BearCall", short_call.Symbol, long_call.Symbol, quantity,
+                                     short_call_bid, long_call_ask)
+
         try:
-            self.MarketOrder(long_call.Symbol, quantity)
-            self.MarketOrder(short_call.Symbol, -quantity)
-
-            # Track positions
-            self.open_positions[long_call.Symbol] = {
-                "quantity": quantity, 
-                "strike": long_call.Strike, 
-                "is_short": False, 
-                "strategy": "BearCall",
-                "entry_price": long_call_ask
-            }
-            self.open_positions[short_call.Symbol] = {
-                "quantity": -quantity, 
-                "strike": short_call.Strike, 
-                "is_short": True, 
-                "strategy": "BearCall",
-                "entry_price": short_call_bid
-            }
+            self.SendSpread(long_call.Symbol, short_call.Symbol, quantity, "BearCall")
+            self.journal.entry(long_call.Symbol, quantity, -net_premium, "OTM call premium", "BearCall")
 
             # Debug output
             otm_percentage = ((short_call.Strike - spx_price) / spx_price) * 100
-            debug_msg = str(self.Time) + " - Bear Call placed: Long " + str(long_call.Strike) + ", Short " + str(short_call.Strike)
-            self.Debug(debug_msg)
-            premium_str = str(int(net_premium*100))
-            otm_str = str(round(otm_percentage, 2))
-            spx_str = str(round(spx_price, 2))
-            self.Debug("(" + otm_str + "% OTM), Qty " + str(quantity) + ", SPX " + spx_str + ", Premium $" + premium_str)
+            self.events.info("trades", "Bear Call placed: Long %s, Short %s (%.2f%% OTM), Qty %d, SPX %.2f, Premium $%d",
+                             long_call.Strike, short_call.Strike, otm_percentage, quantity, spx_price, net_premium*100)
             
             self.last_bc_trade_date = current_date
             
         except Exception as e:
-            error_msg = "Error placing Bear Call orders at " + str(self.Time) + ": " + str(e)
-            self.Debug(error_msg)
+            self.events.error("trades", "Error placing Bear Call orders: %s", e)
             self.session_trade_count -= 1
+            self.spread_book.discard(slot)
             return
 
+    def SendSpread(self, long_symbol, short_symbol, quantity, tag):
+        """Both legs of a spread as one combo order (a negative quantity closes it)"""
+        self.ComboMarketOrder([Leg.Create(long_symbol, 1), Leg.Create(short_symbol, -1)], quantity, tag=tag)
+
     def OnOrderEvent(self, orderEvent):
+        self.journal.order_event(orderEvent, self.spread_book.strategy_of(orderEvent.Symbol))
+        multiplier = self.Securities[orderEvent.Symbol].SymbolProperties.ContractMultiplier
+        self.metrics.on_order_event(orderEvent, multiplier)
+        closed = self.spread_book.on_order_event(orderEvent)
+        if closed is not None:
+            # Spreads are journaled under their first (long) leg, as in the entry
+            self.journal.exit(closed.long_symbol, closed.quantity, closed.exit_net, closed.reason, closed.name)
+            self.metrics.on_trade(closed.pnl * multiplier)
+            self.events.info("exits", "%s spread closed: %s, Qty: %s", closed.name, orderEvent.Symbol,
+                             orderEvent.FillQuantity)
+
         # Equity slippage
         if orderEvent.Status == OrderStatus.Filled:
             sec = self.Securities[orderEvent.Symbol]
@@ -503,60 +529,46 @@ class CombinedStrategy(QCAlgorithm):
                 slip = notional * 0.0001
                 self.Portfolio.CashBook[sec.QuoteCurrency.Symbol].AddAmount(-slip)
         
-        if orderEvent.Status == OrderStatus.Filled:
-            symbol = orderEvent.Symbol
-            quantity = orderEvent.FillQuantity
-            
-            # Update positions
-            if symbol in self.open_positions:
-                if quantity == -self.open_positions[symbol]["quantity"]:
-                    # Order closes the position
-                    strategy = self.open_positions[symbol]["strategy"]
-                    del self.open_positions[symbol]
-                    debug_msg = str(self.Time) + " - " + strategy + " position closed: " + str(symbol)
-                    self.Debug(debug_msg + ", Qty: " + str(quantity))
-                else:
-                    # Update quantity
-                    self.open_positions[symbol]["quantity"] = quantity
-                    debug_msg = str(self.Time) + " - Position updated: " + str(symbol) + ", Qty: " + str(quantity)
-                    self.Debug(debug_msg)
-            
-            # Order fill debug
-            order_msg = "Order filled: " + str(orderEvent.Symbol) + ", Qty: " + str(orderEvent.FillQuantity)
-            self.Debug(order_msg)
-            fee_msg = "Price: " + str(orderEvent.FillPrice) + ", Fee: $" + str(orderEvent.OrderFee.Value.Amount)
-            self.Debug(fee_msg)
+        # Order fill debug
+        if orderEvent.Status == OrderStatus.Filled and self.events.enabled("orders", DEBUG):
+            self.events.debug("orders", "Order filled: %s, Qty: %s, Price: %s, Fee: $%s", orderEvent.Symbol,
+                              orderEvent.FillQuantity, orderEvent.FillPrice, orderEvent.OrderFee.Value.Amount)
 
     def OnEndOfDay(self):
         # Update portfolio values
         options_value = self.Portfolio.TotalPortfolioValue
         self.options_portfolio_value = options_value
+        self.metrics.end_of_day(options_value, self.Portfolio.TotalAbsoluteHoldingsCost)
         
         # Calculate metrics
-        portfolio_growth = (options_value / 100000) - 1
-        portfolio_multiple = options_value / 100000
+        portfolio_growth = self.metrics.total_return
+        portfolio_multiple = self.metrics.growth
         
         vix_value = self.Securities[self.vix].Price if self.vix in self.Securities else "N/A"
-        open_positions_count = len(self.open_positions)
+        open_positions_count = self.spread_book.open_count()
+        open_legs = self.spread_book.leg_count()
         
         # Debug output
-        growth_pct = portfolio_growth * 100
-        portfolio_msg = "End of Day - Portfolio: $" + str(int(self.options_portfolio_value))
-        self.Debug(portfolio_msg)
-        growth_msg = "Growth: " + str(round(growth_pct, 1)) + "% (" + str(round(portfolio_multiple, 1)) + "x)"
-        positions_msg = ", VIX: " + str(vix_value) + ", Open: " + str(open_positions_count)
-        self.Debug(growth_msg + positions_msg)
-        self.Debug("Strategy: Winning + Profit Taking + Stop Loss + Natural Scaling")
+        self.events.info("eod", "End of Day - Portfolio: $%d, Growth: %.1f%% (%.1fx), Drawdown: %.1f%%, VIX: %s, "
+                         "Open: %d (%d legs)", self.options_portfolio_value, portfolio_growth * 100,
+                         portfolio_multiple, self.metrics.drawdown * 100, vix_value, open_positions_count, open_legs)
+        self.events.debug("eod", "Strategy: Winning + Profit Taking + Stop Loss + Natural Scaling")
+        self.events.flush()
+        self.journal.flush()
 
     def OnEndOfAlgorithm(self):
+        self.events.flush()
+        self.journal.close()
+        self.spx_history.save()
         final_value = self.Portfolio.TotalPortfolioValue
-        total_return = (final_value - 100000) / 100000 * 100
-        portfolio_multiple = final_value / 100000
+        portfolio_multiple = final_value / self.metrics.initial_value
+        total_return = (portfolio_multiple - 1) * 100
         
         self.Log("=== NATURAL SCALING STRATEGY RESULTS ===")
         self.Log("Final Portfolio Value: $" + str(round(final_value, 2)))
         self.Log("Total Return: " + str(round(total_return, 2)) + "%")
         self.Log("Portfolio Growth: " + str(round(portfolio_multiple, 1)) + "x original size")
+        self.Log("Performance: " + self.metrics.format())
         
         # Position size evolution
         if self.vix in self.Securities:
@@ -575,4 +587,6 @@ class CombinedStrategy(QCAlgorithm):
                 growth_factor = round(final_scaled_size/15, 1)
                 self.Log("Position Size Growth: " + str(growth_factor) + "x larger")
         
+        self.Log("Bar callbacks skipped outside trading windows: " + str(self.windows.skipped)
+                 + " of " + str(self.windows.skipped + self.windows.dispatched))
         self.Log("Strategy Features: Market Regime Filter + VIX Sizing + Profit Taking + Stop Loss + Natural Scaling")
@@ -1,4 +1,13 @@
 from AlgorithmImports import *
+from datetime import time
+from common.event_log import EventLog, DEBUG
+from common.window_scheduler import WindowScheduler
+from common.trading_calendar import get_calendar
+from common.greeks import GreeksEngine
+from common.holdings_index import HoldingsIndex
+from common.combo_orders import ComboOrderManager
+from common.trade_journal import TradeJournal
+from common.metrics import PerformanceMetrics
 
 class ZeroDTE_SPX_ReverseIronCondor(QCAlgorithm):
     def Initialize(self):
@@ -6,6 +15,9 @@ class ZeroDTE_SPX_ReverseIronCondor(QCAlgorithm):
         self.SetEndDate(2024, 12, 31)
         self.SetCash(10000)
 
+        # Skip reasons and fills are logged at DEBUG; set log_level=DEBUG to see them
+        self.events = EventLog(self, level=self.GetParameter("log_level") or "INFO")
+
         # Add SPX Index
         self.spx = self.AddIndex("SPX", Resolution.Minute).Symbol
 
@@ -13,10 +25,29 @@ class ZeroDTE_SPX_ReverseIronCondor(QCAlgorithm):
         self.option = self.AddIndexOption("SPX", Resolution.Minute)
         self.option.SetFilter(lambda universe: universe.IncludeWeeklys().Expiration(0, 1).Strikes(-10, 10))
 
+        # Implied vol and Greeks computed from chain quotes
+        self.greeks = GreeksEngine()
+
+        # Open positions, kept up to date from fills
+        self.holdings = HoldingsIndex()
+
+        # Condors go out as one combo order with a profit/stop bracket on the whole structure
+        self.combos = ComboOrderManager(self)
+        self.journal = TradeJournal.in_object_store(self, "journal/0dte_spx_reverse_iron_condor",
+                                                    strategy="ReverseIronCondor")
+        # Running performance statistics; trades are counted per closed condor
+        self.metrics = PerformanceMetrics(self.Portfolio.TotalPortfolioValue,
+                                          capacity=(self.EndDate - self.StartDate).days + 1,
+                                          trades_from_fills=False)
+
         # Check for trades multiple times per day
-        self.Schedule.On(self.DateRules.EveryDay(), self.TimeRules.At(9, 35), self.TradeOptions)
-        self.Schedule.On(self.DateRules.EveryDay(), self.TimeRules.At(10, 30), self.TradeOptions)
-        self.Schedule.On(self.DateRules.EveryDay(), self.TimeRules.At(14, 30), self.TradeOptions)
+        self.windows = WindowScheduler()
+        self.windows.add_slot("entry", time(9, 35))
+        self.windows.add_slot("entry", time(10, 30))
+        self.windows.add_slot("entry", time(14, 30))
+        self.windows.schedule(self, self.DateRules.EveryDay(), self.TradeOptions)
+        self.calendar = get_calendar()
+        self.early_close = time(13, 0)
 
         # Strategy Parameters
         self.max_alloc = 0.20  # 20% portfolio allocation
@@ -28,55 +59,50 @@ class ZeroDTE_SPX_ReverseIronCondor(QCAlgorithm):
         self.SetSecurityInitializer(lambda security: security.SetFeeModel(CustomFeeModel()))
 
     def TradeOptions(self):
+        # Slots after an early (13:00) close would trade a closed market
+        if self.calendar.is_early_close(self.Time) and self.Time.time() >= self.early_close:
+            return
+
         # Check if there are existing open SPX option positions
-        open_positions = [
-            kvp.Value for kvp in self.Portfolio if kvp.Value.Invested and kvp.Key.SecurityType == SecurityType.Option
-        ]
-        
-        if open_positions:
-            self.Debug("Existing open SPX option positions detected. Skipping new entry.")
+        if self.holdings.has_options():
+            self.events.debug("entries", "Existing open SPX option positions detected. Skipping new entry.")
             return  # Skip new trades if there are existing open positions
 
         if self.Portfolio.TotalPortfolioValue * self.max_alloc < 500:
-            self.Debug("Insufficient buying power for new positions.")
+            self.events.debug("entries", "Insufficient buying power for new positions.")
             return
 
         # Get Option Chain Data
         option_chain = self.CurrentSlice.OptionChains.get(self.option.Symbol, None)
         if option_chain is None:
-            self.Debug(f"No option chain data available at {self.Time}.")
+            self.events.debug("entries", "No option chain data available.")
             return
 
-        # Select ATM Put & Call Contracts
-        atm_puts = sorted(
-            [contract for contract in option_chain if contract.Right == OptionRight.Put and contract.Greeks.Delta > -0.40],
-            key=lambda x: abs(x.Greeks.Delta + 0.30)
-        )
+        # Greeks for the whole chain in one vectorized pass (cached per minute)
+        spot = self.Securities[self.spx].Price
+        greeks = self.greeks.get(option_chain, spot, self.Time)
 
-        atm_calls = sorted(
-            [contract for contract in option_chain if contract.Right == OptionRight.Call and contract.Greeks.Delta < 0.40],
-            key=lambda x: abs(x.Greeks.Delta - 0.30)
-        )
+        # Long legs: delta closest to +/-0.30 among contracts with |delta| < 0.40
+        long_put = greeks.nearest_delta(OptionRight.Put, -0.30, max_abs_delta=0.40)
+        long_call = greeks.nearest_delta(OptionRight.Call, 0.30, max_abs_delta=0.40)
 
-        if not atm_puts or not atm_calls:
-            self.Debug("No suitable ATM puts or calls found.")
+        if long_put is None or long_call is None:
+            self.events.debug("entries", "No suitable ATM puts or calls found.")
             return
 
-        # Select Long Put and Short Put (10 strikes apart)
-        long_put = atm_puts[0]
-        short_put = next((put for put in atm_puts if put.Strike == long_put.Strike - 10), None)
-
-        # Select Long Call and Short Call (10 strikes apart)
-        long_call = atm_calls[0]
-        short_call = next((call for call in atm_calls if call.Strike == long_call.Strike + 10), None)
+        # Short legs 10 points further out, same expiry and the same |delta| < 0.40 filter
+        short_put = greeks.at_strike(OptionRight.Put, long_put.Strike - 10, long_put.Expiry.date(),
+                                     max_abs_delta=0.40)
+        short_call = greeks.at_strike(OptionRight.Call, long_call.Strike + 10, long_call.Expiry.date(),
+                                      max_abs_delta=0.40)
 
         if not short_put or not short_call:
-            self.Debug("No valid short put or short call contract found 10 strikes apart.")
+            self.events.debug("entries", "No valid short put or short call contract found 10 strikes apart.")
             return
 
         # Ensure Bid Prices are Not Zero
         if long_put.AskPrice <= 0 or long_call.AskPrice <= 0:
-            self.Debug("Ask price is zero for selected contracts.")
+            self.events.debug("entries", "Ask price is zero for selected contracts.")
             return
 
         # Calculate max possible contracts based on available allocation
@@ -87,30 +113,46 @@ class ZeroDTE_SPX_ReverseIronCondor(QCAlgorithm):
         quantity = min(max_contracts, 1)
 
         if quantity <= 0:
-            self.Debug("Insufficient funds for even 1 contract.")
+            self.events.debug("entries", "Insufficient funds for even 1 contract.")
             return
 
-        # Place Orders: Open Inverted Iron Condor (Buy ATM Put, Sell Lower Strike Put, Buy ATM Call, Sell Higher Strike Call)
-        self.MarketOrder(long_put.Symbol, quantity)
-        self.MarketOrder(short_put.Symbol, -quantity)
-        self.MarketOrder(long_call.Symbol, quantity)
-        self.MarketOrder(short_call.Symbol, -quantity)
-
-        # Set Profit-Taking and Stop-Loss Orders
-        self.LimitOrder(long_put.Symbol, quantity, long_put.AskPrice * (1 + self.profit_take_pct))
-        self.StopMarketOrder(long_put.Symbol, quantity, long_put.AskPrice * (1 - self.stop_loss_pct))
-
-        self.LimitOrder(long_call.Symbol, quantity, long_call.AskPrice * (1 + self.profit_take_pct))
-        self.StopMarketOrder(long_call.Symbol, quantity, long_call.AskPrice * (1 - self.stop_loss_pct))
+        # Open Inverted Iron Condor as one combo (Buy ATM Put, Sell Lower Strike Put, Buy ATM Call,
+        # Sell Higher Strike Call) with a one-cancels-other profit target / stop loss on its net value
+        legs = [(long_put.Symbol, 1), (short_put.Symbol, -1), (long_call.Symbol, 1), (short_call.Symbol, -1)]
+        self.combos.open("ReverseIronCondor", legs, quantity,
+                         take_profit_pct=self.profit_take_pct, stop_loss_pct=self.stop_loss_pct)
+        net_debit = long_put.AskPrice - short_put.BidPrice + long_call.AskPrice - short_call.BidPrice
+        self.journal.entry(long_put.Symbol, quantity, net_debit, "0.30 delta strangle")
 
-        self.Debug(f"Placed orders for {quantity} contracts of SPX 0DTE Inverted Iron Condor.")
+        self.events.info("entries", "Placed orders for %d contracts of SPX 0DTE Inverted Iron Condor.", quantity)
 
     def OnData(self, slice):
-        pass  # Not needed for this strategy
+        # Stop side of the condor bracket (the profit target rests as a combo limit order)
+        self.combos.check_stops()
 
     def OnOrderEvent(self, orderEvent):
-        if orderEvent.Status == OrderStatus.Filled:
-            self.Debug(f"Order filled: {orderEvent.Symbol}, Quantity: {orderEvent.FillQuantity}")
+        self.journal.order_event(orderEvent)
+        self.holdings.on_order_event(orderEvent)
+        multiplier = self.Securities[orderEvent.Symbol].SymbolProperties.ContractMultiplier
+        self.metrics.on_order_event(orderEvent, multiplier)
+        structure = self.combos.on_order_event(orderEvent)
+        if structure is not None:
+            self.journal.exit(structure.legs[0][0], structure.quantity, structure.exit_net, structure.reason)
+            self.metrics.on_trade(structure.pnl * multiplier)
+            self.events.info("exits", "%s closed (%s), P&L %.2f per unit", structure.name, structure.reason,
+                             structure.pnl / structure.quantity)
+        if orderEvent.Status == OrderStatus.Filled and self.events.enabled("orders", DEBUG):
+            self.events.debug("orders", "Order filled: %s, Quantity: %s", orderEvent.Symbol, orderEvent.FillQuantity)
+
+    def OnEndOfDay(self):
+        self.metrics.end_of_day(self.Portfolio.TotalPortfolioValue, self.Portfolio.TotalAbsoluteHoldingsCost)
+        self.events.flush()
+        self.journal.flush()
+
+    def OnEndOfAlgorithm(self):
+        self.events.info("summary", "Performance: %s", self.metrics.format())
+        self.events.flush()
+        self.journal.close()
 
 class CustomFeeModel(FeeModel):
     def GetOrderFee(self, parameters):
@@ -1,7 +1,13 @@
 from AlgorithmImports import *
 import pandas as pd
 import numpy as np
-from statsmodels.tsa.arima.model import ARIMA
+from common.event_log import EventLog
+from common.ar_models import RollingAR
+from common.trade_journal import TradeJournal
+from common.history_cache import closes_between, load_snapshot, save_snapshot
+from common.order_schedule import OrderSchedule
+from common.stop_monitor import StopMonitor
+from common.metrics import PerformanceMetrics
 
 class EURUSDAutoregression(QCAlgorithm):
 
@@ -10,17 +16,46 @@ class EURUSDAutoregression(QCAlgorithm):
         self.SetEndDate(2024, 12, 31)    
         self.SetCash(100000)             
 
-        # Forex pair
+        self.events = EventLog(self, level=self.GetParameter("log_level") or "INFO")
+        self.journal = TradeJournal.in_object_store(self, "journal/eurusd_autoregression", strategy="EURUSD-AR")
+        self.metrics = PerformanceMetrics(self.Portfolio.TotalPortfolioValue,
+                                          capacity=(self.EndDate - self.StartDate).days + 1)
+
+        # Forex pair; the daily subscription's consolidator feeds the model, so minute bars the
+        # stops add while a position is open never reach it
         self.symbol = self.AddForex("EURUSD", Resolution.Daily, Market.Oanda).Symbol
+        daily = QuoteBarConsolidator(1)
+        daily.DataConsolidated += self.OnDailyBar
+        self.SubscriptionManager.AddConsolidator(self.symbol, daily)
+        # Stops checked on minute bars while a position is open (minute_stops=0: on the daily bars)
+        minute_stops = (self.GetParameter("minute_stops") or "1") == "1"
 
         # Parameters
-        self.lookback = 60       # days of history for training
-        self.retrain_freq = 30   # retrain every N days
-        self.last_train = -self.retrain_freq
-        self.model = None
+        self.lookback = int(self.GetParameter("lookback") or 60)   # daily returns in the AR fit's window
+        self.ar_order = int(self.GetParameter("ar_order") or 1)
         self.current_forecast = 0
+
+        # AR(p) on the last `lookback` daily log returns, as the baseline's 60-day ARIMA, updated
+        # in O(p^2) with every bar (a hard window, the same fit lean_local.walk_forward scores)
+        self.model = RollingAR(self.ar_order, self.lookback)
+        self.models = {(self.ar_order, self.lookback): self.model}
+        self.last_close = None
+
+        # order_schedule: ObjectStore key of a lean_local.walk_forward schedule; every scheduled
+        # (order, window) keeps its own model and the one in force at the time trades
+        self.schedule = None
+        if self.GetParameter("order_schedule"):
+            self.schedule = OrderSchedule.from_object_store(self, self.GetParameter("order_schedule"))
+            for order, window in self.schedule.candidates:
+                self.models.setdefault((order, window), RollingAR(order, window))
+
+        # resume=1 continues from the models saved by the previous run instead of warming up
+        if not (self.GetParameter("resume") == "1" and self.Resume()):
+            self.SetWarmUp(max(window for _, window in self.models) + 1, Resolution.Daily)
         self.stop_loss_pct = 0.01  # 1% stop loss
         self.take_profit_pct = 0.02  # 2% take profit
+        self.stops = StopMonitor(self, self.OnStopExit, Resolution.Daily,
+                                 Resolution.Minute if minute_stops else None)
 
         # Schedule daily trade execution after data update
         self.Schedule.On(self.DateRules.EveryDay(self.symbol),
@@ -28,61 +63,84 @@ class EURUSDAutoregression(QCAlgorithm):
                          self.TradeSignal)
 
     def OnData(self, data):
-        # Not trading directly here, handled by scheduled TradeSignal
-        pass
+        self.stops.on_data(data)
 
-    def TrainModel(self):
-        # Get history for AR model
-        history = self.History(self.symbol, self.lookback, Resolution.Daily)
-        if history.empty: 
-            return False
-        
-        closes = history["close"].values
-        returns = np.diff(np.log(closes))  # log returns
-
-        try:
-            # Fit ARIMA(p,0,0) ~ AR model
-            model = ARIMA(returns, order=(1,0,0))
-            self.model = model.fit()
-            self.Debug(f"Model retrained on {self.Time.date()}")
-            return True
-        except Exception as e:
-            self.Debug(f"Model training error: {str(e)}")
-            return False
+    def OnDailyBar(self, sender, bar):
+        # Update the AR model with each daily bar (warm-up included); trading is in TradeSignal
+        close = float(bar.Close)
+        if self.last_close is not None and close > 0 and self.last_close > 0:
+            self.UpdateModels(np.log(close / self.last_close))
+        self.last_close = close
 
-    def Forecast(self):
-        if self.model is None:
-            return 0
-        try:
-            forecast = self.model.forecast(steps=1)
-            return forecast[0]
-        except:
-            return 0
+    def UpdateModels(self, value):
+        for model in self.models.values():
+            model.update(value)
+
+    def StatePrefix(self, order, window):
+        return "model/" if (order, window) == (self.ar_order, self.lookback) else "model/%d-%d/" % (order, window)
+
+    def Resume(self):
+        """Restore the AR fit saved at the end of an earlier run, then catch up on the bars since"""
+        state = load_snapshot(self, "state/eurusd_autoregression", not_after=self.StartDate)
+        if state is None or not all(model.set_state(state, self.StatePrefix(*key))
+                                    for key, model in self.models.items()):
+            self.events.info("state", "No model snapshot to resume from, warming up")
+            return False
+        self.last_close = float(state["last_close"])
+        _, closes = closes_between(self, self.symbol, state["time"], self.StartDate, Resolution.Daily)
+        for close in closes:
+            if close > 0:
+                self.UpdateModels(np.log(close / self.last_close))
+                self.last_close = close
+        self.events.info("state", "Resumed AR(%d) from %s (+%d bars)", self.ar_order, state["time"], len(closes))
+        return True
 
     def TradeSignal(self):
-        # Retrain model every N days
-        if (self.Time - self.StartDate).days - self.last_train >= self.retrain_freq:
-            if self.TrainModel():
-                self.last_train = (self.Time - self.StartDate).days
+        if self.IsWarmingUp:
+            return
 
-        # Forecast return
-        self.current_forecast = self.Forecast()
+        # One-step forecast from the up-to-date fit (the scheduled one, if a schedule is loaded)
+        choice = self.schedule.at(self.Time) if self.schedule is not None else None
+        self.current_forecast = self.models[choice or (self.ar_order, self.lookback)].forecast()
 
         # Generate signal
+        held = self.Portfolio[self.symbol].Quantity
         if self.current_forecast > 0:
             self.SetHoldings(self.symbol, 0.95)
         elif self.current_forecast < 0:
             self.SetHoldings(self.symbol, -0.95)
+        quantity = self.Portfolio[self.symbol].Quantity
+        if np.sign(quantity) != np.sign(held) and quantity != 0:
+            self.journal.entry(self.symbol, quantity, self.Securities[self.symbol].Price,
+                               "AR forecast up" if quantity > 0 else "AR forecast down")
+
+        # Stop loss / take profit around the average price, re-armed with every signal
+        holding = self.Portfolio[self.symbol]
+        if holding.Invested:
+            self.stops.open(self.symbol, holding.AveragePrice, holding.Quantity,
+                            stop=self.stop_loss_pct, take=self.take_profit_pct)
+            self.stops.check(self.symbol, self.Securities[self.symbol].Price)
+        else:
+            self.stops.close(self.symbol)
+
+    def OnStopExit(self, symbol, price, reason):
+        self.journal.exit(symbol, -self.Portfolio[symbol].Quantity, price, reason)
+        self.Liquidate(symbol)
 
-        # Add stop loss / take profit
-        if self.Portfolio[self.symbol].Invested:
-            invested_price = self.Portfolio[self.symbol].AveragePrice
-            current_price = self.Securities[self.symbol].Price
-            direction = np.sign(self.Portfolio[self.symbol].Quantity)
+    def OnOrderEvent(self, orderEvent):
+        self.journal.order_event(orderEvent)
+        self.metrics.on_order_event(orderEvent)
 
-            stop_loss_level = invested_price * (1 - self.stop_loss_pct * direction)
-            take_profit_level = invested_price * (1 + self.take_profit_pct * direction)
+    def OnEndOfDay(self):
+        self.metrics.end_of_day(self.Portfolio.TotalPortfolioValue, self.Portfolio.TotalAbsoluteHoldingsCost)
+        self.events.flush()
+        self.journal.flush()
 
-            if (direction == 1 and (current_price <= stop_loss_level or current_price >= take_profit_level)) \
-               or (direction == -1 and (current_price >= stop_loss_level or current_price <= take_profit_level)):
-                self.Liquidate(self.symbol)
\ No newline at end of file
+    def OnEndOfAlgorithm(self):
+        state = {"last_close": self.last_close}
+        for key, model in self.models.items():
+            state.update(model.get_state(self.StatePrefix(*key)))
+        save_snapshot(self, "state/eurusd_autoregression", state)
+        self.Log("Performance: " + self.metrics.format())
+        self.events.flush()
+        self.journal.close()
@@ -1,4 +1,11 @@
 from AlgorithmImports import *
+from common.event_log import EventLog
+from common.holdings_index import HoldingsIndex
+from common.trade_journal import TradeJournal
+from common.history_cache import HistoryCache, load_snapshot, save_snapshot
+from common.indicators import MACD
+from common.stop_monitor import StopMonitor
+from common.metrics import PerformanceMetrics
 
 class QQQ_Hourly_MACD_ShortSQQQ(QCAlgorithm):
 
@@ -8,36 +15,77 @@ class QQQ_Hourly_MACD_ShortSQQQ(QCAlgorithm):
         self.SetEndDate(2025, 8, 15)
         self.SetCash(100000)
 
+        self.events = EventLog(self, level=self.GetParameter("log_level") or "INFO")
+
         # Use Interactive Brokers brokerage/fees (do this BEFORE adding securities)
         self.SetBrokerageModel(BrokerageName.InteractiveBrokersBrokerage, AccountType.Margin)
 
         # Add symbols (hourly regular hours)
         self.qqq  = self.AddEquity("QQQ",  Resolution.Hour).Symbol   # signal source
-        self.sqqq = self.AddEquity("SQQQ", Resolution.Hour).Symbol   # instrument we short
+        self.sqqq = self.AddEquity("SQQQ", Resolution.Hour).Symbol   # we short
+
+        # Trailing stop on the SQQQ short, checked on minute bars while it is open (minute_stops=0:
+        # hourly). Signals stay on the hourly QQQ bars; the SQQQ bar that ends with each of them
+        # gives the trade price.
+        minute_stops = (self.GetParameter("minute_stops") or "1") == "1"
 
         # Indicator setup (fast–slow EMA on QQQ)
-        self.fast_period = 8
-        self.slow_period = 55
-        self.trailing_stop_pct = 0.05  # for short: exit if price rises this much from the post-entry low
+        self.fast_period = int(self.GetParameter("fast_period") or 8)
+        self.slow_period = int(self.GetParameter("slow_period") or 55)
+        # for short: exit if price rises this much from the post-entry low
+        self.trailing_stop_pct = float(self.GetParameter("trailing_stop_pct") or 0.05)
 
-        self.fast = self.EMA(self.qqq, self.fast_period, Resolution.Hour)
-        self.slow = self.EMA(self.qqq, self.slow_period, Resolution.Hour)
+        # Fast/slow EMAs of hourly QQQ closes, updated in OnData; crossover() keeps the previous lines
+        self.macd = MACD(self.fast_period, self.slow_period)
 
         # Trade state
         self.in_position = False
         self.entry_price = None
-        self.trail_min_price = None   # lowest SQQQ price since entry (for trailing stop on a short)
         self.trade_count = 0
+        self.stops = StopMonitor(self, self.OnStopExit, Resolution.Hour,
+                                 Resolution.Minute if minute_stops else None)
+        self.holdings = HoldingsIndex()
+        self.journal = TradeJournal.in_object_store(self, "journal/qqq_short_sqqq", strategy="ShortSQQQ")
+        self.metrics = PerformanceMetrics(self.Portfolio.TotalPortfolioValue,
+                                          capacity=(self.EndDate - self.StartDate).days + 1)
+
+        # Hourly QQQ closes kept across runs; resume=1 rebuilds the EMAs from them instead of warming up
+        self.history = HistoryCache(self, "history/qqq_hourly", Resolution.Hour)
+        if not (self.GetParameter("resume") == "1" and self.Resume()):
+            # Warm up ~3 trading days (covers 62h EMA)
+            self.SetWarmUp(timedelta(days=3))
+
+    def Resume(self):
+        """Replay cached closes (plus any bars missed since) into the EMAs and restore the crossover state"""
+        state = load_snapshot(self, "state/qqq_short_sqqq", not_after=self.StartDate)
+        if state is None:
+            self.events.info("state", "No EMA snapshot to resume from, warming up")
+            return False
+        missed = self.history.fill(self.qqq, self.StartDate)
+        times, closes = self.history.history(self.qqq, end=self.StartDate)
+        if len(closes) < self.slow_period:
+            return False
+        self.macd.update_many(closes)
+        if missed:
+            self.macd.crossover()
+        else:
+            self.macd.prev_fast, self.macd.prev_slow = float(state["prev_fast"]), float(state["prev_slow"])
+        self.events.info("state", "Resumed EMAs from %d cached bars (+%d missed) up to %s", len(closes), missed,
+                         times[-1])
+        return True
 
-        self.prev_fast = None
-        self.prev_slow = None
+    def OnData(self, data: Slice):
+        held = self.in_position  # a short stopped out on this bar is not re-entered before the next one
+        self.stops.on_data(data)
+        if not data.Bars.ContainsKey(self.qqq):
+            return  # SQQQ minute bars of an open short between the hourly QQQ bars only feed the stop
 
-        # Warm up ~3 trading days (covers 62h EMA)
-        self.SetWarmUp(timedelta(days=3))
+        close = data.Bars[self.qqq].Close
+        self.macd.update(close)
+        self.history.append(self.qqq, self.Time, close)
 
-    def OnData(self, data: Slice):
         # Warm-up or indicators not ready? stop
-        if self.IsWarmingUp or not self.fast.IsReady or not self.slow.IsReady:
+        if self.IsWarmingUp or not self.macd.is_ready:
             return
 
         # Make sure we have bars for BOTH QQQ and SQQQ this hour
@@ -48,21 +96,14 @@ class QQQ_Hourly_MACD_ShortSQQQ(QCAlgorithm):
 
         price = sqqq_bar.Close
 
-        fast_val = self.fast.Current.Value
-        slow_val = self.slow.Current.Value
-        macd_line = fast_val - slow_val
-
-        # Crossover detection (use previous EMA values to detect a cross on this bar)
-        cross_up = (
-            self.prev_fast is not None and self.prev_slow is not None
-            and self.prev_fast <= self.prev_slow and fast_val > slow_val
-        )
-        cross_down = (
-            self.prev_fast is not None and self.prev_slow is not None
-            and self.prev_fast >= self.prev_slow and fast_val < slow_val
-        )
-
-        if not self.in_position:
+        macd_line = self.macd.value
+
+        # Crossover since the previous bar that got this far (+1 fast crossed above slow, -1 below)
+        cross = self.macd.crossover()
+        cross_up = cross > 0
+        cross_down = cross < 0
+
+        if not held:
             # SHORT SQQQ when QQQ turns bullish (fast crosses above slow; MACD positive)
             if cross_up and macd_line > 0:
                 qty = self.CalculateOrderQuantity(self.sqqq, -1.0)  # target -100% allocation
@@ -70,43 +111,63 @@ class QQQ_Hourly_MACD_ShortSQQQ(QCAlgorithm):
                     self.MarketOrder(self.sqqq, qty)
                     self.in_position = True
                     self.entry_price = price
-                    self.trail_min_price = price   # for shorts, track the LOWEST price after entry
+                    # for shorts, the trailing stop tracks the LOWEST price after entry
+                    self.stops.open(self.sqqq, price, qty, trail=self.trailing_stop_pct)
                     self.trade_count += 1
-                    self.Debug(f"SHORT {abs(qty)} SQQQ @ {price:.2f} on {self.Time}")
-        else:
-            # Update trailing minimum (best move for a short is down)
-            if price < self.trail_min_price:
-                self.trail_min_price = price
+                    self.events.info("trades", "SHORT %d SQQQ @ %.2f", abs(qty), price)
+                    self.journal.entry(self.sqqq, qty, price, "QQQ EMA cross up")
+        elif self.in_position and cross_down and macd_line > 0:
+            # Exit if QQQ momentum flips bearish while MACD still > 0 (the trailing stop is in OnStopExit)
+            self.Cover(price, "QQQ EMA cross down")
+            self.stops.close(self.sqqq)
+
+    def OnStopExit(self, symbol, price, reason):
+        self.Cover(price, reason)
+
+    def Cover(self, price, reason):
+        qty = self.holdings.quantity(self.sqqq)
+        if qty < 0:
+            self.MarketOrder(self.sqqq, -qty)  # cover
+            self.events.info("trades", "COVER %d SQQQ @ %.2f (%s)", abs(qty), price, reason)
+            self.journal.exit(self.sqqq, -qty, price, reason)
+        self.in_position = False
+        self.entry_price = None
 
-            # Draw-up from the post-entry low (adverse move for a short)
-            denom = max(self.trail_min_price, 1e-9)
-            drawup = (price - self.trail_min_price) / denom
+    def OnOrderEvent(self, orderEvent):
+        self.journal.order_event(orderEvent)
+        self.holdings.on_order_event(orderEvent)
+        self.metrics.on_order_event(orderEvent)
 
-            # Exit if trailing stop hit OR QQQ momentum flips bearish while MACD still > 0
-            if drawup >= self.trailing_stop_pct or (cross_down and macd_line > 0):
-                qty = self.Portfolio[self.sqqq].Quantity
-                if qty < 0:
-                    self.MarketOrder(self.sqqq, -qty)  # cover
-                    self.Debug(f"COVER {abs(qty)} SQQQ @ {price:.2f} on {self.Time} (Drawup: {drawup:.2%})")
-                self.in_position = False
-                self.entry_price = None
-                self.trail_min_price = None
-
-        # Store EMAs for next-bar crossover detection
-        self.prev_fast = fast_val
-        self.prev_slow = slow_val
+    def OnEndOfDay(self):
+        self.metrics.end_of_day(self.Portfolio.TotalPortfolioValue, self.Portfolio.TotalAbsoluteHoldingsCost)
+        self.events.flush()
+        self.journal.flush()
 
     def OnEndOfAlgorithm(self):
+        self.events.flush()
+
         # Ensure flat at the end
-        if self.Portfolio[self.sqqq].Invested:
+        if self.holdings.is_invested(self.sqqq):
+            self.journal.exit(self.sqqq, -self.holdings.quantity(self.sqqq), self.Securities[self.sqqq].Price,
+                              "end of backtest")
             self.Liquidate(self.sqqq)
+        self.journal.close()
+
+        self.history.save()
+        if self.macd.prev_fast is not None:
+            save_snapshot(self, "state/qqq_short_sqqq",
+                          {"prev_fast": self.macd.prev_fast, "prev_slow": self.macd.prev_slow})
 
         self.Log(f"Total SQQQ SHORT Trades: {self.trade_count}")
         self.Log(f"Final Portfolio Value: ${self.Portfolio.TotalPortfolioValue:.2f}")
 
-        total_return = (self.Portfolio.TotalPortfolioValue / 100000 - 1) * 100
+        # The final liquidation happens after the last end of day
+        self.metrics.mark(self.Portfolio.TotalPortfolioValue)
+        growth = self.Portfolio.TotalPortfolioValue / self.metrics.initial_value
+        total_return = (growth - 1) * 100
         years = (self.EndDate - self.StartDate).days / 365.25
-        annualized_return = ((self.Portfolio.TotalPortfolioValue / 100000) ** (1 / years) - 1) * 100
+        annualized_return = (growth ** (1 / years) - 1) * 100
 
         self.Log(f"Total Return: {total_return:.2f}%")
         self.Log(f"Annualized Return: {annualized_return:.2f}%")
+        self.Log(f"Performance: {self.metrics.format()}")
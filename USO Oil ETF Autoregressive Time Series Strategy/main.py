@@ -1,6 +1,13 @@
 from AlgorithmImports import *
-import statsmodels.api as sm
 import numpy as np
+from common.event_log import EventLog
+from common.ar_models import BatchARFit, RollingAR
+from common.indicators import LogReturnWindow
+from common.trade_journal import TradeJournal
+from common.history_cache import load_snapshot, save_snapshot
+from common.order_schedule import OrderSchedule
+from common.stop_monitor import StopMonitor
+from common.metrics import PerformanceMetrics
 
 class USOAutoregressionOptimization(QCAlgorithm):
 
@@ -10,71 +17,185 @@ class USOAutoregressionOptimization(QCAlgorithm):
         self.SetEndDate(2025, 7, 30)
         self.SetCash(100000)
 
+        self.events = EventLog(self, level=self.GetParameter("log_level") or "INFO")
+        self.journal = TradeJournal.in_object_store(self, "journal/uso_autoregression", strategy="USO-AR")
+        self.metrics = PerformanceMetrics(self.Portfolio.TotalPortfolioValue,
+                                          capacity=(self.EndDate - self.StartDate).days + 1)
+
         # Brokerage & account type
         self.SetBrokerageModel(BrokerageName.Default, AccountType.Margin)
 
-        # Add USO ETF
-        self.symbol = self.AddEquity("USO", Resolution.Daily).Symbol
+        # Universe: USO by default; a comma-separated list of tickers runs the ranked version
+        tickers = [t.strip().upper() for t in (self.GetParameter("universe") or "USO").split(",") if t.strip()]
+        self.symbols = [self.AddEquity(ticker, Resolution.Daily).Symbol for ticker in tickers]
+        self.top_n = int(self.GetParameter("top_n") or 1)   # positions per side
+        self.allocation = 0.5                                # risk control, 50% allocation per side
 
         # Warm up for regression
         self.lookback = int(self.GetParameter("lookback") or 30)
 
-        # Rolling window for AR model
-        self.window = RollingWindow[float](self.lookback + 1)
+        # order_schedule: ObjectStore key of a lean_local.walk_forward schedule (--bar-days 14),
+        # applied to every symbol; without one the fit is AR(1) over `lookback` returns
+        self.schedule = None
+        if self.GetParameter("order_schedule"):
+            self.schedule = OrderSchedule.from_object_store(self, self.GetParameter("order_schedule"))
+        capacity = max(self.lookback, self.schedule.max_window if self.schedule is not None else 0)
+        candidates = self.schedule.candidates if self.schedule is not None else [(1, self.lookback)]
+
+        # Recent log returns per symbol (kept for snapshots), and a rolling AR fit per symbol and
+        # candidate (order, window), each updated in O(p^2) per return; ranking scores them together
+        self.returns = {symbol: LogReturnWindow(capacity) for symbol in self.symbols}
+        self.models = {symbol: {key: RollingAR(*key) for key in candidates} for symbol in self.symbols}
+        self.refit = False
+        self.trade_due = False
+        if self.GetParameter("resume") == "1":
+            self.Resume()
 
         # Consolidate daily bars into weekly bars
-        consolidator = TradeBarConsolidator(timedelta(days=14))
-        consolidator.DataConsolidated += self.OnWeeklyBar
-        self.SubscriptionManager.AddConsolidator(self.symbol, consolidator)
-
-        # Track signals
-        self.predicted_return = 0
-
-        # Risk management parameters
+        for symbol in self.symbols:
+            consolidator = TradeBarConsolidator(timedelta(days=14))
+            consolidator.DataConsolidated += self.OnWeeklyBar
+            self.SubscriptionManager.AddConsolidator(symbol, consolidator)
+        # One trading pass per daily bar of the first symbol, in OnData once every bi-weekly bar of
+        # the day is in; consolidators stay on the daily subscriptions, so minute bars the stops add
+        # while a position is open never reach them
+        daily = TradeBarConsolidator(1)
+        daily.DataConsolidated += self.OnDailyBar
+        self.SubscriptionManager.AddConsolidator(self.symbols[0], daily)
+
+        # Track signals: symbol -> +1 long, -1 short (absent: no position wanted)
+        self.targets = {}
+        self.predicted_return = {}
+        self.entering = {}   # symbol -> reason of an entry order not filled yet
+
+        # Risk management parameters, checked on the minute bars of open positions
+        # (minute_stops=0: on the daily bars)
         self.stopLossPct = 0.05
         self.takeProfitPct = 0.10
+        minute_stops = (self.GetParameter("minute_stops") or "1") == "1"
+        self.stops = StopMonitor(self, self.OnStopExit, Resolution.Daily,
+                                 Resolution.Minute if minute_stops else None)
 
     def OnWeeklyBar(self, sender, bar):
-        # Store weekly close in window
-        self.window.Add(float(bar.Close))
-
-        # Run AR(1) regression if enough data
-        if self.window.Count > self.lookback:
-            try:
-                data = np.array([x for x in self.window])
-                returns = np.diff(np.log(data))  # log returns
-                model = sm.tsa.ARIMA(returns, order=(1,0,0)).fit()
-                forecast = model.forecast()[0]
-                self.predicted_return = forecast
-            except Exception as e:
-                self.Debug(f"AR model error: {e}")
+        value = self.returns[bar.Symbol].update(bar.Close)
+        if value is not None:
+            for model in self.models[bar.Symbol].values():
+                model.update(value)
+            self.refit = True
+
+    def Resume(self):
+        """Restore the return windows saved by an earlier run so ranking starts without a warm-up"""
+        state = load_snapshot(self, "state/uso_autoregression", not_after=self.StartDate)
+        if state is None:
+            self.events.info("state", "No return snapshot to resume from")
+            return
+        for symbol in self.symbols:
+            ticker = str(symbol)
+            if "returns/" + ticker in state:
+                window = self.returns[symbol]
+                window.returns.extend(state["returns/" + ticker][-window.returns.capacity:])
+                window.last = float(state["last_close/" + ticker])
+                for model in self.models[symbol].values():
+                    for value in window.values():
+                        model.update(value)
+        # The first bi-weekly bar of this run links up with the saved last close
+        self.refit = True
+        self.events.info("state", "Resumed return windows from %s", state["time"])
+
+    def Rank(self):
+        """Score the current AR(p) fits of every symbol with a full window together; pick the strongest"""
+        choice = self.schedule.at(self.Time) if self.schedule is not None else None
+        key = choice or (1, self.lookback)
+        ready = [symbol for symbol in self.symbols if self.models[symbol][key].is_ready]
+        if not ready:
+            return
+        fit = BatchARFit.from_models([self.models[symbol][key] for symbol in ready])
+        if not fit.valid.any():
+            return  # no usable fit: keep the previous targets, and the positions they opened
+        self.predicted_return = dict(zip(ready, fit.forecasts))
+        ranking = np.argsort(-fit.scores)
+        longs = [i for i in ranking if fit.valid[i] and fit.forecasts[i] > 0][:self.top_n]
+        shorts = [i for i in ranking[::-1] if fit.valid[i] and fit.forecasts[i] < 0][:self.top_n]
+        self.targets = {}
+        for i in longs:
+            self.targets[ready[i]] = 1
+        for i in shorts:
+            self.targets[ready[i]] = -1
 
     def OnData(self, data: Slice):
-        if self.window.Count <= self.lookback:
+        self.stops.on_data(data)
+        if self.trade_due:
+            self.trade_due = False
+            self.Trade()
+
+    def OnDailyBar(self, sender, bar):
+        self.trade_due = True
+
+    def Trade(self):
+        """Once per daily bar: refit after a new bi-weekly bar, then trade towards the targets"""
+        if self.refit:
+            self.refit = False
+            self.Rank()
+        if not self.targets and not self.Portfolio.Invested:
             return
 
-        invested = self.Portfolio[self.symbol].Invested
-
-        # Trading logic: Long if predicted > 0, Short if < 0
-        if self.predicted_return > 0 and not invested:
-            self.SetHoldings(self.symbol, 0.5)  # risk control, use 50% allocation
-            self.entryPrice = self.Securities[self.symbol].Price
-        elif self.predicted_return < 0 and not invested:
-            self.SetHoldings(self.symbol, -0.5)
-            self.entryPrice = self.Securities[self.symbol].Price
-        elif invested:
-            price = self.Securities[self.symbol].Price
-            pnlPct = (price - self.entryPrice) / self.entryPrice if self.Portfolio[self.symbol].IsLong else (self.entryPrice - price) / self.entryPrice
-
-            # Exit on stop loss or take profit
-            if pnlPct <= -self.stopLossPct or pnlPct >= self.takeProfitPct:
-                self.Liquidate(self.symbol)
-
-            # Exit if signal flips
-            elif (self.predicted_return < 0 and self.Portfolio[self.symbol].IsLong) or \
-                 (self.predicted_return > 0 and self.Portfolio[self.symbol].IsShort):
-                self.Liquidate(self.symbol)
+        weight = self.allocation / self.top_n
+        for symbol in self.symbols:
+            holding = self.Portfolio[symbol]
+            target = self.targets.get(symbol, 0)
+
+            # Trading logic: long the top-ranked positive forecasts, short the most negative
+            # (journal entry and stops follow the fill, in OnOrderEvent)
+            if not holding.Invested:
+                if target != 0 and symbol not in self.entering:
+                    self.entering[symbol] = "AR forecast up" if target > 0 else "AR forecast down"
+                    self.SetHoldings(symbol, weight * target)
+                    if not holding.Invested and not self.Transactions.GetOpenOrders(symbol):
+                        self.entering.pop(symbol, None)  # nothing was ordered (zero quantity)
+                continue
+
+            # Exit if signal flips (or the symbol drops out of the ranking)
+            if (target <= 0 and holding.IsLong) or (target >= 0 and holding.IsShort):
+                self.journal.exit(symbol, -holding.Quantity, self.Securities[symbol].Price, "signal flip")
+                self.Liquidate(symbol)
+                self.stops.close(symbol)
+
+    def OnStopExit(self, symbol, price, reason):
+        self.journal.exit(symbol, -self.Portfolio[symbol].Quantity, price, reason)
+        self.Liquidate(symbol)
 
     def OnEndOfDay(self):
-        # Log portfolio value (avoid reserved 'Equity' series)
-        self.Plot("Custom Strategy Equity", "PortfolioValue", self.Portfolio.TotalPortfolioValue)
+        self.metrics.end_of_day(self.Portfolio.TotalPortfolioValue, self.Portfolio.TotalAbsoluteHoldingsCost)
+        # Log portfolio value (avoid reserved 'Equity' series) and the running risk statistics
+        self.Plot("Custom Strategy Equity", "PortfolioValue", self.metrics.value)
+        self.Plot("Risk", "Drawdown %", self.metrics.drawdown * 100)
+        if self.metrics.sharpe is not None:
+            self.Plot("Risk", "Sharpe", self.metrics.sharpe)
+        self.events.flush()
+        self.journal.flush()
+
+    def OnOrderEvent(self, orderEvent):
+        self.journal.order_event(orderEvent)
+        self.metrics.on_order_event(orderEvent)
+        symbol = orderEvent.Symbol
+        if symbol in self.entering and orderEvent.Status in (OrderStatus.Canceled, OrderStatus.Invalid):
+            self.entering.pop(symbol)
+        elif symbol in self.entering and orderEvent.Status == OrderStatus.Filled:
+            # Entry filled: record it and arm the stops around the fill price
+            reason = self.entering.pop(symbol)
+            holding = self.Portfolio[symbol]
+            if holding.Invested:
+                self.journal.entry(symbol, holding.Quantity, orderEvent.FillPrice, reason)
+                self.stops.open(symbol, orderEvent.FillPrice, holding.Quantity,
+                                stop=self.stopLossPct, take=self.takeProfitPct)
+
+    def OnEndOfAlgorithm(self):
+        state = {}
+        for symbol, window in self.returns.items():
+            if window.last is not None:
+                state["returns/" + str(symbol)] = window.values()
+                state["last_close/" + str(symbol)] = window.last
+        save_snapshot(self, "state/uso_autoregression", state)
+        self.Log("Performance: " + self.metrics.format())
+        self.events.flush()
+        self.journal.close()
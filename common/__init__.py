@@ -0,0 +1 @@
+"""Shared building blocks for the strategies in this repository."""
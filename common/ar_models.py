@@ -0,0 +1,318 @@
+"""Autoregressive models updated one observation at a time."""
+import numpy as np
+
+from common.ring_buffer import RingBuffer
+
+
+class RecursiveAR:
+    """AR(p) with intercept, fitted by recursive least squares.
+
+    The first 2 * (p + 1) usable observations are solved exactly by OLS; after that each
+    update costs O(p^2). With forgetting < 1 older observations are discounted
+    geometrically, giving an effective memory of about 1 / (1 - forgetting) observations.
+    With forgetting = 1 the coefficients equal an OLS fit (conditional least squares)
+    over everything seen so far.
+    """
+
+    def __init__(self, order=1, forgetting=1.0):
+        self.order = order
+        self.forgetting = forgetting
+        size = order + 1
+        self.theta = np.zeros(size)      # [intercept, phi_1 .. phi_p]
+        self.P = None                    # inverse (weighted) information matrix once solved
+        self.xtx = np.zeros((size, size))
+        self.xty = np.zeros(size)
+        self.lags = np.zeros(order)      # most recent value first
+        self.seen = 0                    # values received
+        self.samples = 0                 # regression rows used
+        self._x = np.ones(size)
+
+    @classmethod
+    def with_memory(cls, order, observations):
+        """Forgetting factor giving an effective memory of `observations`"""
+        return cls(order, 1.0 - 1.0 / observations if observations > 1 else 1.0)
+
+    @property
+    def is_ready(self):
+        return self.P is not None
+
+    @property
+    def intercept(self):
+        return self.theta[0]
+
+    @property
+    def coefficients(self):
+        """AR coefficients phi_1 .. phi_p"""
+        return self.theta[1:]
+
+    @property
+    def mean(self):
+        """Unconditional mean implied by the fit (statsmodels ARIMA's `const`)"""
+        return self.theta[0] / (1.0 - self.theta[1:].sum())
+
+    def update(self, value):
+        """Add one observation"""
+        if self.seen >= self.order:
+            x = self._x
+            x[1:] = self.lags
+            if self.P is None:
+                lam = self.forgetting
+                self.xtx = lam * self.xtx + np.outer(x, x)
+                self.xty = lam * self.xty + x * value
+                self.samples += 1
+                if self.samples >= 2 * (self.order + 1):
+                    try:
+                        self.P = np.linalg.inv(self.xtx)
+                    except np.linalg.LinAlgError:
+                        self.P = None
+                    else:
+                        self.theta = self.P @ self.xty
+            else:
+                self._rls_step(x, value)
+                self.samples += 1
+        if self.order:
+            self.lags[1:] = self.lags[:-1]
+            self.lags[0] = value
+        self.seen += 1
+
+    def _rls_step(self, x, value):
+        lam = self.forgetting
+        Px = self.P @ x
+        gain = Px / (lam + x @ Px)
+        self.theta += gain * (value - x @ self.theta)
+        self.P = (self.P - np.outer(gain, Px)) / lam
+
+    def fit(self, values):
+        """Add a sequence of observations; returns self"""
+        for value in values:
+            self.update(float(value))
+        return self
+
+    def forecast(self):
+        """One-step-ahead forecast from the latest observations (0 until ready)"""
+        if self.P is None:
+            return 0.0
+        x = self._x
+        x[1:] = self.lags
+        return float(x @ self.theta)
+
+    def get_state(self, prefix=""):
+        """Fitted state as a dict of arrays (for save_snapshot)"""
+        state = {"theta": self.theta, "xtx": self.xtx, "xty": self.xty, "lags": self.lags,
+                 "seen": self.seen, "samples": self.samples}
+        if self.P is not None:
+            state["P"] = self.P
+        return {prefix + name: value for name, value in state.items()}
+
+    def set_state(self, state, prefix=""):
+        """Restore what get_state returned; returns False if the snapshot has no model"""
+        if prefix + "theta" not in state or len(state[prefix + "theta"]) != self.order + 1:
+            return False
+        self.theta = np.array(state[prefix + "theta"], dtype=np.float64)
+        self.xtx = np.array(state[prefix + "xtx"], dtype=np.float64)
+        self.xty = np.array(state[prefix + "xty"], dtype=np.float64)
+        self.lags = np.array(state[prefix + "lags"], dtype=np.float64)
+        self.seen = int(state[prefix + "seen"])
+        self.samples = int(state[prefix + "samples"])
+        P = state.get(prefix + "P")
+        self.P = np.array(P, dtype=np.float64) if P is not None else None
+        return True
+
+
+class RollingAR:
+    """AR(p) with intercept over a sliding window of the last `window` observations.
+
+    Keeps X'X, X'y and y'y of the window's regression rows: each new observation adds
+    one row and removes the row that slid out, so an update is O(p^2) whatever the
+    window length. The sums are rebuilt from the ring buffer once per `window`
+    updates to stop floating-point drift. Coefficients, residual standard deviation
+    and R^2 equal those of an OLS fit of the window (fit_ar_batch).
+    """
+
+    def __init__(self, order, window):
+        if window < 2 * (order + 1):
+            raise ValueError("window %d too short for AR(%d)" % (window, order))
+        self.order = order
+        self.window = window
+        self.values = RingBuffer(window)
+        size = order + 1
+        self.xtx = np.zeros((size, size))
+        self.xty = np.zeros(size)
+        self.yty = 0.0
+        self.theta = np.zeros(size)
+        self._x = np.ones(size)
+        self.updates = 0
+
+    @property
+    def is_ready(self):
+        return self.values.is_full
+
+    @property
+    def intercept(self):
+        return self.theta[0]
+
+    @property
+    def coefficients(self):
+        return self.theta[1:]
+
+    @property
+    def residual_std(self):
+        """Standard deviation of the window's residuals, from the running sums"""
+        rows = len(self.values) - self.order
+        ss_res = max(self.yty - self.theta @ self.xty, 0.0)
+        return float(np.sqrt(ss_res / (rows - (self.order + 1))))
+
+    @property
+    def r_squared(self):
+        rows = len(self.values) - self.order
+        ss_tot = self.yty - self.xty[0] ** 2 / rows  # xty[0] is the sum of the targets
+        ss_res = max(self.yty - self.theta @ self.xty, 0.0)
+        return float(1.0 - ss_res / ss_tot) if ss_tot > 0 else 0.0
+
+    def _row(self, position):
+        """Regression row (x, y) whose target is the value at chronological `position`"""
+        p = self.order
+        values = self.values
+        x = np.ones(p + 1)
+        for k in range(p):
+            x[k + 1] = values[position - k - 1]
+        return x, values[position]
+
+    def _rebuild(self):
+        self.xtx[:] = 0.0
+        self.xty[:] = 0.0
+        self.yty = 0.0
+        for position in range(self.order, len(self.values)):
+            x, y = self._row(position)
+            self.xtx += np.outer(x, x)
+            self.xty += x * y
+            self.yty += y * y
+
+    def update(self, value):
+        """Add one observation; returns True once the window is full and fitted"""
+        p = self.order
+        values = self.values
+        if values.is_full:
+            # The row targeting the oldest-but-p value leaves with the oldest value
+            x, y = self._row(p)
+            self.xtx -= np.outer(x, x)
+            self.xty -= x * y
+            self.yty -= y * y
+        if len(values) >= p:
+            x = self._x
+            x[1:] = values.latest(p)
+            self.xtx += np.outer(x, x)
+            self.xty += x * value
+            self.yty += value * value
+        values.push(value)
+        self.updates += 1
+        if self.updates % self.window == 0:
+            self._rebuild()
+        if not values.is_full:
+            return False
+        try:
+            self.theta = np.linalg.solve(self.xtx, self.xty)
+        except np.linalg.LinAlgError:
+            return False
+        return True
+
+    def forecast(self):
+        """One-step-ahead forecast from the newest p observations (0 until ready)"""
+        if not self.values.is_full:
+            return 0.0
+        x = self._x
+        x[1:] = self.values.latest(self.order)
+        return float(x @ self.theta)
+
+    def get_state(self, prefix=""):
+        """The window's observations as a dict of arrays (for save_snapshot)"""
+        return {prefix + "values": self.values.values()}
+
+    def set_state(self, state, prefix=""):
+        """Refit from the observations get_state saved; returns False if the snapshot has none"""
+        if prefix + "values" not in state:
+            return False
+        self.__init__(self.order, self.window)
+        for value in np.atleast_1d(state[prefix + "values"])[-self.window:]:
+            self.update(float(value))
+        return True
+
+
+class BatchARFit:
+    """AR(p) fits of many series; every attribute is an array with one row per series"""
+    __slots__ = ("intercepts", "coefficients", "forecasts", "residual_std", "r_squared", "valid")
+
+    def __init__(self, intercepts, coefficients, forecasts, residual_std, r_squared, valid):
+        self.intercepts = intercepts
+        self.coefficients = coefficients
+        self.forecasts = forecasts
+        self.residual_std = residual_std
+        self.r_squared = r_squared
+        self.valid = valid
+
+    @classmethod
+    def from_models(cls, models):
+        """The current fits of RollingAR models as one batch (models not yet ready are invalid)"""
+        valid = np.array([model.is_ready for model in models], dtype=bool)
+        nan = np.where(valid, 1.0, np.nan)
+        theta = np.array([model.theta for model in models], dtype=np.float64).reshape(len(models), -1)
+        forecasts = np.array([model.forecast() for model in models], dtype=np.float64)
+        residual_std = np.array([model.residual_std if model.is_ready else np.nan for model in models])
+        r_squared = np.array([model.r_squared if model.is_ready else np.nan for model in models])
+        return cls(theta[:, 0] * nan, theta[:, 1:] * nan[:, None], forecasts * nan, residual_std * nan,
+                   r_squared * nan, valid)
+
+    @property
+    def scores(self):
+        """Forecast in units of residual standard deviation (0 where undefined)"""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scores = self.forecasts / self.residual_std
+        return np.where(np.isfinite(scores) & (self.residual_std > 1e-12), scores, 0.0)
+
+
+def fit_ar_batch(series, order=1):
+    """OLS AR(p) with intercept for every row of an (n_series x window) matrix at once.
+
+    The regressions are formed as one (n, window - p, p + 1) design tensor and solved
+    with a single batched solve. Rows containing NaN are not fitted (valid = False,
+    forecast NaN). Returns a BatchARFit.
+    """
+    Y = np.asarray(series, dtype=np.float64)
+    if Y.ndim == 1:
+        Y = Y[None, :]
+    n, window = Y.shape
+    p = order
+    rows = window - p
+    if rows <= p + 1:
+        raise ValueError("window %d too short for AR(%d)" % (window, p))
+
+    valid = np.isfinite(Y).all(axis=1)
+    Y = np.where(valid[:, None], Y, 0.0)
+    X = np.empty((n, rows, p + 1))
+    X[:, :, 0] = 1.0
+    for k in range(p):
+        X[:, :, k + 1] = Y[:, p - k - 1:window - k - 1]
+    y = Y[:, p:]
+
+    xtx = np.einsum("nti,ntj->nij", X, X)
+    xty = np.einsum("nti,nt->ni", X, y)
+    try:
+        theta = np.linalg.solve(xtx, xty[:, :, None])[:, :, 0]
+    except np.linalg.LinAlgError:
+        # Some series are degenerate (e.g. constant): fall back to pseudo-inverses
+        theta = np.einsum("nij,nj->ni", np.linalg.pinv(xtx), xty)
+
+    residuals = y - np.einsum("nti,ni->nt", X, theta)
+    ss_res = np.einsum("nt,nt->n", residuals, residuals)
+    centered = y - y.mean(axis=1, keepdims=True)
+    ss_tot = np.einsum("nt,nt->n", centered, centered)
+    residual_std = np.sqrt(ss_res / (rows - (p + 1)))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r_squared = np.where(ss_tot > 0, 1.0 - ss_res / ss_tot, 0.0)
+
+    lags = Y[:, ::-1][:, :p]  # newest first
+    forecasts = theta[:, 0] + np.einsum("ni,ni->n", theta[:, 1:], lags)
+
+    nan = np.where(valid, 1.0, np.nan)
+    return BatchARFit(theta[:, 0] * nan, theta[:, 1:] * nan[:, None], forecasts * nan, residual_std * nan,
+                      r_squared * nan, valid)
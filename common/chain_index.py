@@ -0,0 +1,118 @@
+"""Per-slice option chain index with O(log n) strike lookups."""
+import numpy as np
+
+# Tolerance used when matching strikes (strikes arrive as floats)
+STRIKE_EPSILON = 1e-6
+
+
+class ChainSide:
+    """Contracts of one (expiry date, right) pair, sorted by strike"""
+    __slots__ = ("expiry", "right", "contracts", "strikes", "bids", "asks")
+
+    def __init__(self, expiry, right, contracts):
+        contracts.sort(key=lambda c: c.Strike)
+        self.expiry = expiry
+        self.right = right
+        self.contracts = contracts
+        n = len(contracts)
+        self.strikes = np.empty(n, dtype=np.float64)
+        self.bids = np.empty(n, dtype=np.float64)
+        self.asks = np.empty(n, dtype=np.float64)
+        for i, c in enumerate(contracts):
+            self.strikes[i] = c.Strike
+            self.bids[i] = c.BidPrice
+            self.asks[i] = c.AskPrice
+
+    def __len__(self):
+        return len(self.contracts)
+
+    def index_of(self, strike):
+        """Position of an exact strike, or -1 when it is not listed"""
+        i = int(np.searchsorted(self.strikes, strike - STRIKE_EPSILON, side="left"))
+        if i < len(self.contracts) and abs(self.strikes[i] - strike) <= STRIKE_EPSILON:
+            return i
+        return -1
+
+    def at_strike(self, strike):
+        """Contract listed at exactly this strike, or None"""
+        i = self.index_of(strike)
+        return self.contracts[i] if i >= 0 else None
+
+    def offset(self, strike, width):
+        """Contract at strike K + width (use a negative width for K - width)"""
+        return self.at_strike(strike + width)
+
+    def count_below(self, price):
+        """Number of strikes strictly below price"""
+        return int(np.searchsorted(self.strikes, price, side="left"))
+
+    def count_above(self, price):
+        """Number of strikes strictly above price"""
+        return len(self.contracts) - int(np.searchsorted(self.strikes, price, side="right"))
+
+    def nth_below(self, price, n=1):
+        """n-th strike strictly below price (n=1 is the closest), or None"""
+        i = self.count_below(price) - n
+        return self.contracts[i] if i >= 0 else None
+
+    def first_above(self, price):
+        """First strike strictly above price, or None"""
+        i = int(np.searchsorted(self.strikes, price, side="right"))
+        return self.contracts[i] if i < len(self.contracts) else None
+
+
+class ChainIndex:
+    """Option chain grouped by (expiry date, right), built once per slice.
+
+    bids and asks hold every side's quotes end to end; positions maps a symbol
+    to its row there, so many quotes can be gathered with one fancy index.
+    """
+    __slots__ = ("sides", "contracts", "positions", "bids", "asks")
+
+    def __init__(self, chain):
+        groups = {}
+        for c in chain:
+            key = (c.Expiry.date(), c.Right)
+            group = groups.get(key)
+            if group is None:
+                groups[key] = [c]
+            else:
+                group.append(c)
+
+        self.sides = {}
+        self.contracts = []
+        self.positions = {}
+        for (expiry, right), contracts in groups.items():
+            side = ChainSide(expiry, right, contracts)
+            self.sides[(expiry, right)] = side
+            for c in side.contracts:
+                self.positions[c.Symbol] = len(self.contracts)
+                self.contracts.append(c)
+        sides = self.sides.values()
+        self.bids = np.concatenate([side.bids for side in sides]) if sides else np.empty(0)
+        self.asks = np.concatenate([side.asks for side in sides]) if sides else np.empty(0)
+
+    def side(self, expiry, right):
+        """Contracts for one expiry date and right, or None"""
+        return self.sides.get((expiry, right))
+
+    def contract(self, symbol):
+        """Contract for a symbol present in this slice's chain, or None"""
+        i = self.positions.get(symbol)
+        return self.contracts[i] if i is not None else None
+
+    def quote(self, symbol):
+        """(bid, ask) for a symbol in the chain, or None"""
+        i = self.positions.get(symbol)
+        if i is None:
+            return None
+        return self.bids[i], self.asks[i]
+
+    def quotes(self, symbols):
+        """(bids, asks) arrays aligned with symbols; 0.0 where a symbol is not in the chain"""
+        rows = np.fromiter((self.positions.get(symbol, -1) for symbol in symbols), dtype=np.int64,
+                           count=len(symbols))
+        found = rows >= 0
+        if not len(self.bids):
+            return np.zeros(len(rows)), np.zeros(len(rows))
+        return np.where(found, self.bids[rows], 0.0), np.where(found, self.asks[rows], 0.0)
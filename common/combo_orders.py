@@ -0,0 +1,249 @@
+"""Multi-leg structures sent as combo orders, with a structure-level OCO bracket."""
+from AlgorithmImports import Leg, OrderStatus
+
+# Structure states
+PENDING = 0   # entry combo sent, not yet filled
+OPEN = 1
+CLOSING = 2   # exit combo sent (bracket target, stop or manual close)
+CLOSED = 3
+
+# Order statuses after which a ticket can no longer fill
+TERMINAL = (OrderStatus.Filled, OrderStatus.Canceled, OrderStatus.Invalid)
+
+
+class Structure:
+    """One multi-leg position: legs as (symbol, ratio), held quantities and net prices per unit"""
+    __slots__ = ("id", "name", "legs", "quantity", "state", "held", "entry_cost", "exit_cost",
+                 "take_profit_pct", "stop_loss_pct", "target_ticket", "reason", "order_ids")
+
+    def __init__(self, structure_id, name, legs, quantity, take_profit_pct=None, stop_loss_pct=None):
+        self.id = structure_id
+        self.name = name
+        self.legs = legs
+        self.quantity = quantity
+        self.state = PENDING
+        self.held = {symbol: 0 for symbol, _ in legs}
+        self.entry_cost = 0.0
+        self.exit_cost = 0.0
+        self.take_profit_pct = take_profit_pct
+        self.stop_loss_pct = stop_loss_pct
+        self.target_ticket = None
+        self.reason = None
+        self.order_ids = []
+
+    @property
+    def entry_net(self):
+        """Net entry price per unit: sum(ratio * fill price); positive for a debit"""
+        return self.entry_cost / self.quantity
+
+    @property
+    def exit_net(self):
+        return -self.exit_cost / self.quantity
+
+    @property
+    def pnl(self):
+        """Realized P&L of the whole position in price points (before fees and multiplier)"""
+        return -(self.entry_cost + self.exit_cost)
+
+    def is_entered(self):
+        return all(self.held[symbol] == ratio * self.quantity for symbol, ratio in self.legs)
+
+    def is_flat(self):
+        return not any(self.held.values())
+
+    def closing_net(self, quote):
+        """Net price to close now, from quote(symbol) -> (bid, ask); None without quotes"""
+        net = 0.0
+        for symbol, ratio in self.legs:
+            bid, ask = quote(symbol)
+            # Closing sells what was bought (at the bid) and buys back what was sold (at the ask)
+            price = bid if ratio * self.quantity > 0 else ask
+            if price <= 0:
+                return None
+            net += ratio * price
+        return net
+
+
+class ComboOrderManager:
+    """Sends each structure as one combo order and manages its profit/stop bracket.
+
+    The profit target rests as a combo limit order on the closing structure. LEAN has
+    no combo stop orders, so the stop is checked against live quotes in check_stops();
+    whichever side triggers first cancels the other.
+
+    In backtests fills arrive inside the order call, before its tickets are returned, so
+    the structure being sent owns the fills of its legs until then (`sending`). Order ids
+    and brackets are dropped when their structure closes.
+    """
+
+    def __init__(self, algorithm):
+        self.algorithm = algorithm
+        self.structures = {}        # structure id -> Structure, until closed
+        self.order_structures = {}  # order id -> Structure
+        self.leg_structures = {}    # symbol -> Structure, for exercise/expiry fills
+        self.brackets = {}          # structure id -> resting target ticket
+        self.sending = None         # structure whose orders are being placed
+        self.next_id = 1
+        self.combo_orders = 0
+        self.bracket_orders = 0
+
+    def open(self, name, legs, quantity, limit_price=None, take_profit_pct=None, stop_loss_pct=None, tag=""):
+        """Enter `quantity` units of legs [(symbol, ratio), ...] as one combo order.
+
+        limit_price is the net price per unit (sum of ratio * price). With take_profit_pct
+        and/or stop_loss_pct a bracket on the whole structure is attached once filled.
+        """
+        structure = Structure(self.next_id, name, list(legs), quantity, take_profit_pct, stop_loss_pct)
+        self.next_id += 1
+        self.structures[structure.id] = structure
+        for symbol, _ in structure.legs:
+            self.leg_structures[symbol] = structure
+        self._send(structure, quantity, limit_price, tag or name)
+        return structure
+
+    def close(self, structure, reason=""):
+        """Cancel the bracket and exit the remaining position at market"""
+        if structure.state not in (PENDING, OPEN):
+            return
+        structure.state = CLOSING
+        structure.reason = reason
+        self._cancel_target(structure)
+        if structure.is_entered():
+            self._send(structure, -structure.quantity, None, reason or structure.name)
+        else:
+            # Partially entered (or never filled): flatten leg by leg
+            for symbol, held in list(structure.held.items()):
+                if held:
+                    self._place(structure, lambda: [self.algorithm.MarketOrder(symbol, -held,
+                                                                               tag=reason or structure.name)])
+            if structure.state != CLOSED and structure.is_flat():
+                self._finish(structure)
+
+    def structure_of(self, symbol):
+        """Open structure holding `symbol`, or None"""
+        return self.leg_structures.get(symbol)
+
+    def has_open(self):
+        return bool(self.structures)
+
+    def _send(self, structure, quantity, limit_price, tag):
+        legs = [Leg.Create(symbol, ratio) for symbol, ratio in structure.legs]
+        self.combo_orders += 1
+        if limit_price is None:
+            return self._place(structure, lambda: self.algorithm.ComboMarketOrder(legs, quantity, tag=tag))
+        return self._place(structure, lambda: self.algorithm.ComboLimitOrder(legs, quantity, limit_price, tag=tag))
+
+    def _place(self, structure, place):
+        """Call place() -> tickets with `structure` owning the fills that arrive during the call"""
+        previous, self.sending = self.sending, structure
+        try:
+            tickets = place()
+        finally:
+            self.sending = previous
+        if structure.state != CLOSED:
+            for ticket in tickets:
+                self._claim(structure, ticket.OrderId)
+        return tickets
+
+    def _claim(self, structure, order_id):
+        if order_id not in self.order_structures:
+            self.order_structures[order_id] = structure
+            structure.order_ids.append(order_id)
+
+    def _attach_bracket(self, structure):
+        if structure.take_profit_pct is None:
+            return
+        entry = structure.entry_net
+        direction = 1 if structure.quantity > 0 else -1
+        limit = entry + direction * structure.take_profit_pct * abs(entry)
+        tickets = self._send(structure, -structure.quantity, limit, structure.name + " target")
+        self.bracket_orders += 1
+        if structure.state != CLOSED and tickets:
+            # Still resting (a marketable target may have filled and closed the structure already)
+            structure.target_ticket = self.brackets[structure.id] = tickets[0]
+
+    def _cancel_target(self, structure):
+        ticket = structure.target_ticket
+        structure.target_ticket = None
+        self.brackets.pop(structure.id, None)
+        if ticket is not None and ticket.Status not in TERMINAL:
+            # Includes PartiallyFilled: a live target would reopen the closed structure
+            ticket.Cancel("OCO")
+
+    def _finish(self, structure):
+        structure.state = CLOSED
+        self._cancel_target(structure)
+        self.structures.pop(structure.id, None)
+        for order_id in structure.order_ids:
+            self.order_structures.pop(order_id, None)
+        for symbol, _ in structure.legs:
+            if self.leg_structures.get(symbol) is structure:
+                del self.leg_structures[symbol]
+
+    def check_stops(self, quote=None):
+        """Exit open structures whose loss reached stop_loss_pct of the entry net; returns them.
+
+        quote(symbol) -> (bid, ask) defaults to the algorithm's security prices.
+        """
+        if not self.structures:
+            return []
+        if quote is None:
+            securities = self.algorithm.Securities
+            quote = lambda symbol: (securities[symbol].BidPrice, securities[symbol].AskPrice)
+        stopped = []
+        for structure in list(self.structures.values()):
+            if structure.state != OPEN or structure.stop_loss_pct is None:
+                continue
+            net = structure.closing_net(quote)
+            if net is None:
+                continue
+            entry = structure.entry_net
+            direction = 1 if structure.quantity > 0 else -1
+            if direction * (net - entry) <= -structure.stop_loss_pct * abs(entry):
+                self.close(structure, structure.name + " stop")
+                stopped.append(structure)
+        return stopped
+
+    def on_order_event(self, order_event):
+        """Apply an order event; returns the structure if it just closed, else None"""
+        structure = self.order_structures.get(order_event.OrderId)
+        sending = self.sending
+        if (structure is None and sending is not None and sending.state != CLOSED
+                and order_event.Symbol in sending.held):
+            # Event of an order still being placed: its tickets are not registered yet
+            structure = sending
+            self._claim(structure, order_event.OrderId)
+        ours = structure is not None
+        if not ours:
+            # Exercise and expiry fills come from orders the manager did not send
+            structure = self.leg_structures.get(order_event.Symbol)
+            if structure is None or not order_event.FillQuantity:
+                return None
+
+        if order_event.FillQuantity:
+            quantity = order_event.FillQuantity
+            structure.held[order_event.Symbol] += quantity
+            if structure.state == PENDING:
+                structure.entry_cost += quantity * order_event.FillPrice
+                if structure.is_entered():
+                    structure.state = OPEN
+                    self._attach_bracket(structure)
+            else:
+                structure.exit_cost += quantity * order_event.FillPrice
+                if structure.state == OPEN:
+                    # Bracket target (or exercise/expiry) taking the structure off
+                    structure.state = CLOSING
+                    structure.reason = structure.name + (" target" if ours else " expiry")
+                if structure.is_flat():
+                    self._finish(structure)
+                    return structure
+        elif order_event.Status in (OrderStatus.Canceled, OrderStatus.Invalid):
+            if structure.state == PENDING and structure.is_flat():
+                # Entry never filled
+                structure.reason = order_event.Message or "canceled"
+                self._finish(structure)
+                return structure
+            if structure.target_ticket is not None and order_event.OrderId == structure.target_ticket.OrderId:
+                structure.target_ticket = None
+                self.brackets.pop(structure.id, None)
+        return None
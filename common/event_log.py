@@ -0,0 +1,80 @@
+"""Level-gated, lazily formatted event logging for algorithms."""
+from collections import deque
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+LEVEL_NAMES = {"DEBUG": DEBUG, "INFO": INFO, "WARNING": WARNING, "ERROR": ERROR}
+
+
+def parse_level(level):
+    """Accept a level number or name ("DEBUG", "info", ...)"""
+    if isinstance(level, str):
+        return LEVEL_NAMES[level.strip().upper()]
+    return int(level)
+
+
+class EventLog:
+    """Buffered event log with per-category levels and rate limiting
+
+    Events are stored as (time, format, args) and only turned into strings
+    when the buffer is flushed, so suppressed or rate-limited events cost a
+    dict lookup and a comparison.
+    """
+
+    def __init__(self, algorithm, level=INFO, buffer_size=200, sink=None):
+        self.algorithm = algorithm
+        self.default_level = parse_level(level)
+        self.category_levels = {}
+        self.buffer_size = buffer_size
+        self.sink = sink if sink is not None else algorithm.Debug
+        self.buffer = deque()
+        self.last_emitted = {}  # rate-limit key -> last emit time
+        self.suppressed = 0
+
+    def set_level(self, category, level):
+        """Override the level of one category"""
+        self.category_levels[category] = parse_level(level)
+
+    def enabled(self, category, level):
+        """True if an event of this category and level would be recorded"""
+        return level >= self.category_levels.get(category, self.default_level)
+
+    def emit(self, level, category, fmt, args, every=None):
+        """Record an event; every=timedelta keeps at most one per interval"""
+        if level < self.category_levels.get(category, self.default_level):
+            self.suppressed += 1
+            return
+        now = self.algorithm.Time
+        if every is not None:
+            key = (category, fmt)
+            last = self.last_emitted.get(key)
+            if last is not None and now - last < every:
+                self.suppressed += 1
+                return
+            self.last_emitted[key] = now
+        self.buffer.append((now, fmt, args))
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def debug(self, category, fmt, *args, every=None):
+        self.emit(DEBUG, category, fmt, args, every)
+
+    def info(self, category, fmt, *args, every=None):
+        self.emit(INFO, category, fmt, args, every)
+
+    def warning(self, category, fmt, *args, every=None):
+        self.emit(WARNING, category, fmt, args, every)
+
+    def error(self, category, fmt, *args, every=None):
+        self.emit(ERROR, category, fmt, args, every)
+
+    def flush(self):
+        """Format buffered events and hand them to the sink in order"""
+        buffer = self.buffer
+        sink = self.sink
+        while buffer:
+            time, fmt, args = buffer.popleft()
+            sink(str(time) + " - " + (fmt % args if args else fmt))
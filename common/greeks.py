@@ -0,0 +1,208 @@
+"""Vectorized Black-Scholes implied volatility and Greeks for whole option chains."""
+from datetime import datetime, time
+
+import numpy as np
+
+# Calendar-time year fraction; 0DTE expiries are floored to one minute
+SECONDS_PER_YEAR = 365.0 * 24 * 3600
+MIN_TIME_TO_EXPIRY = 60.0 / SECONDS_PER_YEAR
+SETTLEMENT_TIME = time(16, 0)
+
+# Implied volatility search bracket and tolerances
+MIN_VOL = 1e-4
+MAX_VOL = 5.0
+TIME_VALUE_TOLERANCE = 1e-8  # price error accepted, as a fraction of the option's time value
+MAX_ITERATIONS = 60
+
+CALL = 0  # OptionRight.Call
+PUT = 1   # OptionRight.Put
+
+SQRT_2PI = np.sqrt(2.0 * np.pi)
+
+
+def norm_pdf(x):
+    return np.exp(-0.5 * x * x) / SQRT_2PI
+
+
+def norm_cdf(x):
+    """Standard normal CDF (Abramowitz & Stegun 26.2.17, abs error < 7.5e-8)"""
+    z = np.abs(x)
+    t = 1.0 / (1.0 + 0.2316419 * z)
+    poly = t * (0.319381530 + t * (-0.356563782 + t * (1.781477937 + t * (-1.821255978 + t * 1.330274429))))
+    upper = norm_pdf(z) * poly
+    return np.where(x >= 0, 1.0 - upper, upper)
+
+
+def _d1_d2(spot, strike, t, rate, dividend, vol):
+    vol_t = vol * np.sqrt(t)
+    d1 = (np.log(spot / strike) + (rate - dividend + 0.5 * vol * vol) * t) / vol_t
+    return d1, d1 - vol_t
+
+
+def price(spot, strike, t, vol, is_call, rate=0.0, dividend=0.0):
+    """Black-Scholes prices; all arguments broadcast"""
+    d1, d2 = _d1_d2(spot, strike, t, rate, dividend, vol)
+    spot_df = spot * np.exp(-dividend * t)
+    strike_df = strike * np.exp(-rate * t)
+    call = spot_df * norm_cdf(d1) - strike_df * norm_cdf(d2)
+    return np.where(is_call, call, call - spot_df + strike_df)
+
+
+def implied_vol(option_price, spot, strike, t, is_call, rate=0.0, dividend=0.0):
+    """Implied volatility by safeguarded Newton: a Newton step is taken only when it stays
+    inside the current [lo, hi] bracket, otherwise the bracket is bisected. Prices outside
+    the no-arbitrage bounds give NaN."""
+    option_price, spot, strike, t, is_call = np.broadcast_arrays(
+        np.asarray(option_price, dtype=np.float64), np.asarray(spot, dtype=np.float64),
+        np.asarray(strike, dtype=np.float64), np.asarray(t, dtype=np.float64), np.asarray(is_call))
+    spot_df = spot * np.exp(-dividend * t)
+    strike_df = strike * np.exp(-rate * t)
+    intrinsic = np.where(is_call, np.maximum(spot_df - strike_df, 0.0), np.maximum(strike_df - spot_df, 0.0))
+    upper = np.where(is_call, spot_df, strike_df)
+    valid = (option_price > intrinsic) & (option_price < upper) & (t > 0)
+    # Only the time value carries vol information: far wings and deep ITM options have a
+    # tiny one, so an absolute price tolerance would stop far from their root
+    tolerance = TIME_VALUE_TOLERANCE * (option_price - intrinsic)
+
+    lo = np.full(option_price.shape, MIN_VOL)
+    hi = np.full(option_price.shape, MAX_VOL)
+    # Brenner-Subrahmanyam starting point, clipped into the bracket
+    vol = np.sqrt(2.0 * np.pi / t) * option_price / np.maximum(spot, 1e-12)
+    vol = np.clip(np.nan_to_num(vol, nan=0.2), 0.05, 2.0)
+    active = valid.copy()
+    for _ in range(MAX_ITERATIONS):
+        if not active.any():
+            break
+        idx = np.flatnonzero(active)
+        s, k, tt, c, target, v = spot[idx], strike[idx], t[idx], is_call[idx], option_price[idx], vol[idx]
+        d1, _ = _d1_d2(s, k, tt, rate, dividend, v)
+        diff = price(s, k, tt, v, c, rate, dividend) - target
+        vega = s * np.exp(-dividend * tt) * norm_pdf(d1) * np.sqrt(tt)
+
+        # Price increases with vol: shrink the bracket around the root
+        high = diff > 0
+        hi[idx] = np.where(high, v, hi[idx])
+        lo[idx] = np.where(high, lo[idx], v)
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            newton = v - diff / vega
+        inside = (vega > 1e-12) & (newton > lo[idx]) & (newton < hi[idx])
+        vol[idx] = np.where(inside, newton, 0.5 * (lo[idx] + hi[idx]))
+        done = (np.abs(diff) < tolerance[idx]) | (hi[idx] - lo[idx] < 1e-10)
+        vol[idx[done]] = v[done]
+        active[idx[done]] = False
+    return np.where(valid, vol, np.nan)
+
+
+def greeks(spot, strike, t, vol, is_call, rate=0.0, dividend=0.0):
+    """(delta, gamma, theta per calendar day, vega per vol point)"""
+    d1, d2 = _d1_d2(spot, strike, t, rate, dividend, vol)
+    q_df = np.exp(-dividend * t)
+    r_df = np.exp(-rate * t)
+    pdf = norm_pdf(d1)
+    sqrt_t = np.sqrt(t)
+    delta = np.where(is_call, q_df * norm_cdf(d1), q_df * (norm_cdf(d1) - 1.0))
+    gamma = q_df * pdf / (spot * vol * sqrt_t)
+    decay = -spot * q_df * pdf * vol / (2.0 * sqrt_t)
+    call_theta = decay - rate * strike * r_df * norm_cdf(d2) + dividend * spot * q_df * norm_cdf(d1)
+    put_theta = decay + rate * strike * r_df * norm_cdf(-d2) - dividend * spot * q_df * norm_cdf(-d1)
+    theta = np.where(is_call, call_theta, put_theta) / 365.0
+    vega = spot * q_df * pdf * sqrt_t / 100.0
+    return delta, gamma, theta, vega
+
+
+def year_fraction(now, expiries):
+    """Years from `now` to each expiry's 16:00 settlement, at least one minute"""
+    seconds = np.array([(datetime.combine(e, SETTLEMENT_TIME) - now).total_seconds() for e in expiries])
+    return np.maximum(seconds / SECONDS_PER_YEAR, MIN_TIME_TO_EXPIRY)
+
+
+class ChainGreeks:
+    """IV and Greeks for every contract of one chain snapshot (arrays align with `contracts`)"""
+    __slots__ = ("contracts", "strikes", "rights", "expiries", "iv", "delta", "gamma", "theta", "vega")
+
+    def __init__(self, contracts, strikes, rights, expiries, iv, delta, gamma, theta, vega):
+        self.contracts = contracts
+        self.strikes = strikes
+        self.rights = rights
+        self.expiries = expiries
+        self.iv = iv
+        self.delta = delta
+        self.gamma = gamma
+        self.theta = theta
+        self.vega = vega
+
+    def __len__(self):
+        return len(self.contracts)
+
+    def _mask(self, right, expiry):
+        mask = (self.rights == int(right)) & ~np.isnan(self.delta)
+        if expiry is not None:
+            mask &= self.expiries == np.datetime64(expiry, "D")
+        return mask
+
+    def nearest_delta(self, right, target, expiry=None, max_abs_delta=None):
+        """Contract whose delta is closest to `target` (signed), or None.
+        With max_abs_delta only contracts with |delta| below it are considered."""
+        mask = self._mask(right, expiry)
+        if max_abs_delta is not None:
+            mask &= np.abs(self.delta) < max_abs_delta
+        candidates = np.flatnonzero(mask)
+        if not len(candidates):
+            return None
+        return self.contracts[candidates[np.argmin(np.abs(self.delta[candidates] - target))]]
+
+    def at_strike(self, right, strike, expiry, max_abs_delta=None):
+        """Contract at exactly this strike, right and expiry, or None.
+        With max_abs_delta a contract with |delta| at or above it is not returned."""
+        mask = self._mask(right, expiry) & (np.abs(self.strikes - strike) < 1e-6)
+        if max_abs_delta is not None:
+            mask &= np.abs(self.delta) < max_abs_delta
+        matches = np.flatnonzero(mask)
+        return self.contracts[matches[0]] if len(matches) else None
+
+
+class GreeksEngine:
+    """Computes ChainGreeks from chain quotes, at most once per chain snapshot and minute"""
+
+    def __init__(self, rate=0.0, dividend=0.0):
+        self.rate = rate
+        self.dividend = dividend
+        self.cache = {}  # chain symbol -> (minute, ChainGreeks)
+        self.computed = 0
+
+    def compute(self, chain, spot, now):
+        """ChainGreeks for `chain` at underlying price `spot` (mid quotes, or last without a bid)"""
+        contracts = list(chain)
+        n = len(contracts)
+        strikes = np.empty(n)
+        bids = np.empty(n)
+        asks = np.empty(n)
+        lasts = np.empty(n)
+        rights = np.empty(n, dtype=np.int8)
+        expiry_dates = []
+        for i, c in enumerate(contracts):
+            strikes[i] = c.Strike
+            bids[i] = c.BidPrice
+            asks[i] = c.AskPrice
+            lasts[i] = c.LastPrice
+            rights[i] = int(c.Right)
+            expiry_dates.append(c.Expiry.date())
+        expiries = np.array(expiry_dates, dtype="datetime64[D]")
+        t = year_fraction(now, expiry_dates) if n else np.empty(0)
+        quote = np.where((bids > 0) & (asks > 0), 0.5 * (bids + asks), lasts)
+        is_call = rights == CALL
+        iv = implied_vol(quote, spot, strikes, t, is_call, self.rate, self.dividend)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            delta, gamma, theta, vega = greeks(spot, strikes, t, iv, is_call, self.rate, self.dividend)
+        self.computed += 1
+        return ChainGreeks(contracts, strikes, rights, expiries, iv, delta, gamma, theta, vega)
+
+    def get(self, chain, spot, now):
+        """Cached ChainGreeks for this chain within the current minute"""
+        minute = now.replace(second=0, microsecond=0)
+        entry = self.cache.get(chain.Symbol)
+        if entry is not None and entry[0] == minute:
+            return entry[1]
+        result = self.compute(chain, spot, now)
+        self.cache[chain.Symbol] = (minute, result)
+        return result
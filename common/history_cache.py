@@ -0,0 +1,135 @@
+"""Persisted close-price history and model-state snapshots for warm starts."""
+import os
+from bisect import bisect_left
+from datetime import datetime
+
+import numpy as np
+
+# LEAN's Resolution values, Tick = 0 ... Daily = 4
+RESOLUTION_NAMES = ("tick", "second", "minute", "hour", "daily")
+
+
+class HistoryCache:
+    """Close prices per symbol kept in the ObjectStore and extended incrementally.
+
+    Live bars are appended as they arrive; fill() requests only the bars after the newest
+    cached one, so overlapping history is never fetched twice. At most `max_bars` closes
+    are kept per symbol.
+
+    The cache is stored under `key`.<resolution> and records its resolution. A bar that is
+    not newer than the cached ones must match the cached bar at its time. Otherwise the
+    cache came from other data (another source, or a run over a different range), and the
+    cached bars from that time on are dropped instead of the new bar.
+    """
+
+    def __init__(self, algorithm, key, resolution, max_bars=5000):
+        self.algorithm = algorithm
+        self.path = algorithm.ObjectStore.GetFilePath(key + "." + RESOLUTION_NAMES[int(resolution)])
+        self.resolution = resolution
+        self.max_bars = max_bars
+        self.times = {}   # symbol value -> [datetime64[s]]
+        self.closes = {}  # symbol value -> [float]
+        self.requested = 0
+        self.invalidated = 0  # cached bars dropped because they did not match new ones
+        if os.path.exists(self.path):
+            with np.load(self.path) as saved:
+                if "__resolution__" not in saved.files or int(saved["__resolution__"]) != int(resolution):
+                    return
+                for name in saved.files:
+                    if name.endswith("/time"):
+                        ticker = name[:-len("/time")]
+                        self.times[ticker] = list(saved[name])
+                        self.closes[ticker] = list(saved[ticker + "/close"])
+
+    def last_time(self, symbol):
+        times = self.times.get(str(symbol))
+        return times[-1].astype(datetime) if times else None
+
+    def append(self, symbol, time, close):
+        """Add one bar; a bar already cached is skipped, one that contradicts the cache truncates it"""
+        ticker = str(symbol)
+        times = self.times.setdefault(ticker, [])
+        closes = self.closes.setdefault(ticker, [])
+        stamp = np.datetime64(time, "s")
+        close = float(close)
+        if times and stamp <= times[-1]:
+            i = bisect_left(times, stamp)
+            if times[i] == stamp and closes[i] == close:
+                return
+            self.invalidated += len(times) - i
+            del times[i:]
+            del closes[i:]
+        times.append(stamp)
+        closes.append(close)
+        if len(times) > 2 * self.max_bars:
+            del times[:-self.max_bars]
+            del self.closes[ticker][:-self.max_bars]
+
+    def fill(self, symbol, end, start=None):
+        """Request the bars missing between the newest cached bar (or `start`) and `end`"""
+        last = self.last_time(symbol)
+        begin = last if last is not None else start
+        if begin is None or begin >= end:
+            return 0
+        times, closes = closes_between(self.algorithm, symbol, begin, end, self.resolution)
+        self.requested += 1
+        for time, close in zip(times, closes):
+            self.append(symbol, time, close)
+        return len(closes)
+
+    def history(self, symbol, count=None, end=None):
+        """(times, closes) arrays of the newest `count` cached bars ending at or before `end`, oldest first"""
+        ticker = str(symbol)
+        times = np.array(self.times.get(ticker, []), dtype="datetime64[s]")
+        closes = np.array(self.closes.get(ticker, []), dtype=np.float64)
+        if end is not None:
+            j = int(np.searchsorted(times, np.datetime64(end, "s"), side="right"))
+            times, closes = times[:j], closes[:j]
+        if count is not None:
+            times, closes = times[-count:], closes[-count:]
+        return times, closes
+
+    def save(self):
+        arrays = {"__resolution__": np.int64(int(self.resolution))}
+        for ticker, times in self.times.items():
+            times, closes = self.history(ticker, self.max_bars)
+            arrays[ticker + "/time"] = times
+            arrays[ticker + "/close"] = closes
+        with open(self.path, "wb") as f:
+            np.savez(f, **arrays)
+
+
+def closes_between(algorithm, symbol, start, end, resolution):
+    """(times, closes) of the bars ending in (start, end], via one History request"""
+    history = algorithm.History(symbol, start, end, resolution)
+    if history is None or history.empty:
+        return [], np.zeros(0)
+    closes = history["close"]
+    times = [t.to_pydatetime() for t in closes.index.get_level_values(-1)]
+    return times, closes.to_numpy(dtype=np.float64)
+
+
+def save_snapshot(algorithm, key, state):
+    """Write a dict of scalars/arrays (name -> value, None values skipped) with the current time"""
+    arrays = {name: np.asarray(value) for name, value in state.items() if value is not None}
+    arrays["__time__"] = np.datetime64(algorithm.Time, "s")
+    with open(algorithm.ObjectStore.GetFilePath(key), "wb") as f:
+        np.savez(f, **arrays)
+
+
+def load_snapshot(algorithm, key, not_after=None):
+    """Snapshot saved under `key` as a dict (0-d arrays become scalars), or None.
+
+    Snapshots taken after `not_after` are ignored so a backtest never resumes from state
+    built on data later than its own start.
+    """
+    path = algorithm.ObjectStore.GetFilePath(key)
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as saved:
+        state = {name: saved[name][()] if saved[name].ndim == 0 else saved[name] for name in saved.files}
+    saved_time = state.pop("__time__").astype(datetime)
+    if not_after is not None and saved_time > not_after:
+        return None
+    state["time"] = saved_time
+    return state
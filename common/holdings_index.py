@@ -0,0 +1,103 @@
+"""Incremental index of open positions, maintained from order fills."""
+
+
+def underlying_of(symbol):
+    """Underlying symbol of a derivative, or the symbol itself"""
+    return symbol.Underlying if symbol.HasUnderlying else symbol
+
+
+class HoldingsIndex:
+    """Net quantity per symbol, grouped by underlying and strategy.
+
+    Every fill (including option exercise/expiry fills, which LEAN reports as
+    order events) goes through on_order_event, so queries never scan the
+    Portfolio. Symbols whose net quantity returns to zero are dropped.
+    """
+
+    def __init__(self):
+        self.quantities = {}       # symbol -> net quantity
+        self.strategies = {}       # symbol -> strategy name
+        self.by_underlying = {}    # underlying -> {symbol}
+        self.by_strategy = {}      # strategy -> {symbol}
+        self.net_by_underlying = {}    # underlying -> signed quantity across its symbols
+        self.gross_by_underlying = {}  # underlying -> absolute quantity across its symbols
+        self.pending_tags = {}     # symbol -> strategy for fills not yet received
+        self.option_legs = 0
+
+    def tag(self, symbol, strategy):
+        """Attribute the next fills of `symbol` to `strategy` (call before sending the order)"""
+        self.pending_tags[symbol] = strategy
+
+    def on_order_event(self, order_event):
+        """Apply an order event; events without a fill are ignored"""
+        if order_event.FillQuantity:
+            self.on_fill(order_event.Symbol, order_event.FillQuantity)
+
+    def on_fill(self, symbol, fill_quantity):
+        old = self.quantities.get(symbol, 0)
+        new = old + fill_quantity
+        underlying = underlying_of(symbol)
+
+        self.net_by_underlying[underlying] = self.net_by_underlying.get(underlying, 0) + fill_quantity
+        self.gross_by_underlying[underlying] = self.gross_by_underlying.get(underlying, 0) + abs(new) - abs(old)
+
+        if old == 0 and new != 0:
+            strategy = self.pending_tags.pop(symbol, None)
+            self.quantities[symbol] = new
+            self.strategies[symbol] = strategy
+            self.by_underlying.setdefault(underlying, set()).add(symbol)
+            self.by_strategy.setdefault(strategy, set()).add(symbol)
+            if symbol.HasUnderlying:
+                self.option_legs += 1
+        elif old != 0 and new == 0:
+            strategy = self.strategies.pop(symbol)
+            del self.quantities[symbol]
+            self._discard(self.by_underlying, underlying, symbol)
+            self._discard(self.by_strategy, strategy, symbol)
+            if not self.by_underlying.get(underlying):
+                self.net_by_underlying.pop(underlying, None)
+                self.gross_by_underlying.pop(underlying, None)
+            if symbol.HasUnderlying:
+                self.option_legs -= 1
+        elif new != 0:
+            self.quantities[symbol] = new
+
+    @staticmethod
+    def _discard(groups, key, symbol):
+        members = groups.get(key)
+        if members is not None:
+            members.discard(symbol)
+            if not members:
+                del groups[key]
+
+    def quantity(self, symbol):
+        return self.quantities.get(symbol, 0)
+
+    def is_invested(self, symbol):
+        return symbol in self.quantities
+
+    def has_options(self):
+        """True while any option leg is held"""
+        return self.option_legs > 0
+
+    def legs(self, underlying=None, strategy=None):
+        """Open symbols for an underlying and/or strategy (a new set)"""
+        if underlying is not None:
+            symbols = set(self.by_underlying.get(underlying, ()))
+            if strategy is not None:
+                symbols &= self.by_strategy.get(strategy, set())
+            return symbols
+        if strategy is not None:
+            return set(self.by_strategy.get(strategy, ()))
+        return set(self.quantities)
+
+    def net_exposure(self, underlying):
+        """Signed quantity held across the underlying and its derivatives"""
+        return self.net_by_underlying.get(underlying, 0)
+
+    def gross_exposure(self, underlying):
+        """Absolute quantity held across the underlying and its derivatives"""
+        return self.gross_by_underlying.get(underlying, 0)
+
+    def __len__(self):
+        return len(self.quantities)
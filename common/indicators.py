@@ -0,0 +1,273 @@
+"""Streaming indicators with a per-bar update() and a batched update_many().
+
+update_many(values) performs the same floating-point operations, in the same order, as
+calling update() once per value. A vectorized replay (a warm start, a research grid)
+therefore ends in exactly the state that live bars would have produced. It returns the
+indicator value after each input.
+"""
+from collections import deque
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from common.ring_buffer import RingBuffer
+
+
+class SMA:
+    """Simple moving average; the mean of the values so far until `period` have been seen"""
+    __slots__ = ("period", "window", "total", "samples", "value")
+
+    def __init__(self, period):
+        self.period = period
+        self.window = [0.0] * period
+        self.total = 0.0
+        self.samples = 0
+        self.value = 0.0
+
+    @property
+    def is_ready(self):
+        return self.samples >= self.period
+
+    def update(self, value):
+        value = float(value)
+        i = self.samples % self.period
+        if self.samples >= self.period:
+            self.total -= self.window[i]
+        self.window[i] = value
+        self.total += value
+        self.samples += 1
+        self.value = self.total / min(self.samples, self.period)
+        return self.value
+
+    def update_many(self, values):
+        period, window = self.period, self.window
+        total, samples = self.total, self.samples
+        out = np.empty(len(values))
+        for j, value in enumerate(np.asarray(values, dtype=np.float64).tolist()):
+            i = samples % period
+            if samples >= period:
+                total -= window[i]
+            window[i] = value
+            total += value
+            samples += 1
+            out[j] = total / min(samples, period)
+        self.total, self.samples = total, samples
+        if len(out):
+            self.value = float(out[-1])
+        return out
+
+    def reset(self):
+        self.window = [0.0] * self.period
+        self.total = 0.0
+        self.samples = 0
+        self.value = 0.0
+
+
+class EMA:
+    """Exponential moving average seeded with its first value (as LEAN's EMA)"""
+    __slots__ = ("period", "k", "samples", "value")
+
+    def __init__(self, period, smoothing=None):
+        self.period = period
+        self.k = smoothing if smoothing is not None else 2.0 / (period + 1)
+        self.samples = 0
+        self.value = 0.0
+
+    @property
+    def is_ready(self):
+        return self.samples >= self.period
+
+    def update(self, value):
+        value = float(value)
+        self.samples += 1
+        self.value = value if self.samples == 1 else value * self.k + self.value * (1 - self.k)
+        return self.value
+
+    def update_many(self, values):
+        k, current = self.k, self.value
+        values = np.asarray(values, dtype=np.float64).tolist()
+        out = np.empty(len(values))
+        for j, value in enumerate(values):
+            current = value if self.samples + j == 0 else value * k + current * (1 - k)
+            out[j] = current
+        self.samples += len(values)
+        self.value = current
+        return out
+
+    def reset(self):
+        self.samples = 0
+        self.value = 0.0
+
+
+class MACD:
+    """MACD line (fast EMA - slow EMA) with fast/slow crossover detection.
+
+    crossover() compares the current lines with those seen at its previous call, so the
+    caller decides which bars count as observations (e.g. only bars it could trade on).
+    """
+    __slots__ = ("fast", "slow", "prev_fast", "prev_slow")
+
+    def __init__(self, fast_period, slow_period):
+        self.fast = EMA(fast_period)
+        self.slow = EMA(slow_period)
+        self.prev_fast = None
+        self.prev_slow = None
+
+    @property
+    def is_ready(self):
+        return self.fast.is_ready and self.slow.is_ready
+
+    @property
+    def value(self):
+        return self.fast.value - self.slow.value
+
+    def update(self, value):
+        self.fast.update(value)
+        self.slow.update(value)
+        return self.value
+
+    def update_many(self, values):
+        return self.fast.update_many(values) - self.slow.update_many(values)
+
+    def crossover(self):
+        """+1 if fast crossed above slow since the last call, -1 if below, else 0"""
+        fast, slow = self.fast.value, self.slow.value
+        signal = 0
+        if self.prev_fast is not None:
+            if self.prev_fast <= self.prev_slow and fast > slow:
+                signal = 1
+            elif self.prev_fast >= self.prev_slow and fast < slow:
+                signal = -1
+        self.prev_fast, self.prev_slow = fast, slow
+        return signal
+
+    def reset(self):
+        self.fast.reset()
+        self.slow.reset()
+        self.prev_fast = self.prev_slow = None
+
+
+class RollingMin:
+    """Minimum of the last `window` values, or of everything since reset() when window is None"""
+    __slots__ = ("window", "candidates", "samples", "value")
+    sign = 1.0
+
+    def __init__(self, window=None):
+        self.window = window
+        self.candidates = deque()  # (sample index, signed value), increasing values
+        self.samples = 0
+        self.value = None
+
+    @property
+    def is_ready(self):
+        return self.samples >= (self.window or 1)
+
+    def update(self, value):
+        signed = self.sign * float(value)
+        candidates = self.candidates
+        if self.window is None:
+            # Only the running extreme matters
+            if not candidates or signed <= candidates[0][1]:
+                candidates.clear()
+                candidates.append((self.samples, signed))
+            self.samples += 1
+            self.value = self.sign * candidates[0][1]
+            return self.value
+        while candidates and candidates[-1][1] >= signed:
+            candidates.pop()
+        candidates.append((self.samples, signed))
+        self.samples += 1
+        if candidates[0][0] <= self.samples - 1 - self.window:
+            candidates.popleft()
+        self.value = self.sign * candidates[0][1]
+        return self.value
+
+    def update_many(self, values):
+        signed = self.sign * np.asarray(values, dtype=np.float64)
+        if not len(signed):
+            return signed
+        start = self.samples
+        if self.window is None:
+            if self.candidates:
+                signed = np.concatenate(([self.candidates[0][1]], signed))
+            out = np.minimum.accumulate(signed)[-len(values):]
+            self.candidates = deque([(start + len(values) - 1, float(out[-1]))])
+        else:
+            # padded[0] is sample `base`; earlier values that could still be a window's minimum
+            # are the deque's candidates, everything they dominate can be treated as +inf
+            w = self.window
+            base = start - (w - 1)
+            padded = np.full(w - 1 + len(signed), np.inf)
+            for i, v in self.candidates:
+                if i >= base:
+                    padded[i - base] = v
+            padded[w - 1:] = signed
+            out = sliding_window_view(padded, w).min(axis=1)
+            self.candidates = deque()
+            last_base = start + len(signed) - w
+            for offset, v in enumerate(padded[-w:].tolist()):
+                if last_base + offset < base or v == np.inf:
+                    continue
+                while self.candidates and self.candidates[-1][1] >= v:
+                    self.candidates.pop()
+                self.candidates.append((last_base + offset, v))
+        self.samples += len(values)
+        self.value = self.sign * float(out[-1])
+        return self.sign * out
+
+    def reset(self):
+        self.candidates.clear()
+        self.samples = 0
+        self.value = None
+
+
+class RollingMax(RollingMin):
+    """Maximum of the last `window` values, or of everything since reset() when window is None"""
+    __slots__ = ()
+    sign = -1.0
+
+
+class LogReturnWindow:
+    """Last `size` log returns of a price series, newest at the end of values()"""
+    __slots__ = ("returns", "last")
+
+    def __init__(self, size):
+        self.returns = RingBuffer(size)
+        self.last = None
+
+    @property
+    def is_ready(self):
+        return self.returns.is_full
+
+    def __len__(self):
+        return len(self.returns)
+
+    def values(self):
+        return self.returns.values()
+
+    def update(self, price):
+        """Add a price; returns the new log return, or None when there is none (first or non-positive price)"""
+        price = float(price)
+        value = None
+        if self.last is not None and price > 0 and self.last > 0:
+            value = float(np.log(price / self.last))
+            self.returns.push(value)
+        self.last = price
+        return value
+
+    def update_many(self, prices):
+        prices = np.asarray(prices, dtype=np.float64)
+        if not len(prices):
+            return prices
+        previous = np.concatenate(([self.last if self.last is not None else np.nan], prices[:-1]))
+        valid = (prices > 0) & (previous > 0)
+        out = np.full(len(prices), np.nan)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out[valid] = np.log(prices[valid] / previous[valid])
+        self.returns.extend(out[valid])
+        self.last = float(prices[-1])
+        return out
+
+    def reset(self):
+        self.returns.clear()
+        self.last = None
@@ -0,0 +1,207 @@
+"""Streaming performance metrics: O(1) updates per bar, fill, trade and day."""
+import math
+
+import numpy as np
+
+TRADING_DAYS = 252
+
+
+class PerformanceMetrics:
+    """Running Sharpe/Sortino, drawdown, trade, exposure, turnover and fee statistics.
+
+    end_of_day() appends the closing portfolio value to a preallocated daily array and
+    updates the running moments of daily returns. mark() updates the peak and drawdown
+    intraday. on_fill() adds fees and traded notional; when trades_from_fills is set it
+    also keeps each symbol's average cost and counts a trade, net of its fees, each time a
+    position returns to flat. Strategies that trade multi-leg spreads report whole
+    spreads with on_trade() instead. Every statistic is available at any time without a
+    pass over the history.
+    """
+
+    def __init__(self, initial_value, capacity=1024, periods_per_year=TRADING_DAYS, trades_from_fills=True):
+        self.initial_value = float(initial_value)
+        self.periods_per_year = periods_per_year
+        self.trades_from_fills = trades_from_fills
+        self.daily = np.empty(max(int(capacity), 1))
+        self.days = 0
+        self.last_value = self.initial_value
+        # Welford moments of daily returns, plus the downside sum of squares for Sortino
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.downside_sq = 0.0
+        self.peak = self.initial_value
+        self.drawdown = 0.0
+        self.max_drawdown = 0.0
+        self.equity_sum = 0.0
+        self.exposure_sum = 0.0
+        # Trades and fills
+        self.trades = 0
+        self.wins = 0
+        self.trade_pnl = 0.0
+        self.gross_win = 0.0
+        self.gross_loss = 0.0
+        self.fees = 0.0
+        self.traded_notional = 0.0
+        self.positions = {}  # symbol -> [quantity, average price, P&L so far net of fees]
+
+    # --- updates ----------------------------------------------------------
+
+    def mark(self, value):
+        """Intraday portfolio value: updates the running peak and drawdown"""
+        if value > self.peak:
+            self.peak = value
+        self.drawdown = 1 - value / self.peak if self.peak > 0 else 0.0
+        if self.drawdown > self.max_drawdown:
+            self.max_drawdown = self.drawdown
+
+    def end_of_day(self, value, gross_exposure=0.0):
+        """Closing portfolio value of a day and the gross value of the positions held"""
+        value = float(value)
+        if self.days == len(self.daily):
+            self.daily = np.concatenate((self.daily, np.empty(len(self.daily))))
+        self.daily[self.days] = value
+        self.days += 1
+        r = value / self.last_value - 1 if self.last_value > 0 else 0.0
+        self.last_value = value
+        delta = r - self.mean
+        self.mean += delta / self.days
+        self.m2 += delta * (r - self.mean)
+        if r < 0:
+            self.downside_sq += r * r
+        self.equity_sum += value
+        self.exposure_sum += abs(gross_exposure) / value if value > 0 else 0.0
+        self.mark(value)
+
+    def on_order_event(self, order_event, multiplier=1.0):
+        """Apply a LEAN OrderEvent; events without a fill are ignored"""
+        if order_event.FillQuantity:
+            fee = order_event.OrderFee.Value.Amount if order_event.OrderFee is not None else 0.0
+            self.on_fill(order_event.Symbol, order_event.FillQuantity, order_event.FillPrice, fee, multiplier)
+
+    def on_fill(self, symbol, quantity, price, fee=0.0, multiplier=1.0):
+        """A fill of `quantity` at `price` (per unit; `multiplier` units per contract)"""
+        self.fees += fee
+        self.traded_notional += abs(quantity * price) * multiplier
+        if not self.trades_from_fills or not quantity:
+            return
+        position = self.positions.get(symbol)
+        if position is None:
+            position = self.positions[symbol] = [0.0, 0.0, 0.0]
+        held, cost, pnl = position
+        pnl -= fee
+        if held == 0 or (held > 0) == (quantity > 0):
+            cost = (cost * held + price * quantity) / (held + quantity)
+            held += quantity
+        else:
+            closed = min(abs(quantity), abs(held))
+            pnl += closed * (price - cost) * multiplier * (1 if held > 0 else -1)
+            held += quantity
+            if held and (held > 0) == (quantity > 0):
+                cost = price  # reversed through flat: the remainder opened at this fill
+        if held == 0:
+            del self.positions[symbol]
+            self.on_trade(pnl)
+        else:
+            position[:] = held, cost, pnl
+
+    def on_trade(self, pnl):
+        """A closed trade (or spread) with its realized P&L in account currency"""
+        self.trades += 1
+        self.trade_pnl += pnl
+        if pnl > 0:
+            self.wins += 1
+            self.gross_win += pnl
+        else:
+            self.gross_loss -= pnl
+
+    # --- statistics -------------------------------------------------------
+
+    @property
+    def value(self):
+        return self.last_value
+
+    @property
+    def growth(self):
+        """Last closing value as a multiple of the initial value"""
+        return self.last_value / self.initial_value
+
+    @property
+    def total_return(self):
+        return self.growth - 1
+
+    def annualized_return(self, years):
+        return self.growth ** (1 / years) - 1 if years > 0 and self.growth > 0 else 0.0
+
+    @property
+    def volatility(self):
+        """Annualized standard deviation of daily returns"""
+        if self.days < 2:
+            return 0.0
+        return math.sqrt(self.m2 / (self.days - 1) * self.periods_per_year)
+
+    @property
+    def sharpe(self):
+        volatility = self.volatility
+        return self.mean * self.periods_per_year / volatility if volatility > 0 else None
+
+    @property
+    def sortino(self):
+        if self.days < 2 or self.downside_sq <= 0:
+            return None
+        return self.mean * self.periods_per_year / math.sqrt(self.downside_sq / self.days * self.periods_per_year)
+
+    @property
+    def win_rate(self):
+        return self.wins / self.trades if self.trades else None
+
+    @property
+    def average_pnl(self):
+        """Average realized P&L per trade (per spread for strategies reporting spreads)"""
+        return self.trade_pnl / self.trades if self.trades else None
+
+    @property
+    def profit_factor(self):
+        return self.gross_win / self.gross_loss if self.gross_loss > 0 else None
+
+    @property
+    def average_equity(self):
+        return self.equity_sum / self.days if self.days else self.initial_value
+
+    @property
+    def exposure(self):
+        """Average end-of-day gross exposure as a fraction of portfolio value"""
+        return self.exposure_sum / self.days if self.days else 0.0
+
+    @property
+    def turnover(self):
+        """Traded notional over average equity"""
+        return self.traded_notional / self.average_equity
+
+    @property
+    def fee_drag(self):
+        """Fees paid as a fraction of average equity"""
+        return self.fees / self.average_equity
+
+    def daily_values(self):
+        """Closing values so far (a view of the preallocated array)"""
+        return self.daily[:self.days]
+
+    def summary(self):
+        return {"value": self.last_value, "total_return": self.total_return, "sharpe": self.sharpe,
+                "sortino": self.sortino, "max_drawdown": self.max_drawdown, "trades": self.trades,
+                "win_rate": self.win_rate, "average_pnl": self.average_pnl, "fees": self.fees,
+                "fee_drag": self.fee_drag, "exposure": self.exposure, "turnover": self.turnover}
+
+    def format(self):
+        """One-line summary for logs"""
+        def pct(x):
+            return "%.2f%%" % (x * 100) if x is not None else "n/a"
+
+        def num(x):
+            return "%.2f" % x if x is not None else "n/a"
+
+        return ("Return %s, Sharpe %s, Sortino %s, max drawdown %s, %d trades (win rate %s, avg P&L %s), "
+                "fees %.2f (drag %s), exposure %s, turnover %.2fx"
+                % (pct(self.total_return), num(self.sharpe), num(self.sortino), pct(self.max_drawdown),
+                   self.trades, pct(self.win_rate), num(self.average_pnl), self.fees, pct(self.fee_drag),
+                   pct(self.exposure), self.turnover))
@@ -0,0 +1,42 @@
+"""Walk-forward AR order schedules (written by `python -m lean_local.walk_forward`)."""
+import json
+
+import numpy as np
+
+
+class OrderSchedule:
+    """Per-period (AR order, training window) choices, looked up by algorithm time.
+
+    Each period applies from its "from" time (the end of the training window it was
+    chosen with) until the next period starts. The strategies fit pure AR models, so
+    schedules containing d > 0 or MA terms are rejected.
+    """
+
+    def __init__(self, periods):
+        for period in periods:
+            p, d, q = period["order"]
+            if d or q:
+                raise ValueError("schedule order ARIMA(%d,%d,%d): only AR(p) orders can be traded" % (p, d, q))
+        self.starts = np.array([np.datetime64(period["from"], "s") for period in periods], dtype="datetime64[s]")
+        self.choices = [(int(period["order"][0]), int(period["window"])) for period in periods]
+
+    @classmethod
+    def from_object_store(cls, algorithm, key):
+        return cls(json.loads(algorithm.ObjectStore.Read(key))["periods"])
+
+    def __len__(self):
+        return len(self.choices)
+
+    @property
+    def candidates(self):
+        """Distinct (order, window) pairs the schedule uses"""
+        return sorted(set(self.choices))
+
+    @property
+    def max_window(self):
+        return max((window for _, window in self.choices), default=0)
+
+    def at(self, time):
+        """(order, window) in force at `time`, or None before the first period"""
+        i = int(np.searchsorted(self.starts, np.datetime64(time, "s"), side="right")) - 1
+        return self.choices[i] if i >= 0 else None
@@ -0,0 +1,223 @@
+"""Array-backed book of two-leg option spreads."""
+import numpy as np
+
+from AlgorithmImports import OrderStatus
+
+# Slot states
+FREE = 0
+OPENING = 1
+OPEN = 2
+CLOSING = 3
+
+SHORT_LEG = 0
+LONG_LEG = 1
+
+
+class ClosedSpread:
+    """A spread that just went flat: net prices per unit are long minus short, like the entry"""
+    __slots__ = ("name", "short_symbol", "long_symbol", "quantity", "entry_net", "exit_net", "pnl", "reason")
+
+    def __init__(self, name, short_symbol, long_symbol, quantity, entry_cost, exit_cost, reason):
+        self.name = name
+        self.short_symbol = short_symbol
+        self.long_symbol = long_symbol
+        self.quantity = quantity
+        self.entry_net = entry_cost / quantity
+        self.exit_net = -exit_cost / quantity
+        # Realized P&L of the whole position in price points (before fees and multiplier)
+        self.pnl = -(entry_cost + exit_cost)
+        self.reason = reason
+
+
+class SpreadBook:
+    """Open spreads stored as units in NumPy columns, one row per spread.
+
+    Every order event goes through on_order_event, including exercise and expiry
+    fills, so the book alone knows which spreads are held and how they closed.
+    """
+
+    def __init__(self, capacity=16):
+        self.capacity = 0
+        self.strategy_names = []
+        self.strategy_codes = {}
+        self.leg_slots = {}  # symbol -> (slot, leg)
+        self.free_slots = []
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        """Grow every column to the given capacity"""
+        old = self.capacity
+
+        def grow(column, dtype):
+            grown = np.empty(capacity, dtype=object) if dtype is object else np.zeros(capacity, dtype=dtype)
+            if old:
+                grown[:old] = column
+            return grown
+
+        self.state = grow(getattr(self, "state", None), np.int8)
+        self.strategy = grow(getattr(self, "strategy", None), np.int16)
+        self.quantity = grow(getattr(self, "quantity", None), np.int64)
+        self.short_entry = grow(getattr(self, "short_entry", None), np.float64)
+        self.long_entry = grow(getattr(self, "long_entry", None), np.float64)
+        self.short_held = grow(getattr(self, "short_held", None), np.int64)
+        self.long_held = grow(getattr(self, "long_held", None), np.int64)
+        self.entry_cost = grow(getattr(self, "entry_cost", None), np.float64)
+        self.exit_cost = grow(getattr(self, "exit_cost", None), np.float64)
+        self.short_symbols = grow(getattr(self, "short_symbols", None), object)
+        self.long_symbols = grow(getattr(self, "long_symbols", None), object)
+        self.reasons = grow(getattr(self, "reasons", None), object)
+        self.free_slots.extend(range(capacity - 1, old - 1, -1))
+        self.capacity = capacity
+
+    def strategy_code(self, name):
+        """Small integer code for a strategy name"""
+        code = self.strategy_codes.get(name)
+        if code is None:
+            code = len(self.strategy_names)
+            self.strategy_names.append(name)
+            self.strategy_codes[name] = code
+        return code
+
+    def open(self, strategy, short_symbol, long_symbol, quantity, short_price, long_price):
+        """Register a spread before its orders are sent and return its slot"""
+        if not self.free_slots:
+            self._allocate(self.capacity * 2)
+        slot = self.free_slots.pop()
+        self.state[slot] = OPENING
+        self.strategy[slot] = self.strategy_code(strategy)
+        self.quantity[slot] = quantity
+        self.short_entry[slot] = short_price
+        self.long_entry[slot] = long_price
+        self.short_held[slot] = 0
+        self.long_held[slot] = 0
+        self.entry_cost[slot] = 0.0
+        self.exit_cost[slot] = 0.0
+        self.short_symbols[slot] = short_symbol
+        self.long_symbols[slot] = long_symbol
+        self.reasons[slot] = None
+        self.leg_slots[short_symbol] = (slot, SHORT_LEG)
+        self.leg_slots[long_symbol] = (slot, LONG_LEG)
+        return slot
+
+    def release(self, slot):
+        """Drop a spread from the book"""
+        self.leg_slots.pop(self.short_symbols[slot], None)
+        self.leg_slots.pop(self.long_symbols[slot], None)
+        self.short_symbols[slot] = None
+        self.long_symbols[slot] = None
+        self.reasons[slot] = None
+        self.state[slot] = FREE
+        self.free_slots.append(slot)
+
+    def discard(self, slot):
+        """Drop a spread whose entry orders never filled"""
+        if self.state[slot] == OPENING and self.short_held[slot] == 0 and self.long_held[slot] == 0:
+            self.release(slot)
+
+    def mark_closing(self, slot, reason=None):
+        """Flag a spread whose exit orders have been sent"""
+        self.state[slot] = CLOSING
+        self.reasons[slot] = reason
+
+    def strategy_name(self, slot):
+        return self.strategy_names[self.strategy[slot]]
+
+    def strategy_of(self, symbol):
+        """Strategy name of the spread holding `symbol`, or None"""
+        entry = self.leg_slots.get(symbol)
+        return self.strategy_name(entry[0]) if entry is not None else None
+
+    def open_count(self):
+        """Number of spreads currently held or being entered/exited"""
+        return self.capacity - len(self.free_slots)
+
+    def has_open(self):
+        return bool(np.any(self.state == OPEN))
+
+    def leg_count(self):
+        """Number of option legs currently held"""
+        return int(np.count_nonzero(self.short_held) + np.count_nonzero(self.long_held))
+
+    def on_order_event(self, order_event):
+        """Apply an order event; returns a ClosedSpread if it closed one, else None"""
+        if order_event.FillQuantity:
+            return self.on_fill(order_event.Symbol, order_event.FillQuantity, order_event.FillPrice)
+        if order_event.Status in (OrderStatus.Canceled, OrderStatus.Invalid):
+            entry = self.leg_slots.get(order_event.Symbol)
+            if entry is not None and self.state[entry[0]] == OPENING:
+                # Entry that never filled
+                slot = entry[0]
+                if self.short_held[slot] == 0 and self.long_held[slot] == 0:
+                    self.reasons[slot] = order_event.Message or "canceled"
+                    return self._close(slot)
+        return None
+
+    def on_fill(self, symbol, fill_quantity, fill_price):
+        """Apply a fill; returns a ClosedSpread if it flattened the spread, else None"""
+        entry = self.leg_slots.get(symbol)
+        if entry is None:
+            return None
+        slot, leg = entry
+        state = self.state[slot]
+        fill_quantity = int(fill_quantity)
+        if state == OPENING:
+            self.entry_cost[slot] += fill_quantity * fill_price
+        else:
+            self.exit_cost[slot] += fill_quantity * fill_price
+            if state == OPEN:
+                # Exercise or expiry taking the spread off
+                self.state[slot] = CLOSING
+                self.reasons[slot] = self.strategy_name(slot) + " expiry"
+
+        if leg == SHORT_LEG:
+            self.short_held[slot] += fill_quantity
+            if state == OPENING and fill_quantity < 0:
+                self.short_entry[slot] = fill_price
+        else:
+            self.long_held[slot] += fill_quantity
+            if state == OPENING and fill_quantity > 0:
+                self.long_entry[slot] = fill_price
+
+        short_held = self.short_held[slot]
+        long_held = self.long_held[slot]
+        if state == OPENING:
+            if short_held != 0 and long_held != 0:
+                self.state[slot] = OPEN
+        elif short_held == 0 and long_held == 0:
+            # Closed by our exit orders or by expiration
+            return self._close(slot)
+        return None
+
+    def _close(self, slot):
+        closed = ClosedSpread(self.strategy_name(slot), self.short_symbols[slot], self.long_symbols[slot],
+                              int(self.quantity[slot]), self.entry_cost[slot], self.exit_cost[slot],
+                              self.reasons[slot])
+        self.release(slot)
+        return closed
+
+    def evaluate(self, quotes, profit_target_pct, stop_loss_pct):
+        """Spreads hitting profit target or stop loss as (slots, pnl_pcts, is_profit)
+
+        quotes(symbols) returns (bids, asks) arrays, 0.0 where a symbol has no quote
+        (ChainIndex.quotes). P&L is measured on the net spread price: entry net
+        (short - long) against the cost to close it (short ask - long bid), which
+        covers credit and debit spreads alike.
+        """
+        slots = np.flatnonzero(self.state == OPEN)
+        n = len(slots)
+        if n == 0:
+            return slots, np.empty(0), np.empty(0, dtype=bool)
+
+        bids, asks = quotes(np.concatenate((self.short_symbols[slots], self.long_symbols[slots])))
+        short_ask = asks[:n]
+        long_bid = bids[n:]
+
+        entry_net = self.short_entry[slots] - self.long_entry[slots]
+        exit_net = short_ask - long_bid
+        valid = (short_ask > 0) & (long_bid > 0) & (entry_net != 0)
+        pnl_pct = np.where(valid, (entry_net - exit_net) / np.where(valid, np.abs(entry_net), 1.0), 0.0)
+
+        is_profit = valid & (pnl_pct >= profit_target_pct)
+        is_stop = valid & (pnl_pct <= -stop_loss_pct)
+        hit = is_profit | is_stop
+        return slots[hit], pnl_pct[hit], is_profit[hit]
@@ -0,0 +1,131 @@
+"""Incremental market-regime engine with cached boundaries."""
+
+ABOVE = 1
+BELOW = -1
+
+
+class ThresholdRegime:
+    """All-of conditions "input above/below threshold"
+
+    Thresholds are pulled from their sources once per session by refresh().
+    Between refreshes an update only compares the new value with the cached
+    boundary, and the regime is re-derived only when a condition flips.
+    """
+
+    def __init__(self, conditions):
+        # conditions: list of (input name, ABOVE or BELOW, threshold source)
+        self.inputs = [c[0] for c in conditions]
+        self.directions = [c[1] for c in conditions]
+        self.sources = [c[2] if callable(c[2]) else (lambda value=c[2]: value) for c in conditions]
+        self.thresholds = [None] * len(conditions)
+        self.values = [None] * len(conditions)
+        self.flags = [False] * len(conditions)
+        self.state = False
+
+    def _condition(self, i):
+        value = self.values[i]
+        threshold = self.thresholds[i]
+        if value is None or value <= 0 or threshold is None:
+            return False
+        if self.directions[i] == ABOVE:
+            return value > threshold
+        return value < threshold
+
+    def refresh(self):
+        """Reload thresholds; returns True if the regime changed"""
+        for i, source in enumerate(self.sources):
+            self.thresholds[i] = source()
+            self.flags[i] = self._condition(i)
+        return self._settle()
+
+    def update(self, name, value):
+        """Apply a new input value; returns True if the regime changed"""
+        crossed = False
+        for i, input_name in enumerate(self.inputs):
+            if input_name != name:
+                continue
+            self.values[i] = value
+            flag = self._condition(i)
+            if flag != self.flags[i]:
+                self.flags[i] = flag
+                crossed = True
+        return crossed and self._settle()
+
+    def _settle(self):
+        state = all(self.flags)
+        changed = state != self.state
+        self.state = state
+        return changed
+
+
+class PredicateRegime:
+    """Regime defined by an arbitrary predicate over the latest inputs"""
+
+    def __init__(self, inputs, predicate):
+        self.inputs = list(inputs)
+        self.predicate = predicate
+        self.values = {}
+        self.state = False
+
+    def refresh(self):
+        return self._settle()
+
+    def update(self, name, value):
+        self.values[name] = value
+        return self._settle()
+
+    def _settle(self):
+        if len(self.values) < len(self.inputs):
+            state = False
+        else:
+            state = bool(self.predicate(self.values))
+        changed = state != self.state
+        self.state = state
+        return changed
+
+
+class RegimeEngine:
+    """Named regimes fed by named inputs, with O(1) cached flags"""
+
+    def __init__(self):
+        self.regimes = {}
+        self.subscribers = {}  # input name -> [(regime name, regime)]
+        self.listeners = []
+        self.session = None
+
+    def register(self, name, regime):
+        """Add a regime (ThresholdRegime, PredicateRegime or compatible)"""
+        self.regimes[name] = regime
+        for input_name in set(regime.inputs):
+            self.subscribers.setdefault(input_name, []).append((name, regime))
+        return regime
+
+    def register_predicate(self, name, inputs, predicate):
+        """Shortcut for a PredicateRegime; predicate receives {input: value}"""
+        return self.register(name, PredicateRegime(inputs, predicate))
+
+    def add_listener(self, listener):
+        """listener(name, state) is called whenever a regime changes"""
+        self.listeners.append(listener)
+
+    def session_open(self, session):
+        """Refresh every regime's thresholds once per session"""
+        if session == self.session:
+            return
+        self.session = session
+        for name, regime in self.regimes.items():
+            if regime.refresh():
+                self._notify(name, regime.state)
+
+    def update(self, input_name, value):
+        """Feed a new input value to the regimes that depend on it"""
+        for name, regime in self.subscribers.get(input_name, ()):
+            if regime.update(input_name, value):
+                self._notify(name, regime.state)
+
+    def is_favorable(self, name):
+        return self.regimes[name].state
+
+    def _notify(self, name, state):
+        for listener in self.listeners:
+            listener(name, state)
@@ -0,0 +1,57 @@
+"""Preallocated NumPy ring buffer for rolling windows of floats."""
+import numpy as np
+
+
+class RingBuffer:
+    """Fixed-capacity FIFO of float64 values; push is O(1) and never allocates"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.data = np.zeros(capacity)
+        self.start = 0   # index of the oldest value
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def is_full(self):
+        return self.count == self.capacity
+
+    def push(self, value):
+        """Append a value; returns the value it evicted, or None while not full"""
+        if self.count < self.capacity:
+            self.data[(self.start + self.count) % self.capacity] = value
+            self.count += 1
+            return None
+        evicted = self.data[self.start]
+        self.data[self.start] = value
+        self.start = (self.start + 1) % self.capacity
+        return evicted
+
+    def __getitem__(self, i):
+        """i-th value in chronological order (negative indexes count from the newest)"""
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        return self.data[(self.start + i) % self.capacity]
+
+    def latest(self, k):
+        """Newest k values, newest first"""
+        end = self.start + self.count
+        return self.data[(end - 1 - np.arange(k)) % self.capacity]
+
+    def values(self):
+        """Chronological copy of the contents"""
+        if self.start + self.count <= self.capacity:
+            return self.data[self.start:self.start + self.count].copy()
+        return np.concatenate((self.data[self.start:], self.data[:(self.start + self.count) % self.capacity]))
+
+    def clear(self):
+        self.start = 0
+        self.count = 0
+
+    def extend(self, values):
+        for value in values:
+            self.push(value)
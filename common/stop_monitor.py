@@ -0,0 +1,88 @@
+"""Fine-resolution stop-loss, take-profit and trailing-stop exits for coarse strategies."""
+from AlgorithmImports import SecurityType
+
+from common.indicators import RollingMax, RollingMin
+
+# How open() subscribes a symbol at the fine resolution
+ADD_METHODS = {SecurityType.Equity: "AddEquity", SecurityType.Forex: "AddForex"}
+
+
+class PositionStop:
+    """Exit levels of one open position; stop/take are price levels, trail a fraction"""
+    __slots__ = ("direction", "stop", "take", "trail", "extreme")
+
+    def __init__(self, direction, entry, stop=None, take=None, trail=None):
+        self.direction = direction
+        self.stop = entry * (1 - stop * direction) if stop is not None else None
+        self.take = entry * (1 + take * direction) if take is not None else None
+        self.trail = trail
+        # Best price since entry: the running high of a long, the running low of a short
+        self.extreme = RollingMax() if direction > 0 else RollingMin()
+        self.extreme.update(entry)
+
+    def check(self, price):
+        """Reason to close the position at `price`, or None"""
+        d = self.direction
+        extreme = self.extreme.update(price)
+        if self.take is not None and d * (price - self.take) >= 0:
+            return "take profit"
+        if self.stop is not None and d * (price - self.stop) <= 0:
+            return "stop loss"
+        if self.trail is not None and d * (extreme - price) / max(extreme, 1e-9) >= self.trail:
+            return "trailing stop"
+        return None
+
+
+class StopMonitor:
+    """Checks the exit levels of open positions on every bar of the traded symbols.
+
+    The strategy subscribes its symbols at its own `resolution`. With a `fine` resolution,
+    open() also subscribes the symbol at it for as long as the position is monitored, and
+    close() drops the fine data again: RemoveSecurity removes every subscription of the
+    symbol, so it is re-added at `resolution` (consolidators on that subscription carry on).
+    on_data() checks each monitored symbol with a bar in the slice, fine or coarse; when a
+    level is reached on_exit(symbol, price, reason) places the closing order and the
+    position stops being monitored. Strategies close their positions before close().
+    """
+
+    def __init__(self, algorithm, on_exit, resolution, fine=None):
+        self.algorithm = algorithm
+        self.on_exit = on_exit
+        self.resolution = resolution
+        self.fine = fine
+        self.positions = {}         # symbol -> PositionStop
+
+    def __contains__(self, symbol):
+        return symbol in self.positions
+
+    def _add(self, symbol, resolution):
+        getattr(self.algorithm, ADD_METHODS[symbol.SecurityType])(symbol.Value, resolution, symbol.ID.Market)
+
+    def open(self, symbol, entry, quantity, stop=None, take=None, trail=None):
+        """Monitor (or re-arm) a position; stop, take and trail are fractions of the entry price"""
+        if self.fine is not None and symbol not in self.positions:
+            self._add(symbol, self.fine)
+        self.positions[symbol] = PositionStop(1 if quantity > 0 else -1, float(entry), stop, take, trail)
+
+    def close(self, symbol):
+        """Stop monitoring symbol (and drop its fine data)"""
+        if self.positions.pop(symbol, None) is not None and self.fine is not None:
+            self.algorithm.RemoveSecurity(symbol)
+            self._add(symbol, self.resolution)
+
+    def check(self, symbol, price):
+        """Check one price of a monitored symbol; returns the exit reason when on_exit was fired"""
+        position = self.positions.get(symbol)
+        if position is None:
+            return None
+        reason = position.check(float(price))
+        if reason is not None:
+            self.on_exit(symbol, price, reason)
+            self.close(symbol)
+        return reason
+
+    def on_data(self, data):
+        """Check every monitored symbol with a bar in the slice"""
+        for symbol in list(self.positions):
+            if data.ContainsKey(symbol):
+                self.check(symbol, data[symbol].Close)
@@ -0,0 +1,154 @@
+"""Append-only binary journal of order events, entries and exits, with a columnar reader."""
+import os
+
+import numpy as np
+import pandas as pd
+
+# Record kinds
+ORDER_EVENT = 0
+ENTRY = 1
+EXIT = 2
+KIND_NAMES = {ORDER_EVENT: "order_event", ENTRY: "entry", EXIT: "exit"}
+
+# LEAN OrderStatus values
+STATUS_NAMES = {0: "New", 1: "Submitted", 2: "PartiallyFilled", 3: "Filled", 5: "Canceled", 6: "None",
+                7: "Invalid", 8: "CancelPending", 9: "UpdateSubmitted"}
+
+NO_TEXT = -1
+
+# One fixed-size (50 byte) little-endian record. symbol, strategy and reason index the
+# journal's string table; time is algorithm time in epoch seconds.
+RECORD = np.dtype([("time", "<i8"), ("kind", "u1"), ("status", "i1"), ("strategy", "<i4"),
+                   ("reason", "<i4"), ("symbol", "<i4"), ("order_id", "<i4"), ("quantity", "<f8"),
+                   ("price", "<f8"), ("fee", "<f8")])
+
+
+class TradeJournal:
+    """Buffered writer: records collect in a NumPy array and are written in batches.
+
+    Two files are written: `path` holds the records, `path + ".strings"` one interned
+    string per line (symbols, strategy names, exit reasons) in first-seen order. With
+    append=True an existing journal is continued; first_record is where this run's
+    records start.
+    """
+
+    def __init__(self, algorithm, path, strategy=None, buffer_size=4096, append=False):
+        self.algorithm = algorithm
+        self.path = path
+        self.default_strategy = strategy
+        self.buffer = np.zeros(buffer_size, dtype=RECORD)
+        self.count = 0
+        self.codes = {}
+        self.new_strings = []
+        self.records = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.first_record = 0
+        if append and os.path.exists(path) and os.path.exists(path + ".strings"):
+            self.codes = {text: code for code, text in enumerate(load_strings(path))}
+            # Drop a partial record left by an interrupted write
+            self.first_record = os.path.getsize(path) // RECORD.itemsize
+            with open(path, "r+b") as f:
+                f.truncate(self.first_record * RECORD.itemsize)
+            self.file = open(path, "ab")
+            self.strings_file = open(path + ".strings", "a")
+        else:
+            self.file = open(path, "wb")
+            self.strings_file = open(path + ".strings", "w")
+
+    @classmethod
+    def in_object_store(cls, algorithm, key, strategy=None, buffer_size=4096, append=None):
+        """Journal stored under an ObjectStore key. A new backtest starts a new journal, a
+        resumed one (resume=1, unless append says otherwise) continues it."""
+        if append is None:
+            append = algorithm.GetParameter("resume") == "1"
+        return cls(algorithm, algorithm.ObjectStore.GetFilePath(key), strategy, buffer_size, append)
+
+    def _code(self, text):
+        if text is None or text == "":
+            return NO_TEXT
+        text = str(text)
+        code = self.codes.get(text)
+        if code is None:
+            code = len(self.codes)
+            self.codes[text] = code
+            self.new_strings.append(text)
+        return code
+
+    def _append(self, kind, status, strategy, reason, symbol, order_id, quantity, price, fee):
+        if self.count == len(self.buffer):
+            self.flush()
+        time = int(np.datetime64(self.algorithm.Time, "s").astype(np.int64))
+        self.buffer[self.count] = (time, kind, status, self._code(strategy or self.default_strategy),
+                                   self._code(reason), self._code(symbol), order_id, quantity, price, fee)
+        self.count += 1
+
+    def order_event(self, order_event, strategy=None):
+        """Record a LEAN OrderEvent (any status)"""
+        fee = order_event.OrderFee.Value.Amount if order_event.OrderFee is not None else 0.0
+        self._append(ORDER_EVENT, int(order_event.Status), strategy, order_event.Message, order_event.Symbol,
+                     order_event.OrderId, order_event.FillQuantity, order_event.FillPrice, fee)
+
+    def entry(self, symbol, quantity, price, reason=None, strategy=None):
+        """Record a position or spread being opened (price: fill or net premium).
+        A spread is recorded under its first leg, on entry and exit alike."""
+        self._append(ENTRY, 0, strategy, reason, symbol, 0, quantity, price, 0.0)
+
+    def exit(self, symbol, quantity, price, reason=None, strategy=None):
+        """Record a position or spread being closed and why"""
+        self._append(EXIT, 0, strategy, reason, symbol, 0, quantity, price, 0.0)
+
+    def flush(self):
+        """Write buffered records and new strings"""
+        if self.new_strings:
+            self.strings_file.write("".join(s.replace("\n", " ") + "\n" for s in self.new_strings))
+            self.strings_file.flush()
+            self.new_strings = []
+        if self.count:
+            self.file.write(self.buffer[:self.count].tobytes())
+            self.file.flush()
+            self.records += self.count
+            self.count = 0
+
+    def close(self):
+        self.flush()
+        self.file.close()
+        self.strings_file.close()
+
+
+def load_records(path):
+    """Raw records as a structured array (memory-mapped; empty when nothing was written)"""
+    if not os.path.exists(path) or os.path.getsize(path) < RECORD.itemsize:
+        return np.zeros(0, dtype=RECORD)
+    return np.memmap(path, dtype=RECORD, mode="r", shape=(os.path.getsize(path) // RECORD.itemsize,))
+
+
+def load_strings(path):
+    with open(path + ".strings") as f:
+        return f.read().split("\n")[:-1]
+
+
+def to_frame(path):
+    """Journal as a pandas DataFrame with decoded times, kinds, statuses and strings"""
+    records = load_records(path)
+    strings = np.array(load_strings(path) + [None], dtype=object)  # NO_TEXT (-1) -> None
+    return pd.DataFrame({
+        "time": records["time"].astype("datetime64[s]"),
+        "kind": pd.Categorical.from_codes(records["kind"], [KIND_NAMES[k] for k in sorted(KIND_NAMES)]),
+        "status": pd.Series(records["status"]).map(STATUS_NAMES).where(records["kind"] == ORDER_EVENT),
+        "strategy": strings[records["strategy"]],
+        "symbol": strings[records["symbol"]],
+        "order_id": records["order_id"],
+        "quantity": records["quantity"],
+        "price": records["price"],
+        "fee": records["fee"],
+        "reason": strings[records["reason"]],
+    })
+
+
+def fills(path):
+    """Filled and partially filled order events"""
+    records = load_records(path)
+    mask = (records["kind"] == ORDER_EVENT) & (records["quantity"] != 0)
+    return records[mask]
@@ -0,0 +1,141 @@
+"""Shared trading calendar: FOMC days, holidays, early closes, SPXW expiries."""
+import os
+from datetime import date, timedelta
+
+import numpy as np
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "data", "trading_calendar.csv")
+
+# Day flags, one byte per calendar day
+FOMC = 1
+HOLIDAY = 2
+EARLY_CLOSE = 4
+SPXW_EXPIRY = 8
+TRADING_DAY = 16
+
+KIND_FLAGS = {"fomc": FOMC, "holiday": HOLIDAY, "early_close": EARLY_CLOSE}
+
+# SPXW listing history: (weekday, first expiration on that weekday)
+SPXW_EXPIRY_WEEKDAYS = (
+    (4, date(2005, 10, 28)),  # Friday weeklys
+    (2, date(2016, 2, 24)),   # Wednesday
+    (0, date(2016, 8, 22)),   # Monday
+    (1, date(2022, 4, 19)),   # Tuesday
+    (3, date(2022, 5, 12)),   # Thursday
+)
+
+
+def _read_events(path):
+    events = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#") or line.startswith("kind,"):
+                continue
+            kind, day = line.split(",")
+            events.append((KIND_FLAGS[kind], date.fromisoformat(day)))
+    return events
+
+
+def _build_days(events, first, last):
+    """Day-flag bitmap for every calendar day from first to last"""
+    n = (last - first).days + 1
+    days = np.zeros(n, dtype=np.uint8)
+    base = first.toordinal()
+    for flag, day in events:
+        days[day.toordinal() - base] |= flag
+
+    # Weekdays that are not holidays are trading days
+    weekdays = (np.arange(n) + first.weekday()) % 7
+    open_days = (weekdays < 5) & ((days & HOLIDAY) == 0)
+    days[open_days] |= TRADING_DAY
+
+    # SPXW expirations; a Friday expiry falling on a holiday moves to Thursday
+    offsets = np.arange(n)
+    for weekday, since in SPXW_EXPIRY_WEEKDAYS:
+        listed = (weekdays == weekday) & (offsets >= since.toordinal() - base)
+        days[listed & open_days] |= SPXW_EXPIRY
+        if weekday == 4:
+            moved = np.flatnonzero(listed & ~open_days)
+            moved = moved[moved > 0] - 1
+            days[moved[open_days[moved]]] |= SPXW_EXPIRY
+    return days
+
+
+class TradingCalendar:
+    """Day-flag bitmap with O(1) membership tests and vectorized next-event queries"""
+
+    def __init__(self, days, first):
+        self.days = days
+        self.first = first
+        self.base = first.toordinal()
+        self.base64 = np.datetime64(first, "D")
+        self._dates = {}
+
+    @classmethod
+    def load(cls, path=DATA_PATH):
+        """Read the event file and build the bitmap in memory (a few KB, nothing is written)"""
+        events = _read_events(path)
+        first = date(min(d for _, d in events).year, 1, 1)
+        last = date(max(d for _, d in events).year, 12, 31)
+        return cls(_build_days(events, first, last), first)
+
+    def flags(self, day):
+        """Flags for a date or datetime (0 outside the calendar range)"""
+        i = day.toordinal() - self.base
+        if 0 <= i < len(self.days):
+            return int(self.days[i])
+        return 0
+
+    def is_fomc(self, day):
+        return self.flags(day) & FOMC != 0
+
+    def is_holiday(self, day):
+        return self.flags(day) & HOLIDAY != 0
+
+    def is_early_close(self, day):
+        return self.flags(day) & EARLY_CLOSE != 0
+
+    def is_trading_day(self, day):
+        return self.flags(day) & TRADING_DAY != 0
+
+    def is_spxw_expiry(self, day):
+        return self.flags(day) & SPXW_EXPIRY != 0
+
+    def dates(self, flag):
+        """Sorted datetime64[D] array of days carrying a flag"""
+        result = self._dates.get(flag)
+        if result is None:
+            offsets = np.flatnonzero(np.asarray(self.days) & flag)
+            result = self.base64 + offsets.astype("timedelta64[D]")
+            self._dates[flag] = result
+        return result
+
+    def next_event(self, days, flag, inclusive=True):
+        """Next day carrying `flag` on/after each of `days` (NaT past the end)"""
+        events = self.dates(flag)
+        days = np.asarray(days, dtype="datetime64[D]")
+        idx = np.searchsorted(events, days, side="left" if inclusive else "right")
+        result = np.full(days.shape, np.datetime64("NaT"), dtype="datetime64[D]")
+        found = idx < len(events)
+        result[found] = events[idx[found]]
+        return result
+
+    def next_date(self, day, flag, inclusive=True):
+        """Scalar next_event returning a datetime.date or None"""
+        start = day.toordinal() - self.base + (0 if inclusive else 1)
+        hits = np.flatnonzero(np.asarray(self.days[max(start, 0):]) & flag)
+        if len(hits) == 0:
+            return None
+        return self.first + timedelta(days=int(hits[0]) + max(start, 0))
+
+
+_shared = None
+
+
+def get_calendar():
+    """Process-wide calendar instance shared by every strategy"""
+    global _shared
+    if _shared is None:
+        _shared = TradingCalendar.load()
+    return _shared
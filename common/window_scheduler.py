@@ -0,0 +1,83 @@
+"""Intraday window schedule with O(1) minute lookups."""
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def minute_of_day(t):
+    """Minute index of a datetime.time or datetime"""
+    return t.hour * 60 + t.minute
+
+
+class WindowScheduler:
+    """Named intraday windows compiled into a per-minute bitmask
+
+    Each minute of the day holds a bitmask of the windows open at that
+    minute, so "is anything active now?" and "is window X open?" are a
+    list lookup. Bar callbacks rejected by dispatch() are counted.
+    """
+
+    def __init__(self):
+        self.names = []
+        self.bits = {}
+        self.mask = [0] * MINUTES_PER_DAY
+        self.slots = []
+        self.dispatched = 0
+        self.skipped = 0
+
+    def _bit(self, name):
+        bit = self.bits.get(name)
+        if bit is None:
+            bit = 1 << len(self.names)
+            self.names.append(name)
+            self.bits[name] = bit
+        return bit
+
+    def add_window(self, name, start, end, include_start=True, include_end=True):
+        """Open window `name` from start to end (datetime.time, minute precision)"""
+        bit = self._bit(name)
+        first = minute_of_day(start) + (0 if include_start else 1)
+        last = minute_of_day(end) - (0 if include_end else 1)
+        for minute in range(first, last + 1):
+            self.mask[minute] |= bit
+
+    def add_slot(self, name, at):
+        """Single-minute window, also usable as a Schedule.On time slot"""
+        self.add_window(name, at, at)
+        self.slots.append((name, at))
+
+    def is_active(self, t):
+        """True if any window is open at t"""
+        return self.mask[minute_of_day(t)] != 0
+
+    def is_open(self, name, t):
+        return (self.mask[minute_of_day(t)] & self.bits[name]) != 0
+
+    def dispatch(self, t):
+        """Gate for bar callbacks: True inside any window, counts skips otherwise"""
+        if self.mask[minute_of_day(t)]:
+            self.dispatched += 1
+            return True
+        self.skipped += 1
+        return False
+
+    def intervals(self, name=None):
+        """Merged (start minute, end minute) intervals for one window or all"""
+        bit = self.bits[name] if name is not None else -1
+        result = []
+        start = None
+        for minute, value in enumerate(self.mask):
+            active = (value & bit) != 0
+            if active and start is None:
+                start = minute
+            elif not active and start is not None:
+                result.append((start, minute - 1))
+                start = None
+        if start is not None:
+            result.append((start, MINUTES_PER_DAY - 1))
+        return result
+
+    def schedule(self, algorithm, date_rule, callback, name=None):
+        """Register Schedule.On events for the slots (optionally one name only)"""
+        for slot_name, at in self.slots:
+            if name is None or slot_name == name:
+                algorithm.Schedule.On(date_rule, algorithm.TimeRules.At(at.hour, at.minute), callback)
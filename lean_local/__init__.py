@@ -0,0 +1,10 @@
+"""Offline replay of the strategies in this repository against local data.
+
+Implements the subset of the LEAN API the strategies use (see ``shim/AlgorithmImports.py``)
+and replays minute/hour/daily bars and option chain snapshots from the layout described in
+``datasource``. Run ``python -m lean_local <strategy dir> --data <root>``.
+"""
+from .datasource import CsvDataSource
+from .engine import Engine, DataFeed, BacktestResult
+from .multi import StrategyHost
+from .loader import load_algorithm, install_paths
@@ -0,0 +1,42 @@
+"""python -m lean_local "<strategy dir>" --data DIR [--param name=value ...]"""
+import argparse
+import cProfile
+import pstats
+from datetime import datetime
+
+from .engine import Engine
+from .loader import load_algorithm
+
+
+def parse_date(text):
+    return datetime.strptime(text, "%Y-%m-%d")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m lean_local", description=__doc__)
+    parser.add_argument("strategy", help="strategy directory or main.py")
+    parser.add_argument("--data", required=True, help="data root (see lean_local.datasource)")
+    parser.add_argument("--param", action="append", default=[], metavar="NAME=VALUE",
+                        help="algorithm parameter, readable with GetParameter")
+    parser.add_argument("--start", type=parse_date, help="override start date (YYYY-MM-DD)")
+    parser.add_argument("--end", type=parse_date, help="override end date (YYYY-MM-DD)")
+    parser.add_argument("--cash", type=float, help="override the starting cash of SetCash")
+    parser.add_argument("--object-store", help="ObjectStore directory")
+    parser.add_argument("--quiet", action="store_true", help="do not echo Debug/Log output")
+    parser.add_argument("--profile", action="store_true", help="print the top cProfile entries")
+    args = parser.parse_args(argv)
+
+    parameters = dict(p.split("=", 1) for p in args.param)
+    engine = Engine(load_algorithm(args.strategy), args.data, parameters, object_store=args.object_store,
+                    start=args.start, end=args.end, quiet=args.quiet, cash=args.cash)
+    if args.profile:
+        profiler = cProfile.Profile()
+        result = profiler.runcall(engine.run)
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(25)
+    else:
+        result = engine.run()
+    print(result.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,379 @@
+"""QCAlgorithm stand-in: the subset of the LEAN API used in this repository."""
+from datetime import datetime, timedelta
+
+from .enums import Resolution, SecurityType, OrderType, BrokerageName, AccountType, Market
+from .indicators import SimpleMovingAverage, ExponentialMovingAverage, TradeBarConsolidator
+from .object_store import ObjectStore
+from .scheduling import ScheduleManager, DateRules, TimeRules
+from .securities import (Security, SecurityHolding, SecurityManager, SecurityPortfolioManager, Option,
+                         BrokerageModel, BrokerageModelSecurityInitializer)
+from .symbols import Symbol, OPTION_TYPES
+from .transactions import SecurityTransactionManager
+
+# Fraction of portfolio value kept free when sizing SetHoldings targets
+FREE_PORTFOLIO_VALUE_PERCENTAGE = 0.0025
+
+RESOLUTION_PERIODS = {Resolution.Minute: timedelta(minutes=1), Resolution.Hour: timedelta(hours=1),
+                      Resolution.Daily: timedelta(days=1)}
+
+
+class Subscription:
+    """One data stream requested by an algorithm"""
+    __slots__ = ("symbol", "resolution", "option")
+
+    def __init__(self, symbol, resolution, option=None):
+        self.symbol = symbol
+        self.resolution = resolution
+        self.option = option  # Option for chain subscriptions
+
+    @property
+    def key(self):
+        if self.option is not None:
+            return (self.symbol, self.resolution, self.option.filter.key())
+        return (self.symbol, self.resolution)
+
+
+class SubscriptionManager:
+    def __init__(self, algorithm):
+        self.algorithm = algorithm
+        self.consolidators = {}  # subscription key -> [consolidator]
+
+    def AddConsolidator(self, symbol, consolidator):
+        """Attach to the symbol's first subscription, as LEAN does; only its bars are consolidated"""
+        for subscription in self.algorithm._subscriptions:
+            if subscription.symbol == symbol and subscription.option is None:
+                self.consolidators.setdefault(subscription.key, []).append(consolidator)
+                return
+        raise ValueError("No subscription found for %s" % symbol)
+
+    def RemoveConsolidator(self, symbol, consolidator):
+        for key, consolidators in self.consolidators.items():
+            if key[0] == symbol and consolidator in consolidators:
+                consolidators.remove(consolidator)
+                return
+
+
+class QCAlgorithm:
+    def __init__(self):
+        self._time = datetime(1998, 1, 1)
+        self._start = datetime(1998, 1, 1)
+        self._end = datetime.now()
+        self._warmup = None
+        self._pinned_start = None   # engine overrides of the backtest range (win over SetStartDate)
+        self._pinned_end = None
+        self._pinned_cash = None    # engine override of the starting cash (capital sleeves)
+        self._slice = None
+        self._runtime = None        # set by the engine
+        self._parameters = {}
+        self._subscriptions = []
+        self._indicator_handlers = {}  # symbol -> [callable(bar)]
+        self._initializer = None
+        self._brokerage = BrokerageModel(BrokerageName.Default, AccountType.Margin)
+        self._plots = {}
+        self.Securities = SecurityManager()
+        self.Portfolio = SecurityPortfolioManager(self.Securities)
+        self.Portfolio.SetCash(100000)
+        self.Transactions = SecurityTransactionManager(self)
+        self.Schedule = ScheduleManager()
+        self.DateRules = DateRules
+        self.TimeRules = TimeRules
+        self.SubscriptionManager = SubscriptionManager(self)
+        self.ObjectStore = ObjectStore()
+        self.LiveMode = False
+
+    # --- Event handlers (overridden by strategies) ----------------------
+
+    def Initialize(self):
+        pass
+
+    def OnData(self, data):
+        pass
+
+    def OnOrderEvent(self, order_event):
+        pass
+
+    def OnEndOfAlgorithm(self):
+        pass
+
+    def OnWarmupFinished(self):
+        pass
+
+    # --- Time and settings ----------------------------------------------
+
+    @property
+    def Time(self):
+        return self._time
+
+    @property
+    def UtcTime(self):
+        return self._time
+
+    @property
+    def StartDate(self):
+        return self._start
+
+    @property
+    def EndDate(self):
+        return self._end
+
+    @property
+    def IsWarmingUp(self):
+        return self._time < self._start
+
+    @property
+    def CurrentSlice(self):
+        return self._slice
+
+    @property
+    def BrokerageModel(self):
+        return self._brokerage
+
+    def SetStartDate(self, year, month=None, day=None):
+        start = year if isinstance(year, datetime) else datetime(year, month, day)
+        self._start = self._pinned_start or start
+
+    def SetEndDate(self, year, month=None, day=None):
+        end = year if isinstance(year, datetime) else datetime(year, month, day)
+        self._end = self._pinned_end or end.replace(hour=23, minute=59, second=59)
+
+    def SetCash(self, amount):
+        self.Portfolio.SetCash(self._pinned_cash if self._pinned_cash is not None else amount)
+
+    def SetWarmUp(self, period, resolution=None):
+        """timedelta, or a bar count at the given (or finest subscribed) resolution"""
+        if isinstance(period, timedelta):
+            self._warmup = period
+        else:
+            if resolution is None:
+                resolution = min((s.resolution for s in self._subscriptions), default=Resolution.Daily)
+            step = RESOLUTION_PERIODS.get(resolution, timedelta(days=1))
+            if resolution == Resolution.Daily:
+                step = timedelta(days=1.5)  # roughly one trading day per 1.5 calendar days
+            self._warmup = step * int(period)
+
+    def SetWarmup(self, period, resolution=None):
+        self.SetWarmUp(period, resolution)
+
+    def SetBrokerageModel(self, brokerage_name, account_type=AccountType.Margin):
+        self._brokerage = BrokerageModel(brokerage_name, account_type)
+
+    def SetSecurityInitializer(self, initializer):
+        self._initializer = initializer
+
+    def SetBenchmark(self, benchmark):
+        pass
+
+    def SetTimeZone(self, time_zone):
+        pass
+
+    def GetParameter(self, name, default_value=None):
+        value = self._parameters.get(name)
+        return value if value is not None else default_value
+
+    def GetLastKnownPrices(self, security):
+        return []
+
+    # --- Securities and subscriptions -----------------------------------
+
+    def _security(self, symbol, resolution=Resolution.Minute):
+        """Existing security for symbol, created on first use"""
+        security = self.Securities.get(symbol)
+        if security is None:
+            security = Security(symbol, resolution)
+            security.Holdings = SecurityHolding(security)
+            BrokerageModelSecurityInitializer(self._brokerage).Initialize(security)
+            initializer = self._initializer
+            if initializer is not None:
+                if hasattr(initializer, "Initialize"):
+                    initializer.Initialize(security)
+                else:
+                    initializer(security)
+            if symbol.SecurityType in OPTION_TYPES and self._slice is not None:
+                # Seed contracts picked from the current chain with its quote
+                contract = self._slice._contract_map().get(symbol)
+                if contract is not None:
+                    security.update_quote(contract.BidPrice, contract.AskPrice, contract.LastPrice)
+            self.Securities[symbol] = security
+        return security
+
+    def _subscribe(self, symbol, resolution, option=None):
+        subscription = Subscription(symbol, resolution, option)
+        for existing in self._subscriptions:
+            if existing.key == subscription.key:
+                return existing
+        self._subscriptions.append(subscription)
+        if self._runtime is not None:
+            self._runtime.subscription_added(self, subscription)
+        return subscription
+
+    def _add(self, ticker, security_type, resolution, market):
+        symbol = ticker if isinstance(ticker, Symbol) else Symbol.Create(ticker, security_type, market)
+        resolution = Resolution.Minute if resolution is None else resolution
+        security = self._security(symbol, resolution)
+        self._subscribe(symbol, resolution)
+        return security
+
+    def AddEquity(self, ticker, resolution=None, market=None, fillForward=True, leverage=None,
+                  extendedMarketHours=False, **kwargs):
+        return self._add(ticker, SecurityType.Equity, resolution, market or Market.USA)
+
+    def AddIndex(self, ticker, resolution=None, market=None, **kwargs):
+        return self._add(ticker, SecurityType.Index, resolution, market or Market.USA)
+
+    def AddForex(self, ticker, resolution=None, market=None, **kwargs):
+        return self._add(ticker, SecurityType.Forex, resolution, market or Market.Oanda)
+
+    def AddSecurity(self, symbol, resolution=None, **kwargs):
+        """AddSecurity(symbol, resolution): extra subscription for an existing symbol"""
+        return self._add(symbol, symbol.SecurityType, resolution, symbol.market)
+
+    def _add_option(self, underlying, underlying_type, option_type, target, resolution):
+        underlying_security = self._add(underlying, underlying_type, resolution, Market.USA)
+        canonical = Symbol.CreateCanonicalOption(underlying_security.Symbol, target, option_type)
+        option = Option(canonical, resolution or Resolution.Minute)
+        self._subscribe(canonical, option.Resolution, option)
+        return option
+
+    def AddIndexOption(self, underlying, target_option=None, resolution=None, **kwargs):
+        """AddIndexOption("SPX", resolution) or AddIndexOption("SPX", "SPXW", resolution)"""
+        if target_option is None or not isinstance(target_option, str):
+            resolution = target_option if resolution is None else resolution
+            target_option = underlying
+        return self._add_option(underlying, SecurityType.Index, SecurityType.IndexOption,
+                                target_option, resolution)
+
+    def AddOption(self, underlying, resolution=None, market=None, **kwargs):
+        return self._add_option(underlying, SecurityType.Equity, SecurityType.Option, underlying,
+                                resolution)
+
+    def RemoveSecurity(self, symbol):
+        """Drop every subscription for symbol (holdings are liquidated first)"""
+        if self.Portfolio.ContainsKey(symbol) and self.Portfolio[symbol].Invested:
+            self.Liquidate(symbol)
+        removed = [s for s in self._subscriptions if s.symbol == symbol]
+        self._subscriptions = [s for s in self._subscriptions if s.symbol != symbol]
+        if self._runtime is not None:
+            for subscription in removed:
+                self._runtime.subscription_removed(self, subscription)
+        return bool(removed)
+
+    # --- Indicators -----------------------------------------------------
+
+    def _subscription_resolution(self, symbol):
+        resolutions = [s.resolution for s in self._subscriptions if s.symbol == symbol]
+        return min(resolutions) if resolutions else None
+
+    def RegisterIndicator(self, symbol, indicator, resolution=None, selector=None):
+        """Feed indicator from symbol's bars, consolidating to `resolution` if coarser"""
+        select = selector or (lambda bar: bar.Close)
+        if isinstance(resolution, TradeBarConsolidator):
+            consolidator = resolution
+        else:
+            base = self._subscription_resolution(symbol)
+            if resolution is None or base is None or resolution <= base:
+                handler = lambda bar: indicator.Update(bar.EndTime, select(bar))
+                self._indicator_handlers.setdefault(symbol, []).append(handler)
+                return indicator
+            consolidator = TradeBarConsolidator(RESOLUTION_PERIODS[resolution])
+        consolidator.DataConsolidated += lambda sender, bar: indicator.Update(bar.EndTime, select(bar))
+        self.SubscriptionManager.AddConsolidator(symbol, consolidator)
+        return indicator
+
+    def SMA(self, symbol, period, resolution=None, selector=None):
+        indicator = SimpleMovingAverage("SMA(%s,%d)" % (symbol, period), period)
+        return self.RegisterIndicator(symbol, indicator, resolution, selector)
+
+    def EMA(self, symbol, period, resolution=None, smoothing_factor=None, selector=None):
+        indicator = ExponentialMovingAverage("EMA(%s,%d)" % (symbol, period), period, smoothing_factor)
+        return self.RegisterIndicator(symbol, indicator, resolution, selector)
+
+    # --- History --------------------------------------------------------
+
+    def History(self, symbols, start_or_periods, end_or_resolution=None, resolution=None):
+        """History(symbol, n, res), History(symbol, timedelta, res) or History(symbol, start, end, res)"""
+        if isinstance(start_or_periods, datetime):
+            start, end = start_or_periods, end_or_resolution
+            count = None
+        else:
+            start, end = None, self._time
+            resolution = end_or_resolution if resolution is None else resolution
+            count = None if isinstance(start_or_periods, timedelta) else int(start_or_periods)
+            if count is None:
+                start = self._time - start_or_periods
+        symbols = symbols if isinstance(symbols, (list, tuple)) else [symbols]
+        return self._runtime.history(self, symbols, resolution, start, end, count)
+
+    # --- Orders ---------------------------------------------------------
+
+    def MarketOrder(self, symbol, quantity, asynchronous=False, tag="", **kwargs):
+        return self.Transactions.submit(self._symbol(symbol), quantity, OrderType.Market, tag=tag)
+
+    def LimitOrder(self, symbol, quantity, limit_price, tag="", **kwargs):
+        return self.Transactions.submit(self._symbol(symbol), quantity, OrderType.Limit,
+                                        limit_price=limit_price, tag=tag)
+
+    def StopMarketOrder(self, symbol, quantity, stop_price, tag="", **kwargs):
+        return self.Transactions.submit(self._symbol(symbol), quantity, OrderType.StopMarket,
+                                        stop_price=stop_price, tag=tag)
+
+    def ComboMarketOrder(self, legs, quantity, asynchronous=False, tag="", **kwargs):
+        return self.Transactions.submit_combo(legs, quantity, OrderType.ComboMarket, tag=tag)
+
+    def ComboLimitOrder(self, legs, quantity, limit_price, tag="", **kwargs):
+        return self.Transactions.submit_combo(legs, quantity, OrderType.ComboLimit, limit_price=limit_price,
+                                              tag=tag)
+
+    def _symbol(self, symbol):
+        if isinstance(symbol, Symbol):
+            self._security(symbol)
+            return symbol
+        # Ticker string of an already added security
+        for existing in self.Securities.keys():
+            if existing.Value == str(symbol).upper():
+                return existing
+        raise KeyError(symbol)
+
+    def CalculateOrderQuantity(self, symbol, target):
+        """Quantity that moves the holding to `target` fraction of portfolio value"""
+        symbol = self._symbol(symbol)
+        security = self.Securities[symbol]
+        price = security.Price
+        if price <= 0:
+            return 0
+        value = self.Portfolio.TotalPortfolioValue * (1 - FREE_PORTFOLIO_VALUE_PERCENTAGE)
+        target_quantity = int(value * target / (price * security.multiplier))
+        return target_quantity - security.Holdings.Quantity
+
+    def SetHoldings(self, symbol, percentage, liquidateExistingHoldings=False, tag="", **kwargs):
+        if liquidateExistingHoldings:
+            for other in list(self.Portfolio.invested):
+                if other != symbol:
+                    self.Liquidate(other)
+        quantity = self.CalculateOrderQuantity(symbol, percentage)
+        if quantity != 0:
+            return self.MarketOrder(symbol, quantity, tag=tag)
+        return None
+
+    def Liquidate(self, symbol=None, tag="Liquidated", **kwargs):
+        symbols = [self._symbol(symbol)] if symbol is not None else list(self.Portfolio.invested)
+        tickets = []
+        for s in symbols:
+            self.Transactions.CancelOpenOrders(s)
+            quantity = self.Securities[s].Holdings.Quantity
+            if quantity != 0:
+                tickets.append(self.MarketOrder(s, -quantity, tag=tag))
+        return tickets
+
+    # --- Logging and charts ---------------------------------------------
+
+    def Debug(self, message):
+        self._runtime.log("DEBUG", self, message)
+
+    def Log(self, message):
+        self._runtime.log("LOG", self, message)
+
+    def Error(self, message):
+        self._runtime.log("ERROR", self, message)
+
+    def Plot(self, chart, series, value):
+        self._plots.setdefault((chart, series), []).append((self._time, float(value)))
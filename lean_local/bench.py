@@ -0,0 +1,280 @@
+"""Per-callback latency, allocation and throughput benchmarks for the strategies.
+
+    python -m lean_local.bench [scenario ...] [--chain-width N] [--positions N] [--days N]
+
+Each scenario runs a strategy on SyntheticDataSource data twice: once timing its hot
+handler with perf_counter_ns, once under tracemalloc. Results are appended to a JSONL file
+and compared with the last run of the same scenario and configuration.
+"""
+import argparse
+import json
+import os
+import subprocess
+import tempfile
+import tracemalloc
+from datetime import datetime, timedelta
+from time import perf_counter_ns
+
+import numpy as np
+
+from .engine import Engine
+from .enums import OptionRight
+from .loader import REPO_ROOT, load_algorithm
+from .scheduling import market_hours
+from .synthetic import SyntheticDataSource
+
+DEFAULT_RESULTS = "bench_results.jsonl"
+REGRESSION_THRESHOLD = 0.15
+
+
+def seed_spreads(algorithm, count):
+    """Keep `count` bull put spreads open in the 0DTE strategy's book"""
+    def top_up():
+        hours = market_hours(algorithm.spx_index, algorithm.Time.date())
+        if algorithm.IsWarmingUp or algorithm.CurrentSlice is None or hours is None \
+                or not hours[0] < algorithm.Time < hours[1]:
+            return
+        chain = algorithm.CurrentSlice.OptionChains.get(algorithm.option_symbol)
+        if not chain:
+            return
+        puts = sorted((c for c in chain if c.Right == OptionRight.Put), key=lambda c: c.Strike)
+        by_strike = {c.Strike: c for c in puts}
+        missing = count - algorithm.spread_book.open_count()
+        for short_put in reversed(puts):
+            if missing <= 0:
+                break
+            long_put = by_strike.get(short_put.Strike - algorithm.bp_spread)
+            if long_put is None or algorithm.Portfolio.ContainsKey(short_put.Symbol):
+                continue
+            algorithm.spread_book.open("BullPut", short_put.Symbol, long_put.Symbol, 1,
+                                       short_put.BidPrice, long_put.AskPrice)
+            algorithm.MarketOrder(short_put.Symbol, -1)
+            algorithm.MarketOrder(long_put.Symbol, 1)
+            missing -= 1
+
+    algorithm.Schedule.On(algorithm.DateRules.EveryDay(),
+                          algorithm.TimeRules.Every(timedelta(minutes=15)), top_up)
+
+
+class Scenario:
+    def __init__(self, directory, handlers, start, days, warmup_days=0, setup=None):
+        self.directory = directory
+        self.handlers = handlers
+        self.start = start
+        self.days = days
+        self.warmup_days = warmup_days  # synthetic history needed before `start`
+        self.setup = setup              # setup(algorithm, positions) after Initialize
+
+
+SCENARIOS = {
+    "0dte": Scenario("0DTE (Zero Days to Expiration) SPX Options", ("OnData",), datetime(2024, 3, 4), 5,
+                     warmup_days=40, setup=seed_spreads),
+    "ric": Scenario("0DTE SPX Reverse Iron Condor (Long StraddleStrangle)", ("TradeOptions",),
+                    datetime(2024, 3, 4), 5),
+    "qqq": Scenario("Leveraged long QQQ strategy", ("OnData",), datetime(2024, 1, 2), 60, warmup_days=10),
+    "eurusd": Scenario("EURUSD Forex Autoregressive Time Series Trading Strategy", ("TradeSignal",),
+                       datetime(2020, 1, 1), 365, warmup_days=120),
+    "uso": Scenario("USO Oil ETF Autoregressive Time Series Strategy", ("OnWeeklyBar",),
+                    datetime(2016, 1, 1), 1460),
+}
+
+
+class Recorder:
+    """Wraps handlers to collect per-call latency or tracemalloc deltas"""
+
+    def __init__(self, memory=False):
+        self.memory = memory
+        self.samples = {}
+
+    def wrap(self, name, function):
+        samples = self.samples.setdefault(name, [])
+        if self.memory:
+            def measured(*args, **kwargs):
+                before = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+                result = function(*args, **kwargs)
+                current, peak = tracemalloc.get_traced_memory()
+                samples.append((peak - before, current - before))
+                return result
+        else:
+            def measured(*args, **kwargs):
+                started = perf_counter_ns()
+                result = function(*args, **kwargs)
+                samples.append(perf_counter_ns() - started)
+                return result
+        measured.__name__ = function.__name__
+        return measured
+
+    def instrument(self, algorithm_class, handlers):
+        """Subclass whose handlers are measured (bound methods captured in Initialize included)"""
+        attributes = {name: self.wrap(name, getattr(algorithm_class, name)) for name in handlers}
+        return type(algorithm_class.__name__, (algorithm_class,), attributes)
+
+
+class BenchEngine(Engine):
+    def __init__(self, algorithm_class, source, start, end, setup=None, positions=0, object_store=None):
+        super().__init__(algorithm_class, source=source, start=start, end=end, quiet=True,
+                         object_store=object_store)
+        self.setup = setup
+        self.positions = positions
+
+    def create_algorithm(self):
+        algorithm = super().create_algorithm()
+        if self.setup is not None and self.positions:
+            self.setup(algorithm, self.positions)
+        return algorithm
+
+
+def run_scenario(name, chain_width=20, positions=0, days=None, memory=True):
+    """One benchmark record for a scenario"""
+    scenario = SCENARIOS[name]
+    start = scenario.start
+    end = start + timedelta(days=days or scenario.days)
+    algorithm_class = load_algorithm(os.path.join(REPO_ROOT, scenario.directory))
+
+    def run(recorder):
+        source = SyntheticDataSource(start - timedelta(days=scenario.warmup_days + 5), end,
+                                     chain_width=chain_width)
+        # Private ObjectStore: synthetic caches and snapshots never reach real runs, and every
+        # measured run starts from the same (empty) state
+        with tempfile.TemporaryDirectory(prefix="lean_local_bench_") as object_store:
+            engine = BenchEngine(recorder.instrument(algorithm_class, scenario.handlers), source, start, end,
+                                 scenario.setup, positions, object_store)
+            return engine.run()
+
+    timing = Recorder()
+    result = run(timing)
+    record = {
+        "time": datetime.now().isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "scenario": name,
+        "config": {"chain_width": chain_width, "positions": positions, "days": days or scenario.days},
+        "data_points": result.data_points,
+        "slices": result.slices,
+        "elapsed_s": round(result.elapsed, 4),
+        "bars_per_s": round(result.data_points / result.elapsed, 1) if result.elapsed else None,
+        "handlers": {},
+    }
+    for handler, samples in timing.samples.items():
+        ns = np.array(samples, dtype=np.float64)
+        record["handlers"][handler] = {
+            "calls": len(ns),
+            "p50_us": round(float(np.percentile(ns, 50)) / 1e3, 2) if len(ns) else None,
+            "p99_us": round(float(np.percentile(ns, 99)) / 1e3, 2) if len(ns) else None,
+            "mean_us": round(float(ns.mean()) / 1e3, 2) if len(ns) else None,
+        }
+
+    if memory:
+        allocations = Recorder(memory=True)
+        tracemalloc.start()
+        try:
+            run(allocations)
+        finally:
+            tracemalloc.stop()
+        for handler, samples in allocations.samples.items():
+            stats = record["handlers"].setdefault(handler, {})
+            if samples:
+                peak, retained = np.array(samples, dtype=np.float64).T
+                stats["alloc_peak_p50_b"] = float(np.percentile(peak, 50))
+                stats["alloc_peak_p99_b"] = float(np.percentile(peak, 99))
+                stats["retained_mean_b"] = round(float(retained.mean()), 1)
+        record["alloc_peak_per_bar_b"] = round(sum(
+            float(np.sum(np.array(s, dtype=np.float64)[:, 0])) for s in allocations.samples.values() if s)
+            / max(result.data_points, 1), 1)
+    return record
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True,
+                              text=True, timeout=30).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def load_results(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def previous_record(records, record):
+    for old in reversed(records):
+        if old["scenario"] == record["scenario"] and old["config"] == record["config"]:
+            return old
+    return None
+
+
+def compare(old, new, threshold=REGRESSION_THRESHOLD):
+    """Lines describing metric changes; regressions beyond `threshold` are flagged"""
+    lines = []
+
+    def check(label, before, after, higher_is_better=False):
+        if not before or after is None:
+            return
+        change = (after - before) / before
+        worse = -change if higher_is_better else change
+        flag = "  REGRESSION" if worse > threshold else ""
+        lines.append("  %-28s %12.2f -> %12.2f  (%+.1f%%)%s" % (label, before, after, change * 100, flag))
+
+    check("bars/s", old.get("bars_per_s"), new.get("bars_per_s"), higher_is_better=True)
+    for handler, stats in new["handlers"].items():
+        before = old["handlers"].get(handler, {})
+        for metric in ("p50_us", "p99_us", "alloc_peak_p50_b"):
+            check("%s %s" % (handler, metric), before.get(metric), stats.get(metric))
+    return lines
+
+
+def format_record(record):
+    lines = ["%s  %s  %d bars in %.2fs  (%s bars/s)" % (record["scenario"], record["config"],
+                                                      record["data_points"], record["elapsed_s"],
+                                                      record["bars_per_s"])]
+    for handler, stats in record["handlers"].items():
+        line = "  %-14s calls=%-6s" % (handler, stats.get("calls"))
+        if stats.get("p50_us") is not None:  # absent when the handler never ran
+            line += " p50=%sus p99=%sus" % (stats["p50_us"], stats.get("p99_us"))
+        if stats.get("alloc_peak_p50_b") is not None:  # absent with --no-memory
+            line += " alloc_peak_p50=%sB retained=%sB" % (stats["alloc_peak_p50_b"], stats.get("retained_mean_b"))
+        lines.append(line.rstrip())
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m lean_local.bench", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("scenarios", nargs="*", metavar="scenario",
+                        help="any of %s (default: all)" % ", ".join(sorted(SCENARIOS)))
+    parser.add_argument("--chain-width", type=int, default=20, help="strikes either side of ATM")
+    parser.add_argument("--positions", type=int, default=0, help="open spreads kept in the 0DTE book")
+    parser.add_argument("--days", type=int, help="override each scenario's length in days")
+    parser.add_argument("--results", default=DEFAULT_RESULTS, help="JSONL results file")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="relative change reported as a regression")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--no-save", action="store_true", help="do not append to the results file")
+    args = parser.parse_args(argv)
+
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error("unknown scenario(s): %s" % ", ".join(sorted(unknown)))
+
+    history = load_results(args.results)
+    regressions = 0
+    for name in args.scenarios or sorted(SCENARIOS):
+        record = run_scenario(name, args.chain_width, args.positions, args.days, memory=not args.no_memory)
+        print(format_record(record))
+        old = previous_record(history, record)
+        if old is not None:
+            print("  vs %s (%s):" % (old.get("revision"), old["time"]))
+            lines = compare(old, record, args.threshold)
+            regressions += sum(1 for line in lines if line.endswith("REGRESSION"))
+            print("\n".join(lines))
+        if not args.no_save:
+            with open(args.results, "a") as f:
+                f.write(json.dumps(record) + "\n")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,178 @@
+"""Columnar, memory-mapped option chain history.
+
+One directory per option target (``<data root>/option/<target>/store``) holding:
+
+    meta.json        column names/dtypes and the row count
+    <column>.bin     raw little-endian column values, rows sorted by (day, time)
+    index.npz        days (datetime64[D]) and offsets (int64, len(days) + 1)
+
+Days are contiguous row ranges (the partitions) found through the index, so reading a day
+or a single snapshot slices the memory-mapped columns without copying. Build a store from
+CSV chain files with ``python -m lean_local.chain_store build --data DIR --target spxw``.
+"""
+import argparse
+import json
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+
+BASE_COLUMNS = (("time", "datetime64[s]"), ("expiry", "datetime64[D]"), ("right", "int8"),
+                ("strike", "float64"), ("bid", "float64"), ("ask", "float64"), ("last", "float64"),
+                ("open_interest", "float64"))
+GREEK_COLUMNS = ("delta", "gamma", "theta", "vega", "implied_volatility")
+STORE_DIR = "store"
+
+
+class ChainStore:
+    """Append-by-day writer and zero-copy reader for one option target"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        self.columns = [(name, np.dtype(dtype)) for name, dtype in meta["columns"]]
+        self.rows = meta["rows"]
+        index = np.load(os.path.join(path, "index.npz"))
+        self.days = index["days"]
+        self.offsets = index["offsets"]
+        self._maps = None
+
+    @classmethod
+    def create(cls, path, greeks=()):
+        """Empty store; `greeks` names the optional greek columns to keep"""
+        os.makedirs(path, exist_ok=True)
+        columns = list(BASE_COLUMNS) + [(name, "float64") for name in GREEK_COLUMNS if name in greeks]
+        for name, _ in columns:
+            open(os.path.join(path, name + ".bin"), "wb").close()
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump({"columns": columns, "rows": 0}, f)
+        np.savez(os.path.join(path, "index.npz"), days=np.array([], dtype="datetime64[D]"),
+                 offsets=np.zeros(1, dtype=np.int64))
+        return cls(path)
+
+    @classmethod
+    def open(cls, path):
+        """Existing store at `path`, or None"""
+        return cls(path) if os.path.exists(os.path.join(path, "meta.json")) else None
+
+    @property
+    def greek_names(self):
+        return [name for name, _ in self.columns if name in GREEK_COLUMNS]
+
+    def _column_maps(self):
+        if self._maps is None:
+            self._maps = {}
+            for name, dtype in self.columns:
+                if self.rows:
+                    self._maps[name] = np.memmap(os.path.join(self.path, name + ".bin"), dtype=dtype,
+                                                 mode="r", shape=(self.rows,))
+                else:
+                    self._maps[name] = np.zeros(0, dtype=dtype)
+        return self._maps
+
+    def append(self, day, columns):
+        """Add one day; `columns` maps column name -> array, rows sorted by time"""
+        day = np.datetime64(day, "D")
+        if len(self.days) and day <= self.days[-1]:
+            raise ValueError("days must be appended in order: %s after %s" % (day, self.days[-1]))
+        count = len(columns["time"])
+        for name, dtype in self.columns:
+            values = columns.get(name)
+            if values is None:
+                values = np.zeros(count, dtype=dtype)
+            with open(os.path.join(self.path, name + ".bin"), "ab") as f:
+                f.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+        self.rows += count
+        self.days = np.append(self.days, day)
+        self.offsets = np.append(self.offsets, self.rows)
+        np.savez(os.path.join(self.path, "index.npz"), days=self.days, offsets=self.offsets)
+        with open(os.path.join(self.path, "meta.json"), "w") as f:
+            json.dump({"columns": [(name, dtype.str) for name, dtype in self.columns], "rows": self.rows}, f)
+        self._maps = None
+
+    def day_range(self, day):
+        """[i, j) rows of `day`, or None when the day is not stored"""
+        day = np.datetime64(day, "D")
+        k = int(np.searchsorted(self.days, day))
+        if k == len(self.days) or self.days[k] != day:
+            return None
+        return int(self.offsets[k]), int(self.offsets[k + 1])
+
+    def day_columns(self, day):
+        """Column views (no copies) for one day, or None"""
+        bounds = self.day_range(day)
+        if bounds is None:
+            return None
+        i, j = bounds
+        return {name: column[i:j] for name, column in self._column_maps().items()}
+
+    def snapshot(self, time):
+        """Column views for the single snapshot ending at `time`, or None"""
+        columns = self.day_columns(time.date())
+        if columns is None:
+            return None
+        times = columns["time"]
+        t = np.datetime64(time, "s")
+        i = int(np.searchsorted(times, t, side="left"))
+        j = int(np.searchsorted(times, t, side="right"))
+        if i == j:
+            return None
+        return {name: column[i:j] for name, column in columns.items()}
+
+
+def build(source, target, start, end, path=None):
+    """Append every chain day of `source` in [start, end] to the target's store"""
+    path = path or os.path.join(source.root, "option", target.lower(), STORE_DIR)
+    store = ChainStore.open(path)
+    source.chain_stores[target] = None  # read the source's own files, not the store being built
+    day = start
+    while day <= end:
+        chain_day = source.load_chain_day(target, day)
+        if chain_day is not None and len(chain_day.times):
+            if store is None:
+                store = ChainStore.create(path, greeks=tuple(chain_day.greeks or ()))
+            if not len(store.days) or np.datetime64(day, "D") > store.days[-1]:
+                columns = {"time": chain_day.times, "expiry": chain_day.expiry, "right": chain_day.right,
+                           "strike": chain_day.strike, "bid": chain_day.bid, "ask": chain_day.ask,
+                           "last": chain_day.last, "open_interest": chain_day.open_interest}
+                columns.update(chain_day.greeks or {})
+                store.append(day, columns)
+        day += timedelta(days=1)
+    return store
+
+
+def main(argv=None):
+    from .__main__ import parse_date
+    from .datasource import CsvDataSource
+
+    parser = argparse.ArgumentParser(prog="python -m lean_local.chain_store", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=("build", "info"))
+    parser.add_argument("--data", required=True, help="data root holding option/<target>/*.csv")
+    parser.add_argument("--target", required=True, help="option target, e.g. spxw")
+    parser.add_argument("--start", type=parse_date, help="first day to convert (default: first CSV)")
+    parser.add_argument("--end", type=parse_date, help="last day to convert (default: last CSV)")
+    args = parser.parse_args(argv)
+
+    path = os.path.join(args.data, "option", args.target.lower(), STORE_DIR)
+    if args.command == "build":
+        source = CsvDataSource(args.data)
+        names = sorted(f[:-4] for f in os.listdir(os.path.dirname(path)) if f.endswith(".csv"))
+        if not names:
+            parser.error("no chain CSV files under %s" % os.path.dirname(path))
+        start = args.start or datetime.strptime(names[0], "%Y%m%d")
+        end = args.end or datetime.strptime(names[-1], "%Y%m%d")
+        build(source, args.target, start.date(), end.date(), path)
+    store = ChainStore.open(path)
+    if store is None:
+        parser.error("no store at %s" % path)
+    size = sum(os.path.getsize(os.path.join(path, name + ".bin")) for name, _ in store.columns)
+    print("%s: %d days (%s .. %s), %d rows, %.1f MB, columns: %s" % (
+        path, len(store.days), store.days[0] if len(store.days) else "-",
+        store.days[-1] if len(store.days) else "-", store.rows, size / 1e6,
+        ", ".join(name for name, _ in store.columns)))
+
+
+if __name__ == "__main__":
+    main()
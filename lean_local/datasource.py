@@ -0,0 +1,218 @@
+"""Local data files: bars per symbol/resolution and option chains per day.
+
+Layout under the data root (times are bar end times, exchange time zone):
+
+    equity/<minute|hour|daily>/<ticker>.csv   time,open,high,low,close,volume
+    index/<minute|hour|daily>/<ticker>.csv    time,open,high,low,close[,volume]
+    forex/<minute|hour|daily>/<ticker>.csv    time,open,high,low,close
+    option/<target>/<YYYYMMDD>.csv            time,expiry,right,strike,bid,ask,last,open_interest
+                                              [,delta,gamma,theta,vega,implied_volatility]
+    option/<target>/store/                    the same chains as memory-mapped columns (chain_store);
+                                              used instead of the CSV files when present
+
+Daily files hold one row per date; the bar is taken to end at the session close. When a
+resolution has no file, its bars are aggregated from the next finer resolution that has one
+(hour bars end on the hour, so the first equity bar of a session covers 9:30-10:00).
+"""
+import os
+import zlib
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from .enums import Resolution, SecurityType
+
+RESOLUTION_DIRS = {Resolution.Minute: "minute", Resolution.Hour: "hour", Resolution.Daily: "daily"}
+RESOLUTION_PERIODS = {Resolution.Minute: timedelta(minutes=1), Resolution.Hour: timedelta(hours=1),
+                      Resolution.Daily: timedelta(days=1)}
+TYPE_DIRS = {SecurityType.Equity: "equity", SecurityType.Index: "index", SecurityType.Forex: "forex",
+             SecurityType.Cfd: "cfd", SecurityType.Crypto: "crypto"}
+UNIX_EPOCH = datetime(1970, 1, 1)
+GREEK_COLUMNS = ("delta", "gamma", "theta", "vega", "implied_volatility")
+
+
+class BarSeries:
+    """Column arrays for one symbol at one resolution, sorted by end time"""
+
+    def __init__(self, symbol, resolution, end_times, open_, high, low, close, volume):
+        self.symbol = symbol
+        self.resolution = resolution
+        self.end64 = end_times.astype("datetime64[s]")
+        self.ends = list(pd.DatetimeIndex(self.end64).to_pydatetime())
+        period = RESOLUTION_PERIODS[resolution]
+        if resolution == Resolution.Daily:
+            if symbol.SecurityType in (SecurityType.Forex, SecurityType.Crypto, SecurityType.Cfd):
+                self.starts = [e - period for e in self.ends]
+            else:
+                self.starts = [e.replace(hour=9, minute=30) for e in self.ends]
+        else:
+            self.starts = [e - period for e in self.ends]
+        self.open = open_
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+
+    def __len__(self):
+        return len(self.ends)
+
+    def index_range(self, start, end):
+        """[i, j) of bars with start < end_time <= end"""
+        i = int(np.searchsorted(self.end64, np.datetime64(start, "s"), side="right"))
+        j = int(np.searchsorted(self.end64, np.datetime64(end, "s"), side="right"))
+        return i, j
+
+    def frame(self, i, j):
+        """pandas history frame for bars [i, j), LEAN (symbol, time) MultiIndex"""
+        index = pd.MultiIndex.from_arrays([[str(self.symbol)] * (j - i), self.ends[i:j]],
+                                          names=["symbol", "time"])
+        return pd.DataFrame({"open": self.open[i:j], "high": self.high[i:j], "low": self.low[i:j],
+                             "close": self.close[i:j], "volume": self.volume[i:j]}, index=index)
+
+
+class ChainDay:
+    """One day of option quotes, sorted by time, as column arrays"""
+
+    def __init__(self, times, expiry, right, strike, bid, ask, last, open_interest, greeks=None):
+        self.times = times          # datetime64[s] per row
+        self.expiry = expiry        # datetime64[D] per row
+        self.right = right          # int8 per row (OptionRight values)
+        self.strike = strike
+        self.bid = bid
+        self.ask = ask
+        self.last = last
+        self.open_interest = open_interest
+        self.greeks = greeks        # dict column -> array, or None
+        # Row boundaries of each distinct time
+        change = np.flatnonzero(times[1:] != times[:-1]) + 1
+        self.bounds = np.concatenate(([0], change, [len(times)])) if len(times) else np.zeros(1, np.int64)
+
+    def snapshots(self):
+        """(end time as datetime, row start, row end) per distinct time"""
+        for k in range(len(self.bounds) - 1):
+            i = int(self.bounds[k])
+            j = int(self.bounds[k + 1])
+            yield UNIX_EPOCH + timedelta(seconds=int(self.times[i].astype(np.int64))), i, j
+
+
+class CsvDataSource:
+    """Reads the directory layout described in the module docstring"""
+
+    def __init__(self, root):
+        self.root = root
+        self.series_cache = {}
+        self.chain_cache = {}  # (target, day) -> ChainDay, filled by preload_chains
+        self.chain_stores = {}  # target -> ChainStore or None
+
+    @property
+    def cache_id(self):
+        """Names the data for ObjectStore caches built from it (see Engine)"""
+        return "csv-%08x" % zlib.crc32(os.path.abspath(self.root).encode())
+
+    def bar_path(self, symbol, resolution):
+        return os.path.join(self.root, TYPE_DIRS[symbol.SecurityType], RESOLUTION_DIRS[resolution],
+                            symbol.Value.lower() + ".csv")
+
+    def has_bars(self, symbol, resolution):
+        return os.path.exists(self.bar_path(symbol, resolution))
+
+    def bars(self, symbol, resolution):
+        """BarSeries for symbol/resolution, or None when there is no data"""
+        key = (symbol, resolution)
+        if key in self.series_cache:
+            return self.series_cache[key]
+        series = self.load_bars(symbol, resolution)
+        if series is None:
+            series = self._aggregate(symbol, resolution)
+        self.series_cache[key] = series
+        return series
+
+    def load_bars(self, symbol, resolution):
+        """BarSeries read from the symbol's file, or None"""
+        path = self.bar_path(symbol, resolution)
+        if not os.path.exists(path):
+            return None
+        df = pd.read_csv(path)
+        times = pd.to_datetime(df["time"]).values
+        if resolution == Resolution.Daily:
+            close_offset = (np.timedelta64(24, "h") if symbol.SecurityType == SecurityType.Forex
+                            else np.timedelta64(16, "h"))
+            times = times.astype("datetime64[D]") + close_offset
+        volume = df["volume"].values.astype(np.float64) if "volume" in df else np.zeros(len(df))
+        return BarSeries(symbol, resolution, times, df["open"].values.astype(np.float64),
+                         df["high"].values.astype(np.float64), df["low"].values.astype(np.float64),
+                         df["close"].values.astype(np.float64), volume)
+
+    def _aggregate(self, symbol, resolution):
+        """Coarser bars built from the next finer resolution, or None"""
+        finer = {Resolution.Hour: Resolution.Minute, Resolution.Daily: Resolution.Hour}.get(resolution)
+        base = self.bars(symbol, finer) if finer is not None else None
+        if base is None or not len(base):
+            return None
+        if resolution == Resolution.Hour:
+            # Ceil bar end times to the hour
+            ends = base.end64 + np.timedelta64(3599, "s")
+            ends = ends.astype("datetime64[h]").astype("datetime64[s]")
+        else:
+            close_offset = (np.timedelta64(24, "h") if symbol.SecurityType == SecurityType.Forex
+                            else np.timedelta64(16, "h"))
+            ends = (base.end64 - np.timedelta64(1, "s")).astype("datetime64[D]") + close_offset
+        first = np.concatenate(([0], np.flatnonzero(ends[1:] != ends[:-1]) + 1))
+        last = np.concatenate((first[1:], [len(ends)])) - 1
+        return BarSeries(symbol, resolution, ends[first], base.open[first],
+                         np.maximum.reduceat(base.high, first), np.minimum.reduceat(base.low, first),
+                         base.close[last], np.add.reduceat(base.volume, first))
+
+    def chain_path(self, target, day):
+        return os.path.join(self.root, "option", target.lower(), day.strftime("%Y%m%d") + ".csv")
+
+    def preload_chains(self, target, start, end):
+        """Keep every chain day in [start, end] in memory (e.g. before forking sweep workers)"""
+        day = start
+        while day <= end:
+            self.chain_cache[(target, day)] = self.load_chain_day(target, day)
+            day += timedelta(days=1)
+
+    def chain_day(self, target, day):
+        """ChainDay for one trading day, or None"""
+        key = (target, day)
+        if key in self.chain_cache:
+            return self.chain_cache[key]
+        return self.load_chain_day(target, day)
+
+    def chain_store(self, target):
+        """Memory-mapped ChainStore for target, or None"""
+        if target not in self.chain_stores:
+            from .chain_store import ChainStore, STORE_DIR  # keeps `python -m lean_local.chain_store` clean
+            store = None
+            if self.root is not None:
+                store = ChainStore.open(os.path.join(self.root, "option", target.lower(), STORE_DIR))
+            self.chain_stores[target] = store
+        return self.chain_stores[target]
+
+    def load_chain_day(self, target, day):
+        store = self.chain_store(target)
+        if store is not None:
+            columns = store.day_columns(day)
+            if columns is None:
+                return None
+            greeks = {name: columns[name] for name in store.greek_names}
+            return ChainDay(columns["time"], columns["expiry"], columns["right"], columns["strike"],
+                            columns["bid"], columns["ask"], columns["last"], columns["open_interest"],
+                            greeks or None)
+        path = self.chain_path(target, day)
+        if not os.path.exists(path):
+            return None
+        df = pd.read_csv(path)
+        df = df.sort_values("time", kind="stable")
+        right = np.where(df["right"].astype(str).str.upper().str.startswith("C"), 0, 1).astype(np.int8)
+        greeks = {c: df[c].values.astype(np.float64) for c in GREEK_COLUMNS if c in df}
+        return ChainDay(pd.to_datetime(df["time"]).values.astype("datetime64[s]"),
+                        pd.to_datetime(df["expiry"]).values.astype("datetime64[D]"),
+                        right, df["strike"].values.astype(np.float64),
+                        df["bid"].values.astype(np.float64), df["ask"].values.astype(np.float64),
+                        df["last"].values.astype(np.float64) if "last" in df else np.zeros(len(df)),
+                        df["open_interest"].values.astype(np.float64) if "open_interest" in df
+                        else np.zeros(len(df)),
+                        greeks or None)
@@ -0,0 +1,254 @@
+"""One-pass grid backtest of the QQQ EMA-crossover / short SQQQ strategy.
+
+    python -m lean_local.ema_grid "Leveraged long QQQ strategy" --data DIR \\
+        --fast 5:21 --slow 30:120:5 --stop 0.02:0.10:0.01 [--start --end] [--verify N] [--results FILE]
+
+Every (fast, slow, trailing stop) combination is simulated together. The EMA of each
+distinct period is computed once over the QQQ hourly closes, with the strategy's own
+common.indicators.EMA. A single walk over the bars then advances the state of all
+combinations as NumPy arrays. The simulation follows
+QQQ_Hourly_MACD_ShortSQQQ.OnData and the local engine's fills bar for bar:
+- EMAs are updated by every QQQ bar, warm-up included.
+- Nothing happens while warming up, before both EMAs are ready, or when the QQQ or SQQQ
+  bar is missing. prev_fast/prev_slow are only stored after those checks.
+- A fast-over-slow cross with MACD > 0 shorts SQQQ for -100% of portfolio value at the
+  bar's close.
+- The trailing draw-up stop, or a cross down while MACD > 0, covers the short.
+- The short is liquidated at the end, with IB equity fees on every fill.
+
+--verify N reruns N sampled combinations through the event-driven engine and reports
+the largest difference in final value and trade count. The grid checks the trailing stop
+on hourly closes, so the reruns use minute_stops=0 (no minute stop monitor).
+"""
+import argparse
+import csv
+import random
+from time import perf_counter
+
+import numpy as np
+
+from .__main__ import parse_date
+from .algorithm import FREE_PORTFOLIO_VALUE_PERCENTAGE
+from .datasource import CsvDataSource
+from .engine import Engine
+from .enums import Resolution
+from .loader import load_algorithm
+
+
+def parse_range(text, cast=int):
+    """'8,13,21' or inclusive 'start:stop[:step]'"""
+    if ":" not in text:
+        return [cast(v) for v in text.split(",")]
+    parts = [float(v) for v in text.split(":")]
+    start, stop, step = parts[0], parts[1], parts[2] if len(parts) > 2 else 1
+    count = int(np.floor((stop - start) / step + 1e-9)) + 1
+    return [cast(round(start + i * step, 10)) for i in range(count)]
+
+
+def ib_equity_fee(quantity, price):
+    """InteractiveBrokersFeeModel for equities: $0.005/share, $1 minimum, capped at 1% of value"""
+    quantity = np.abs(quantity)
+    return np.minimum(np.maximum(1.0, 0.005 * quantity), 0.01 * quantity * price)
+
+
+def ema_matrix(values, periods):
+    """(bars x periods) EMAs from the strategy's own streaming EMA, so values match OnData exactly"""
+    from common.indicators import EMA  # importable once load_algorithm has set up the strategy's paths
+    out = np.empty((len(values), len(periods)))
+    for j, period in enumerate(periods):
+        out[:, j] = EMA(int(period)).update_many(values)
+    return out
+
+
+class GridData:
+    """QQQ and SQQQ hourly bars aligned on the engine's slice times"""
+
+    def __init__(self, algorithm, source):
+        qqq = source.bars(algorithm.qqq, Resolution.Hour)
+        sqqq = source.bars(algorithm.sqqq, Resolution.Hour)
+        first = np.datetime64(algorithm.Time, "s")  # warm-up start
+        last = np.datetime64(algorithm.EndDate, "s")
+
+        def window(series):
+            mask = (series.end64 > first) & (series.end64 <= last)
+            return series.end64[mask], series.close[mask]
+
+        q_times, q_close = window(qqq)
+        s_times, s_close = window(sqqq)
+        self.times = np.union1d(q_times, s_times)
+        self.has_qqq = np.isin(self.times, q_times)
+        self.has_sqqq = np.isin(self.times, s_times)
+        self.qqq_close = q_close
+        # Index of each slice's QQQ bar in q_close (the EMAs' sample count is that index + 1)
+        self.qqq_index = np.searchsorted(q_times, self.times, side="right") - 1
+        self.sqqq_close = np.full(len(self.times), np.nan)
+        self.sqqq_close[self.has_sqqq] = s_close
+        # Last known SQQQ price, used for the final liquidation
+        self.last_sqqq = s_close[-1] if len(s_close) else np.nan
+        self.warm = self.times >= np.datetime64(algorithm.StartDate, "s")
+
+
+def simulate(data, fast, slow, stop, cash=100000.0):
+    """Simulate every combination (parallel arrays fast/slow/stop); returns a dict of result arrays"""
+    fast = np.asarray(fast)
+    slow = np.asarray(slow)
+    stop = np.asarray(stop, dtype=np.float64)
+    n = len(fast)
+    periods, index = np.unique(np.concatenate((fast, slow)), return_inverse=True)
+    fast_col, slow_col = index[:n], index[n:]
+    emas = ema_matrix(data.qqq_close, periods)
+    needed = np.maximum(fast, slow)
+
+    cash = np.full(n, float(cash))
+    quantity = np.zeros(n)
+    in_position = np.zeros(n, dtype=bool)
+    trail_min = np.zeros(n)
+    prev_fast = np.zeros(n)
+    prev_slow = np.zeros(n)
+    has_prev = np.zeros(n, dtype=bool)
+    trades = np.zeros(n, dtype=np.int64)
+    fees = np.zeros(n)
+    peak = cash.copy()
+    max_drawdown = np.zeros(n)
+
+    active = np.flatnonzero(data.warm & data.has_qqq & data.has_sqqq)
+    for t in active:
+        i = data.qqq_index[t]
+        ready = needed <= i + 1
+        if not ready.any():
+            continue
+        price = data.sqqq_close[t]
+        row = emas[i]
+        fast_val = row[fast_col]
+        slow_val = row[slow_col]
+        macd = fast_val - slow_val
+        cross_up = ready & has_prev & (prev_fast <= prev_slow) & (fast_val > slow_val)
+        cross_down = ready & has_prev & (prev_fast >= prev_slow) & (fast_val < slow_val)
+
+        # Entries: flat and a bullish cross
+        entry = ready & ~in_position & cross_up & (macd > 0)
+        if entry.any():
+            value = cash[entry] * (1 - FREE_PORTFOLIO_VALUE_PERCENTAGE)
+            qty = np.trunc(value * -1.0 / price)
+            fill = qty < 0
+            enter = np.flatnonzero(entry)[fill]
+            qty = qty[fill]
+            fee = ib_equity_fee(qty, price)
+            cash[enter] -= qty * price + fee
+            fees[enter] += fee
+            quantity[enter] = qty
+            in_position[enter] = True
+            trail_min[enter] = price
+            trades[enter] += 1
+            entry[:] = False
+            entry[enter] = True
+
+        # Exits: positions held before this bar
+        held = ready & in_position & ~entry
+        if held.any():
+            trail_min[held] = np.minimum(trail_min[held], price)
+            drawup = (price - trail_min) / np.maximum(trail_min, 1e-9)
+            exit_ = held & ((drawup >= stop) | (cross_down & (macd > 0)))
+            if exit_.any():
+                qty = quantity[exit_]
+                cover = qty < 0
+                fee = np.where(cover, ib_equity_fee(qty, price), 0.0)
+                cash[exit_] -= np.where(cover, -qty * price + fee, 0.0)
+                fees[exit_] += fee
+                quantity[exit_] = 0.0
+                in_position[exit_] = False
+
+        prev_fast = np.where(ready, fast_val, prev_fast)
+        prev_slow = np.where(ready, slow_val, prev_slow)
+        has_prev |= ready
+
+        equity = cash + quantity * price
+        np.maximum(peak, equity, out=peak)
+        np.maximum(max_drawdown, 1 - equity / peak, out=max_drawdown)
+
+    # OnEndOfAlgorithm covers any open short at the last SQQQ price
+    open_ = quantity < 0
+    if open_.any():
+        qty = quantity[open_]
+        fee = ib_equity_fee(qty, data.last_sqqq)
+        cash[open_] -= -qty * data.last_sqqq + fee
+        fees[open_] += fee
+        quantity[open_] = 0.0
+    return {"fast": fast, "slow": slow, "stop": stop, "final_value": cash, "trades": trades,
+            "fees": fees, "max_drawdown": max_drawdown}
+
+
+def grid(fasts, slows, stops):
+    """Parallel arrays of every (fast, slow, stop) combination with fast < slow"""
+    combos = [(f, s, x) for f in fasts for s in slows for x in stops if f < s]
+    if not combos:
+        raise ValueError("no combination with fast < slow")
+    fast, slow, stop = zip(*combos)
+    return np.array(fast), np.array(slow), np.array(stop)
+
+
+def verify(algorithm_class, source, results, samples, start=None, end=None, seed=0):
+    """Rerun sampled combinations event-driven; returns [(combo, grid result, engine result)]"""
+    rows = []
+    picks = random.Random(seed).sample(range(len(results["fast"])), min(samples, len(results["fast"])))
+    for j in picks:
+        parameters = {"fast_period": str(results["fast"][j]), "slow_period": str(results["slow"][j]),
+                      "trailing_stop_pct": repr(float(results["stop"][j])), "minute_stops": "0"}
+        result = Engine(algorithm_class, source=source, parameters=parameters, start=start, end=end,
+                        quiet=True).run()
+        rows.append((parameters, (results["final_value"][j], results["trades"][j]),
+                     (result.final_value, result.algorithm.trade_count)))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m lean_local.ema_grid", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("strategy", help="QQQ strategy directory or main.py")
+    parser.add_argument("--data", required=True, help="data root (see lean_local.datasource)")
+    parser.add_argument("--fast", default="4:30", help="fast EMA periods ('a,b,c' or 'start:stop[:step]')")
+    parser.add_argument("--slow", default="20:200:5", help="slow EMA periods")
+    parser.add_argument("--stop", default="0.01:0.15:0.01", help="trailing draw-up stops")
+    parser.add_argument("--start", type=parse_date, help="override start date (YYYY-MM-DD)")
+    parser.add_argument("--end", type=parse_date, help="override end date (YYYY-MM-DD)")
+    parser.add_argument("--verify", type=int, default=0, metavar="N", help="check N combinations event-driven")
+    parser.add_argument("--top", type=int, default=20, help="rows in the ranked table")
+    parser.add_argument("--results", help="write every combination to this CSV file")
+    args = parser.parse_args(argv)
+
+    algorithm_class = load_algorithm(args.strategy)
+    source = CsvDataSource(args.data)
+    algorithm = Engine(algorithm_class, source=source, start=args.start, end=args.end, quiet=True).create_algorithm()
+    data = GridData(algorithm, source)
+    fast, slow, stop = grid(parse_range(args.fast), parse_range(args.slow), parse_range(args.stop, float))
+
+    started = perf_counter()
+    results = simulate(data, fast, slow, stop, algorithm.Portfolio.TotalPortfolioValue)
+    elapsed = perf_counter() - started
+    print("%d combinations over %d hourly slices in %.2fs" % (len(fast), len(data.times), elapsed))
+
+    order = np.argsort(-results["final_value"])
+    print("%-6s %-6s %-6s %-14s %-8s %-8s" % ("fast", "slow", "stop", "final_value", "trades", "max_dd"))
+    for j in order[:args.top]:
+        print("%-6d %-6d %-6.3f %-14.2f %-8d %.2f%%" % (results["fast"][j], results["slow"][j], results["stop"][j],
+                                                       results["final_value"][j], results["trades"][j],
+                                                       results["max_drawdown"][j] * 100))
+    if args.results:
+        with open(args.results, "w", newline="") as f:
+            writer = csv.writer(f)
+            names = ["fast", "slow", "stop", "final_value", "trades", "fees", "max_drawdown"]
+            writer.writerow(names)
+            writer.writerows(zip(*(results[name] for name in names)))
+
+    if args.verify:
+        checks = verify(algorithm_class, source, results, args.verify, args.start, args.end)
+        worst = max(abs(g[0] - e[0]) for _, g, e in checks)
+        mismatched = sum(1 for _, g, e in checks if g[1] != e[1])
+        for parameters, g, e in checks:
+            print("verify %s grid %.2f/%d engine %.2f/%d" % (parameters, g[0], g[1], e[0], e[1]))
+        print("verified %d combinations: max final value difference %.6f, trade count mismatches %d"
+              % (len(checks), worst, mismatched))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,496 @@
+"""Event loop: merges subscriptions into slices and drives algorithms."""
+import heapq
+import inspect
+import os
+from datetime import datetime, timedelta
+from itertools import compress
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+from .datasource import CsvDataSource
+from .enums import Resolution, SecurityType
+from .market_data import (Bar, TradeBar, QuoteBar, Greeks, ZERO_GREEKS, OptionContract, OptionChain,
+                          DataDictionary, Slice)
+from .object_store import DEFAULT_ROOT, ObjectStore
+from .symbols import Symbol, OPTION_TYPES
+
+QUOTE_TYPES = (SecurityType.Forex, SecurityType.Cfd, SecurityType.Crypto)
+BAR_ORDER = 0
+CHAIN_ORDER = 1
+
+
+class BarStream:
+    """Bars [i, j) of one BarSeries"""
+    order = BAR_ORDER
+
+    def __init__(self, subscription, series, i, j):
+        self.subscription = subscription
+        self.series = series
+        self.i = i
+        self.j = j
+        self.quote = subscription.symbol.SecurityType in QUOTE_TYPES
+        self.alive = True
+
+    def next_time(self):
+        return self.series.ends[self.i] if self.i < self.j else None
+
+    def emit(self, feed, builder):
+        s = self.series
+        i = self.i
+        self.i += 1
+        subscription = self.subscription
+        symbol = subscription.symbol
+        bar = TradeBar(symbol, s.starts[i], s.ends[i], s.open[i], s.high[i], s.low[i], s.close[i], s.volume[i])
+        quote = None
+        if self.quote:
+            side = Bar(bar.Open, bar.High, bar.Low, bar.Close)
+            quote = QuoteBar(symbol, bar.Time, bar.EndTime, side, side)
+        builder.bar_views[subscription.key] = (bar, quote)
+        feed.last_price[symbol] = bar.Close
+        builder.all_bars[symbol] = bar
+        if quote is not None:
+            builder.quote_bars[symbol] = quote
+        else:
+            builder.bars[symbol] = bar
+
+
+class ChainStream:
+    """Option chain snapshots for one canonical symbol, day by day.
+
+    Every filter subscribed to the canonical symbol shares the stream: each snapshot is read
+    once and each selected contract is built once, then every filter gets its own chain.
+    """
+    order = CHAIN_ORDER
+
+    def __init__(self, subscription, source, start, end):
+        self.subscription = subscription
+        self.filters = {subscription.key: subscription.option.filter}  # subscription key -> filter
+        self.source = source
+        self.start = start
+        self.end = end
+        self.day = start.date()
+        self.snapshots = iter(())
+        self.current = None
+        self.chain_day = None
+        self.alive = True
+        self._advance()
+
+    def _advance(self):
+        while True:
+            for snapshot in self.snapshots:
+                if self.start < snapshot[0] <= self.end:
+                    self.current = snapshot
+                    return
+            if self.day > self.end.date():
+                self.current = None
+                return
+            target = self.subscription.symbol.ticker
+            self.chain_day = self.source.chain_day(target, self.day)
+            self.day += timedelta(days=1)
+            self.snapshots = self.chain_day.snapshots() if self.chain_day is not None else iter(())
+
+    def next_time(self):
+        return self.current[0] if self.current is not None else None
+
+    def emit(self, feed, builder):
+        time, i, j = self.current
+        day = self.chain_day
+        self._advance()
+        canonical = self.subscription.symbol
+        spot = feed.last_price.get(canonical.Underlying, 0.0)
+        chains = build_chains(day, i, j, canonical, list(self.filters.values()), time, spot)
+        for key, chain in zip(self.filters, chains):
+            builder.chain_views[key] = chain
+        builder.chains[canonical] = chain
+
+
+def build_chains(day, i, j, canonical, universes, time, spot):
+    """One OptionChain per filter of the contracts in rows [i, j); shared contracts are built once"""
+    today = np.datetime64(time.date(), "D")
+    expiry_days = (day.expiry[i:j] - today).astype(np.int64)
+    rights = day.right[i:j]
+    strikes = day.strike[i:j]
+    masks = [universe.select(expiry_days, rights, strikes, spot) for universe in universes]
+    selected = masks[0] if len(masks) == 1 else np.logical_or.reduce(masks)
+    rows = np.flatnonzero(selected) + i
+    contracts = build_contracts(day, rows, canonical, time, spot)
+    if len(masks) == 1:
+        return [OptionChain(canonical, time, None, contracts)]
+    return [OptionChain(canonical, time, None, list(compress(contracts, mask[rows - i].tolist())))
+            for mask in masks]
+
+
+def build_contracts(day, rows, canonical, time, spot):
+    """OptionContracts of the given snapshot rows"""
+    underlying = canonical.Underlying
+    target = canonical.ticker
+    option_type = canonical.SecurityType
+    # Gather the selected rows once and convert to Python scalars in bulk
+    expiries = np.asarray(day.expiry[rows]).tolist()
+    rights = day.right[rows].tolist()
+    strikes = day.strike[rows].tolist()
+    bids = day.bid[rows].tolist()
+    asks = day.ask[rows].tolist()
+    lasts = day.last[rows].tolist()
+    open_interest = day.open_interest[rows].tolist()
+    greeks = day.greeks
+    if greeks is not None:
+        zeros = [0.0] * len(rows)
+        columns = [greeks[c][rows].tolist() if c in greeks else zeros
+                   for c in ("delta", "gamma", "theta", "vega", "implied_volatility")]
+    expiry_times = {}
+    contracts = []
+    for k, expiry_date in enumerate(expiries):
+        symbol = Symbol.CreateOption(underlying, target, option_type, expiry_date, rights[k], strikes[k])
+        if greeks is not None:
+            contract_greeks = Greeks(columns[0][k], columns[1][k], columns[2][k], columns[3][k])
+            iv = columns[4][k]
+        else:
+            contract_greeks = ZERO_GREEKS
+            iv = 0.0
+        expiry_time = expiry_times.get(expiry_date)
+        if expiry_time is None:
+            expiry_time = expiry_times[expiry_date] = datetime(expiry_date.year, expiry_date.month,
+                                                               expiry_date.day)
+        contracts.append(OptionContract(symbol, expiry_time, time, bids[k], asks[k], lasts[k],
+                                        open_interest[k], spot, contract_greeks, iv))
+    return contracts
+
+
+class SliceBuilder:
+    __slots__ = ("bars", "quote_bars", "chains", "all_bars", "bar_views", "chain_views")
+
+    def __init__(self):
+        self.bars = DataDictionary()
+        self.quote_bars = DataDictionary()
+        self.chains = DataDictionary()
+        self.all_bars = {}
+        self.bar_views = {}    # subscription key -> (TradeBar, QuoteBar or None)
+        self.chain_views = {}  # subscription key -> OptionChain
+
+    def build(self, time):
+        data = Slice(time, self.bars, self.quote_bars, self.chains)
+        data.all_bars = self.all_bars
+        data.bar_views = self.bar_views
+        data.chain_views = self.chain_views
+        return data
+
+
+class DataFeed:
+    """Deduplicated subscriptions merged into time-ordered slices"""
+
+    def __init__(self, source, start, end):
+        self.source = source
+        self.start = start
+        self.end = end
+        self.heap = []
+        self.seq = 0
+        self.streams = {}   # subscription key -> stream
+        self.chain_streams = {}  # (canonical, resolution) -> ChainStream shared by its filters
+        self.refcount = {}
+        self.last_price = {}
+        self.time = start
+        self.slices = 0
+        self.data_points = 0
+
+    def add(self, subscription, start=None):
+        key = subscription.key
+        self.refcount[key] = self.refcount.get(key, 0) + 1
+        if key in self.streams:
+            return
+        start = max(start or self.start, self.start)
+        if subscription.option is not None:
+            canonical_key = (subscription.symbol, subscription.resolution)
+            stream = self.chain_streams.get(canonical_key)
+            if stream is not None:
+                stream.filters[key] = subscription.option.filter
+                self.streams[key] = stream
+                return
+            stream = self.chain_streams[canonical_key] = ChainStream(subscription, self.source, start, self.end)
+        else:
+            series = self.source.bars(subscription.symbol, subscription.resolution)
+            if series is None:
+                return
+            i, j = series.index_range(start, self.end)
+            stream = BarStream(subscription, series, i, j)
+        self.streams[key] = stream
+        self._push(stream)
+
+    def remove(self, subscription):
+        key = subscription.key
+        count = self.refcount.get(key, 0) - 1
+        if count > 0:
+            self.refcount[key] = count
+            return
+        self.refcount.pop(key, None)
+        stream = self.streams.pop(key, None)
+        if stream is None:
+            return
+        if isinstance(stream, ChainStream):
+            stream.filters.pop(key, None)
+            if stream.filters:
+                return
+            del self.chain_streams[(subscription.symbol, subscription.resolution)]
+        stream.alive = False
+
+    def _push(self, stream):
+        t = stream.next_time()
+        if t is not None:
+            self.seq += 1
+            heapq.heappush(self.heap, (t, stream.order, self.seq, stream))
+
+    def __iter__(self):
+        heap = self.heap
+        while heap:
+            time = heap[0][0]
+            builder = SliceBuilder()
+            while heap and heap[0][0] == time:
+                _, _, _, stream = heapq.heappop(heap)
+                if not stream.alive:
+                    continue
+                stream.emit(self, builder)
+                self.data_points += 1
+                self._push(stream)
+            if not (builder.all_bars or builder.chains):
+                continue
+            self.time = time
+            self.slices += 1
+            yield builder.build(time)
+
+
+class AlgorithmRunner:
+    """Per-algorithm time keeping: scheduled events, orders, end of day"""
+
+    def __init__(self, algorithm):
+        self.algorithm = algorithm
+        self.day = None
+        self.events = []
+        self.event_index = 0
+        self.warm = algorithm._warmup is None
+        self.on_data_calls = 0
+        self.daily_equity = []
+        end_of_day = getattr(type(algorithm), "OnEndOfDay", None)
+        self.end_of_day = end_of_day
+        self.end_of_day_per_symbol = (end_of_day is not None
+                                      and len(inspect.signature(end_of_day).parameters) > 1)
+
+    def _load_events(self, day):
+        self.events = self.algorithm.Schedule.occurrences(day)
+        self.event_index = 0
+
+    def _fire_events(self, until):
+        algorithm = self.algorithm
+        events = self.events
+        while self.event_index < len(events) and events[self.event_index][0] <= until:
+            at, _, callback = events[self.event_index]
+            self.event_index += 1
+            algorithm._time = at
+            callback()
+
+    def _end_of_day(self):
+        algorithm = self.algorithm
+        if self.end_of_day is not None and not algorithm.IsWarmingUp:
+            if self.end_of_day_per_symbol:
+                seen = set()
+                for subscription in algorithm._subscriptions:
+                    symbol = subscription.symbol
+                    if subscription.option is None and symbol not in seen:
+                        seen.add(symbol)
+                        algorithm.OnEndOfDay(symbol)
+            else:
+                algorithm.OnEndOfDay()
+        if not algorithm.IsWarmingUp:
+            self.daily_equity.append((self.day, algorithm.Portfolio.TotalPortfolioValue))
+
+    def _roll_day(self, new_day):
+        algorithm = self.algorithm
+        self._fire_events(datetime.max)
+        day = self.day + timedelta(days=1)
+        while day < new_day:
+            self._load_events(day)
+            self._fire_events(datetime.max)
+            day += timedelta(days=1)
+        midnight = datetime(new_day.year, new_day.month, new_day.day)
+        for consolidators in algorithm.SubscriptionManager.consolidators.values():
+            for consolidator in consolidators:
+                consolidator.Scan(midnight)
+        self._end_of_day()
+        algorithm.Transactions.settle_expired(new_day)
+        self.day = new_day
+        self._load_events(new_day)
+
+    def step(self, data):
+        algorithm = self.algorithm
+        time = data.Time
+        day = time.date()
+        if self.day is None:
+            self.day = day
+            self._load_events(day)
+        elif day != self.day:
+            self._roll_day(day)
+
+        algorithm._slice = data
+        algorithm._time = time
+        securities = algorithm.Securities
+        handlers = algorithm._indicator_handlers
+        consolidators = algorithm.SubscriptionManager.consolidators
+        for symbol, bar in data.all_bars.items():
+            security = securities.get(symbol)
+            if security is None:
+                continue
+            security.update_bar(bar)
+            if symbol.SecurityType in QUOTE_TYPES:
+                security.BidPrice = security.AskPrice = bar.Close
+            for handler in handlers.get(symbol, ()):
+                handler(bar)
+        if consolidators:
+            for key, (bar, _) in data.bar_views.items():
+                for consolidator in consolidators.get(key, ()):
+                    consolidator.Update(bar)
+
+        # Refresh quotes of option contracts we hold or have orders on
+        if data.OptionChains:
+            tracked = [s for s in algorithm.Portfolio.invested if s.SecurityType in OPTION_TYPES]
+            tracked.extend(o.Symbol for o in algorithm.Transactions.open_orders.values())
+            if tracked:
+                contracts = data._contract_map()
+                for symbol in tracked:
+                    contract = contracts.get(symbol)
+                    if contract is not None:
+                        securities[symbol].update_quote(contract.BidPrice, contract.AskPrice, contract.LastPrice)
+
+        for symbol_consolidators in consolidators.values():
+            for consolidator in symbol_consolidators:
+                consolidator.Scan(time)
+
+        if not self.warm and time >= algorithm._start:
+            self.warm = True
+            algorithm._time = time
+            algorithm.OnWarmupFinished()
+
+        self._fire_events(time)
+        algorithm._time = time
+        algorithm.Transactions.process_open_orders()
+        self.on_data_calls += 1
+        algorithm.OnData(data)
+
+    def finish(self):
+        algorithm = self.algorithm
+        if self.day is not None:
+            self._fire_events(datetime.max)
+            self._end_of_day()
+            algorithm.Transactions.settle_expired(self.day + timedelta(days=1))
+        algorithm.OnEndOfAlgorithm()
+
+
+class BacktestResult:
+    def __init__(self, algorithm, runner, feed, elapsed, logs, initial_value):
+        portfolio = algorithm.Portfolio
+        self.algorithm = algorithm
+        self.initial_value = initial_value
+        self.final_value = portfolio.TotalPortfolioValue
+        self.fees = portfolio.TotalFees
+        self.orders = len(algorithm.Transactions.orders)
+        self.fills = algorithm.Transactions.fill_count
+        self.slices = feed.slices
+        self.data_points = feed.data_points
+        self.on_data_calls = runner.on_data_calls
+        self.daily_equity = runner.daily_equity
+        self.elapsed = elapsed
+        self.logs = logs
+        self.plots = algorithm._plots
+
+    def summary(self):
+        rate = self.data_points / self.elapsed if self.elapsed else 0.0
+        return ("Final value: %.2f | fees: %.2f | orders: %d | fills: %d | slices: %d | data points: %d | "
+                "%.2fs (%.0f points/s)" % (self.final_value, self.fees, self.orders, self.fills,
+                                           self.slices, self.data_points, self.elapsed, rate))
+
+
+class Engine:
+    """Runs one algorithm class over local data"""
+
+    def __init__(self, algorithm_class, data_root=None, parameters=None, source=None, object_store=None,
+                 start=None, end=None, quiet=False, cash=None):
+        self.algorithm_class = algorithm_class
+        self.source = source if source is not None else CsvDataSource(data_root)
+        self.parameters = {k: str(v) for k, v in (parameters or {}).items()}
+        self.object_store = object_store
+        self.start = start
+        self.end = end
+        self.quiet = quiet
+        self.cash = cash
+        self.logs = []
+        self.feed = None
+
+    # --- runtime interface used by QCAlgorithm -------------------------
+
+    def log(self, kind, algorithm, message):
+        self.logs.append((algorithm._time, kind, message))
+        if not self.quiet:
+            print("%s %s" % (algorithm._time, message))
+
+    def subscription_added(self, algorithm, subscription):
+        if self.feed is not None:
+            self.feed.add(subscription, algorithm._time)
+
+    def subscription_removed(self, algorithm, subscription):
+        if self.feed is not None:
+            self.feed.remove(subscription)
+
+    def history(self, algorithm, symbols, resolution, start, end, count):
+        frames = []
+        for symbol in symbols:
+            res = resolution if resolution is not None else algorithm._subscription_resolution(symbol)
+            series = self.source.bars(symbol, res if res is not None else Resolution.Daily)
+            if series is None:
+                continue
+            if count is not None:
+                _, j = series.index_range(datetime(1900, 1, 1), end)
+                i = max(j - count, 0)
+            else:
+                i, j = series.index_range(start, end)
+            frames.append(series.frame(i, j))
+        if not frames:
+            return pd.DataFrame(columns=["open", "high", "low", "close", "volume"])
+        return pd.concat(frames) if len(frames) > 1 else frames[0]
+
+    # --- driver ---------------------------------------------------------
+
+    def create_algorithm(self):
+        algorithm = self.algorithm_class()
+        algorithm._runtime = self
+        algorithm._parameters = self.parameters
+        # Without a directory, every data source gets its own store: caches and snapshots
+        # built from one source are never read by runs on another
+        algorithm.ObjectStore = ObjectStore(self.object_store if self.object_store is not None
+                                            else os.path.join(DEFAULT_ROOT, self.source.cache_id))
+        # Pin the range and cash before Initialize so they are already final there
+        if self.cash is not None:
+            algorithm._pinned_cash = float(self.cash)
+            algorithm.Portfolio.SetCash(algorithm._pinned_cash)
+        if self.start is not None:
+            algorithm._start = algorithm._pinned_start = self.start
+        if self.end is not None:
+            algorithm._end = algorithm._pinned_end = self.end.replace(hour=23, minute=59, second=59)
+        algorithm._time = algorithm._start
+        algorithm.Initialize()
+        algorithm._time = algorithm._start - (algorithm._warmup or timedelta(0))
+        return algorithm
+
+    def run(self):
+        algorithm = self.create_algorithm()
+        feed = DataFeed(self.source, algorithm._time, algorithm._end)
+        for subscription in algorithm._subscriptions:
+            feed.add(subscription)
+        self.feed = feed
+        runner = AlgorithmRunner(algorithm)
+        initial_value = algorithm.Portfolio.TotalPortfolioValue
+        started = perf_counter()
+        for data in feed:
+            runner.step(data)
+        runner.finish()
+        return BacktestResult(algorithm, runner, feed, perf_counter() - started, self.logs,
+                              initial_value)
@@ -0,0 +1,75 @@
+"""Enumerations mirroring the LEAN names used by the strategies."""
+from enum import IntEnum
+
+
+class Resolution(IntEnum):
+    Tick = 0
+    Second = 1
+    Minute = 2
+    Hour = 3
+    Daily = 4
+
+
+class SecurityType(IntEnum):
+    Base = 0
+    Equity = 1
+    Option = 2
+    Commodity = 3
+    Forex = 4
+    Future = 5
+    Cfd = 6
+    Crypto = 7
+    FutureOption = 8
+    Index = 9
+    IndexOption = 10
+
+
+class OptionRight(IntEnum):
+    Call = 0
+    Put = 1
+
+
+class OrderType(IntEnum):
+    Market = 0
+    Limit = 1
+    StopMarket = 2
+    StopLimit = 3
+    MarketOnOpen = 4
+    MarketOnClose = 5
+    OptionExercise = 6
+    ComboMarket = 9
+    ComboLimit = 10
+
+
+class OrderStatus(IntEnum):
+    New = 0
+    Submitted = 1
+    PartiallyFilled = 2
+    Filled = 3
+    Canceled = 5
+    Invalid = 7
+    CancelPending = 8
+    UpdateSubmitted = 9
+
+
+class OrderDirection(IntEnum):
+    Buy = 0
+    Sell = 1
+    Hold = 2
+
+
+class BrokerageName(IntEnum):
+    Default = 0
+    InteractiveBrokersBrokerage = 1
+
+
+class AccountType(IntEnum):
+    Margin = 0
+    Cash = 1
+
+
+class Market:
+    USA = "usa"
+    Oanda = "oanda"
+    FXCM = "fxcm"
+    CBOE = "cboe"
@@ -0,0 +1,206 @@
+"""Indicators, rolling windows and consolidators."""
+from collections import deque
+from datetime import datetime, timedelta
+
+from .market_data import TradeBar
+
+
+class Event:
+    """C#-style event supporting += / -= handler registration"""
+
+    def __init__(self):
+        self.handlers = []
+
+    def __iadd__(self, handler):
+        self.handlers.append(handler)
+        return self
+
+    def __isub__(self, handler):
+        self.handlers.remove(handler)
+        return self
+
+    def fire(self, *args):
+        for handler in self.handlers:
+            handler(*args)
+
+
+class IndicatorDataPoint:
+    __slots__ = ("Time", "EndTime", "Value")
+
+    def __init__(self, time=None, value=0.0):
+        self.Time = time
+        self.EndTime = time
+        self.Value = value
+
+    def __float__(self):
+        return float(self.Value)
+
+    def __repr__(self):
+        return "IndicatorDataPoint(%s, %s)" % (self.Time, self.Value)
+
+
+class IndicatorBase:
+    """Common Update/IsReady/Current plumbing"""
+
+    def __init__(self, name, period):
+        self.Name = name
+        self.period = period
+        self.Samples = 0
+        self.Current = IndicatorDataPoint()
+        self.Updated = Event()
+
+    @property
+    def IsReady(self):
+        return self.Samples >= self.period
+
+    @property
+    def WarmUpPeriod(self):
+        return self.period
+
+    def Update(self, time, value=None):
+        """Update(time, value), Update(IndicatorDataPoint) or Update(bar)"""
+        if value is None:
+            point = time
+            time = point.EndTime
+            value = point.Close if hasattr(point, "Close") else point.Value
+        self.Samples += 1
+        self.Current = IndicatorDataPoint(time, self.compute(float(value)))
+        if self.Updated.handlers:
+            self.Updated.fire(self, self.Current)
+        return self.IsReady
+
+    def Reset(self):
+        self.Samples = 0
+        self.Current = IndicatorDataPoint()
+
+    def compute(self, value):
+        raise NotImplementedError
+
+    def __float__(self):
+        return float(self.Current.Value)
+
+
+class SimpleMovingAverage(IndicatorBase):
+    def __init__(self, name, period):
+        super().__init__(name, period)
+        self.window = deque(maxlen=period)
+        self.total = 0.0
+
+    def compute(self, value):
+        if len(self.window) == self.period:
+            self.total -= self.window[0]
+        self.window.append(value)
+        self.total += value
+        return self.total / len(self.window)
+
+    def Reset(self):
+        super().Reset()
+        self.window.clear()
+        self.total = 0.0
+
+
+class ExponentialMovingAverage(IndicatorBase):
+    """LEAN EMA: first sample is the identity, then value*k + previous*(1-k)"""
+
+    def __init__(self, name, period, smoothing_factor=None):
+        super().__init__(name, period)
+        self.k = smoothing_factor if smoothing_factor is not None else 2.0 / (period + 1)
+
+    def compute(self, value):
+        if self.Samples == 1:
+            return value
+        return value * self.k + self.Current.Value * (1 - self.k)
+
+
+class RollingWindow:
+    """Fixed-size window indexed from the most recent item ([0])"""
+
+    def __class_getitem__(cls, item):
+        # RollingWindow[float](n) as in LEAN's generic syntax
+        return cls
+
+    def __init__(self, size):
+        self.Size = size
+        self.items = deque(maxlen=size)
+        self.Samples = 0
+
+    def Add(self, item):
+        self.items.appendleft(item)
+        self.Samples += 1
+
+    @property
+    def Count(self):
+        return len(self.items)
+
+    @property
+    def IsReady(self):
+        return len(self.items) == self.Size
+
+    def Reset(self):
+        self.items.clear()
+        self.Samples = 0
+
+    def __getitem__(self, i):
+        return self.items[i]
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+EPOCH = datetime(1, 1, 1)
+
+
+class TradeBarConsolidator:
+    """Aggregates TradeBars into time periods (timedelta) or fixed bar counts (int)"""
+
+    def __init__(self, period):
+        self.period = period if isinstance(period, timedelta) else None
+        self.count = period if isinstance(period, int) else None
+        self.working = None
+        self.working_end = None
+        self.working_count = 0
+        self.Consolidated = None
+        self.DataConsolidated = Event()
+
+    def _period_start(self, time):
+        return EPOCH + self.period * ((time - EPOCH) // self.period)
+
+    def Update(self, bar):
+        if self.period is not None and self.working is not None and bar.Time >= self.working_end:
+            self._emit()
+        if self.working is None:
+            start = self._period_start(bar.Time) if self.period is not None else bar.Time
+            self.working = TradeBar(bar.Symbol, start, bar.EndTime, bar.Open, bar.High, bar.Low,
+                                    bar.Close, bar.Volume)
+            self.working_end = start + self.period if self.period is not None else None
+            self.working_count = 1
+        else:
+            w = self.working
+            w.High = max(w.High, bar.High)
+            w.Low = min(w.Low, bar.Low)
+            w.Close = bar.Close
+            w.Volume += bar.Volume
+            w.EndTime = bar.EndTime
+            self.working_count += 1
+        if self.count is not None and self.working_count >= self.count:
+            self._emit()
+
+    def Scan(self, time):
+        """Emit the working bar once its period has fully elapsed"""
+        if self.period is not None and self.working is not None and time >= self.working_end:
+            self._emit()
+
+    def _emit(self):
+        bar = self.working
+        if self.period is not None:
+            bar.EndTime = self.working_end
+        self.working = None
+        self.Consolidated = bar
+        self.DataConsolidated.fire(self, bar)
+
+
+class QuoteBarConsolidator(TradeBarConsolidator):
+    """LEAN's QuoteBarConsolidator; lean_local hands consolidators the mid prices as TradeBars"""
@@ -0,0 +1,38 @@
+"""Imports a strategy's main.py (directory names may contain spaces)."""
+import importlib.util
+import inspect
+import os
+import sys
+
+from .algorithm import QCAlgorithm
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(PACKAGE_DIR)
+SHIM_DIR = os.path.join(PACKAGE_DIR, "shim")
+
+
+def install_paths():
+    """Make `AlgorithmImports`, `QuantConnect` and `common` importable"""
+    for path in (REPO_ROOT, SHIM_DIR):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+
+
+def load_algorithm(path):
+    """QCAlgorithm subclass defined in `path` (a main.py or its directory)"""
+    install_paths()
+    if os.path.isdir(path):
+        path = os.path.join(path, "main.py")
+    path = os.path.abspath(path)
+    name = "lean_local_strategy_%x" % (hash(path) & 0xFFFFFFFF)
+    module = sys.modules.get(name)
+    if module is None:
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+    classes = [c for _, c in inspect.getmembers(module, inspect.isclass)
+               if issubclass(c, QCAlgorithm) and c is not QCAlgorithm and c.__module__ == name]
+    if not classes:
+        raise ValueError("No QCAlgorithm subclass in %s" % path)
+    return classes[0]
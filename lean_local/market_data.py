@@ -0,0 +1,229 @@
+"""Bars, option chains and the per-time-step Slice."""
+from .enums import OptionRight
+
+
+class Bar:
+    __slots__ = ("Open", "High", "Low", "Close")
+
+    def __init__(self, open_, high, low, close):
+        self.Open = open_
+        self.High = high
+        self.Low = low
+        self.Close = close
+
+
+class TradeBar:
+    __slots__ = ("Symbol", "Time", "EndTime", "Open", "High", "Low", "Close", "Volume")
+
+    def __init__(self, symbol, time, end_time, open_, high, low, close, volume=0.0):
+        self.Symbol = symbol
+        self.Time = time
+        self.EndTime = end_time
+        self.Open = open_
+        self.High = high
+        self.Low = low
+        self.Close = close
+        self.Volume = volume
+
+    @property
+    def Price(self):
+        return self.Close
+
+    @property
+    def Value(self):
+        return self.Close
+
+    @property
+    def Period(self):
+        return self.EndTime - self.Time
+
+    def __repr__(self):
+        return "TradeBar(%s %s C=%s)" % (self.Symbol, self.EndTime, self.Close)
+
+
+class QuoteBar:
+    __slots__ = ("Symbol", "Time", "EndTime", "Bid", "Ask")
+
+    def __init__(self, symbol, time, end_time, bid, ask):
+        self.Symbol = symbol
+        self.Time = time
+        self.EndTime = end_time
+        self.Bid = bid
+        self.Ask = ask
+
+    @property
+    def Close(self):
+        if self.Bid is not None and self.Ask is not None:
+            return (self.Bid.Close + self.Ask.Close) / 2
+        side = self.Bid if self.Bid is not None else self.Ask
+        return side.Close if side is not None else 0.0
+
+    @property
+    def Price(self):
+        return self.Close
+
+    @property
+    def Period(self):
+        return self.EndTime - self.Time
+
+    @property
+    def Value(self):
+        return self.Close
+
+
+class Greeks:
+    __slots__ = ("Delta", "Gamma", "Theta", "Vega", "Rho")
+
+    def __init__(self, delta=0.0, gamma=0.0, theta=0.0, vega=0.0, rho=0.0):
+        self.Delta = delta
+        self.Gamma = gamma
+        self.Theta = theta
+        self.Vega = vega
+        self.Rho = rho
+
+
+ZERO_GREEKS = Greeks()
+
+
+class OptionContract:
+    __slots__ = ("Symbol", "UnderlyingSymbol", "Strike", "Expiry", "Right", "BidPrice", "AskPrice",
+                 "LastPrice", "OpenInterest", "Volume", "Greeks", "ImpliedVolatility",
+                 "UnderlyingLastPrice", "Time")
+
+    def __init__(self, symbol, expiry, time, bid, ask, last, open_interest, underlying_price,
+                 greeks=ZERO_GREEKS, implied_volatility=0.0):
+        self.Symbol = symbol
+        self.UnderlyingSymbol = symbol.Underlying
+        self.Strike = symbol.strike
+        self.Expiry = expiry
+        self.Right = symbol.right
+        self.BidPrice = bid
+        self.AskPrice = ask
+        self.LastPrice = last
+        self.OpenInterest = open_interest
+        self.Volume = 0
+        self.Greeks = greeks
+        self.ImpliedVolatility = implied_volatility
+        self.UnderlyingLastPrice = underlying_price
+        self.Time = time
+
+    def quote_bar(self, end_time):
+        bid = Bar(self.BidPrice, self.BidPrice, self.BidPrice, self.BidPrice)
+        ask = Bar(self.AskPrice, self.AskPrice, self.AskPrice, self.AskPrice)
+        return QuoteBar(self.Symbol, end_time, end_time, bid, ask)
+
+    def __repr__(self):
+        return "OptionContract(%s)" % self.Symbol
+
+
+class OptionChain:
+    """Contracts of one canonical option symbol at one time step"""
+
+    def __init__(self, symbol, time, underlying, contracts):
+        self.Symbol = symbol
+        self.Time = time
+        self.Underlying = underlying
+        self.contracts = contracts
+
+    @property
+    def Contracts(self):
+        return {c.Symbol: c for c in self.contracts}
+
+    def __iter__(self):
+        return iter(self.contracts)
+
+    def __len__(self):
+        return len(self.contracts)
+
+    def __bool__(self):
+        return bool(self.contracts)
+
+
+class DataDictionary(dict):
+    """dict with the LEAN DataDictionary helpers"""
+
+    def ContainsKey(self, key):
+        return key in self
+
+    def TryGetValue(self, key):
+        value = self.get(key)
+        return value is not None, value
+
+    @property
+    def Keys(self):
+        return list(self.keys())
+
+    @property
+    def Values(self):
+        return list(self.values())
+
+    @property
+    def Count(self):
+        return len(self)
+
+
+class Slice:
+    """All data for one time step"""
+
+    def __init__(self, time, bars=None, quote_bars=None, option_chains=None):
+        self.Time = time
+        self.Bars = bars if bars is not None else DataDictionary()
+        self.QuoteBars = quote_bars if quote_bars is not None else DataDictionary()
+        self.OptionChains = option_chains if option_chains is not None else DataDictionary()
+        self._contracts = None
+
+    def _contract_map(self):
+        if self._contracts is None:
+            self._contracts = {}
+            for chain in self.OptionChains.values():
+                for contract in chain.contracts:
+                    self._contracts[contract.Symbol] = contract
+        return self._contracts
+
+    def ContainsKey(self, symbol):
+        return symbol in self
+
+    def __contains__(self, symbol):
+        return (symbol in self.Bars or symbol in self.QuoteBars
+                or (bool(self.OptionChains) and symbol in self._contract_map()))
+
+    def get(self, symbol, default=None):
+        bar = self.Bars.get(symbol)
+        if bar is not None:
+            return bar
+        bar = self.QuoteBars.get(symbol)
+        if bar is not None:
+            return bar
+        if self.OptionChains:
+            contract = self._contract_map().get(symbol)
+            if contract is not None:
+                return contract.quote_bar(self.Time)
+        return default
+
+    def __getitem__(self, symbol):
+        value = self.get(symbol)
+        if value is None:
+            raise KeyError(symbol)
+        return value
+
+    @property
+    def Keys(self):
+        return list(self.Bars.keys()) + list(self.QuoteBars.keys()) + list(self._contract_map().keys())
+
+    @property
+    def HasData(self):
+        return bool(self.Bars or self.QuoteBars or self.OptionChains)
+
+    def filtered(self, symbols, chain_symbols):
+        """View holding only the given symbols and canonical option symbols"""
+        bars = DataDictionary((s, b) for s, b in self.Bars.items() if s in symbols)
+        quote_bars = DataDictionary((s, b) for s, b in self.QuoteBars.items() if s in symbols)
+        chains = DataDictionary((s, c) for s, c in self.OptionChains.items() if s in chain_symbols)
+        return Slice(self.Time, bars, quote_bars, chains)
+
+
+def right_from_code(code):
+    """'C'/'P' (or 0/1) to OptionRight"""
+    if code in ("C", "c", 0, "0"):
+        return OptionRight.Call
+    return OptionRight.Put
@@ -0,0 +1,173 @@
+"""Monte Carlo robustness of a strategy's returns.
+
+    python -m lean_local.monte_carlo "<strategy dir>" --data DIR [--param name=value ...] \\
+        [--returns daily|trades] [--method bootstrap|reshuffle|both] [--sims 20000] [--block 5] \\
+        [--ruin 0.5] [--chunk N] [--workers N] [--seed 0] [--start --end]
+    python -m lean_local.monte_carlo --returns-file FILE [...]
+
+The strategy is backtested once and its return series is resampled into `--sims`
+alternative equity paths:
+- bootstrap: moving-block bootstrap. Blocks of `--block` consecutive returns are drawn
+  with replacement, which keeps short-range autocorrelation.
+- reshuffle: random permutations of the returns. The total return is unchanged; the
+  order, and with it the drawdowns, is not.
+
+--returns daily uses the engine's end-of-day portfolio values. --returns trades uses the
+portfolio growth between successive exits in the strategy's trade journal (one return per
+day with an exit), which works for single positions and option spreads alike.
+--returns-file reads a return series (.npy, or one value per line) instead of running
+a backtest.
+
+Paths are generated and reduced in chunks of `--chunk` simulations (by default sized to
+about 64 MB of paths), so memory stays bounded for any simulation count. Each chunk has its
+own seed from one SeedSequence, so the results do not depend on `--workers`.
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+from time import perf_counter
+
+import numpy as np
+
+from .__main__ import parse_date
+from .engine import Engine
+from .loader import load_algorithm
+
+METHODS = ("bootstrap", "reshuffle")
+PERCENTILES = (1, 5, 25, 50, 75, 95, 99)
+CHUNK_BYTES = 64 * 2 ** 20
+
+
+def daily_returns(result):
+    """Day-over-day returns of the end-of-day portfolio values, starting from the initial value"""
+    equity = np.array([result.initial_value] + [value for _, value in result.daily_equity], dtype=np.float64)
+    return equity[1:] / equity[:-1] - 1
+
+
+def trade_returns(result):
+    """Portfolio growth between the end of successive days with an exit in the trade journal"""
+    from common.trade_journal import EXIT, load_records  # importable once load_algorithm has set up the paths
+    journal = getattr(result.algorithm, "journal", None)
+    if journal is None:
+        raise ValueError("the strategy has no trade journal; use --returns daily")
+    records = load_records(journal.path)[journal.first_record:]  # this run's records only
+    exit_times = records["time"][records["kind"] == EXIT].astype("datetime64[s]")
+    exit_days = set(exit_times.astype("datetime64[D]").tolist())
+    equity = [result.initial_value] + [value for day, value in result.daily_equity if day in exit_days]
+    equity = np.array(equity, dtype=np.float64)
+    return equity[1:] / equity[:-1] - 1
+
+
+def load_returns_file(path):
+    if path.endswith(".npy"):
+        return np.load(path).astype(np.float64).ravel()
+    return np.loadtxt(path, dtype=np.float64, ndmin=1)
+
+
+def bootstrap_paths(returns, n, block, rng):
+    """(n x len(returns)) moving-block bootstrap samples"""
+    length = len(returns)
+    block = max(1, min(block, length))
+    blocks = -(-length // block)
+    starts = rng.integers(0, length - block + 1, size=(n, blocks))
+    index = (starts[:, :, None] + np.arange(block)).reshape(n, blocks * block)[:, :length]
+    return returns[index]
+
+
+def reshuffle_paths(returns, n, rng):
+    """(n x len(returns)) random permutations"""
+    return rng.permuted(np.broadcast_to(returns, (n, len(returns))), axis=1)
+
+
+def path_stats(paths, ruin):
+    """Final return, maximum drawdown and ruin flag of each path of returns"""
+    equity = np.cumprod(1 + paths, axis=1)
+    peak = np.maximum(np.maximum.accumulate(equity, axis=1), 1.0)  # the paths start at 1.0
+    max_drawdown = np.max(1 - equity / peak, axis=1)
+    ruined = np.min(equity, axis=1) <= 1 - ruin
+    return equity[:, -1] - 1, max_drawdown, ruined
+
+
+def run_chunk(task):
+    """Worker entry point: simulate one chunk of paths"""
+    returns, method, n, block, ruin, seed = task
+    rng = np.random.default_rng(seed)
+    paths = bootstrap_paths(returns, n, block, rng) if method == "bootstrap" else reshuffle_paths(returns, n, rng)
+    return path_stats(paths, ruin)
+
+
+def simulate(returns, sims, method="bootstrap", block=5, ruin=0.5, chunk=None, workers=1, seed=0):
+    """Statistics of `sims` resampled paths: dict of final_return, max_drawdown and ruined arrays"""
+    returns = np.ascontiguousarray(returns, dtype=np.float64)
+    if len(returns) < 2:
+        raise ValueError("need at least two returns, got %d" % len(returns))
+    chunk = chunk or max(1, CHUNK_BYTES // (len(returns) * 8 * 4))
+    sizes = [min(chunk, sims - i) for i in range(0, sims, chunk)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(returns, method, n, block, ruin, s) for n, s in zip(sizes, seeds)]
+    if workers > 1 and len(tasks) > 1:
+        context = multiprocessing.get_context("fork") if "fork" in multiprocessing.get_all_start_methods() \
+            else multiprocessing.get_context()
+        with context.Pool(workers) as pool:
+            parts = pool.map(run_chunk, tasks)
+    else:
+        parts = [run_chunk(task) for task in tasks]
+    final_return, max_drawdown, ruined = (np.concatenate(column) for column in zip(*parts))
+    return {"final_return": final_return, "max_drawdown": max_drawdown, "ruined": ruined}
+
+
+def format_report(returns, stats, method, ruin):
+    final_return, max_drawdown, _ = path_stats(returns[None, :], ruin)
+    lines = ["%s: %d paths of %d returns" % (method, len(stats["final_return"]), len(returns)),
+             "  %-14s %s" % ("percentile", "  ".join("%8s" % ("p%d" % p) for p in PERCENTILES)) + "    actual"]
+    for name, actual in (("final_return", final_return[0]), ("max_drawdown", max_drawdown[0])):
+        values = np.percentile(stats[name], PERCENTILES)
+        lines.append("  %-14s %s    %7.2f%%" % (name, "  ".join("%7.2f%%" % (v * 100) for v in values),
+                                               actual * 100))
+    lines.append("  P(loss) %.2f%%  P(ruin: down %.0f%% from the start) %.2f%%" % (
+        np.mean(stats["final_return"] < 0) * 100, ruin * 100, np.mean(stats["ruined"]) * 100))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m lean_local.monte_carlo", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("strategy", nargs="?", help="strategy directory or main.py")
+    parser.add_argument("--data", help="data root (see lean_local.datasource)")
+    parser.add_argument("--param", action="append", default=[], metavar="NAME=VALUE",
+                        help="algorithm parameter, readable with GetParameter")
+    parser.add_argument("--start", type=parse_date, help="override start date (YYYY-MM-DD)")
+    parser.add_argument("--end", type=parse_date, help="override end date (YYYY-MM-DD)")
+    parser.add_argument("--returns", choices=("daily", "trades"), default="daily", help="return series to resample")
+    parser.add_argument("--returns-file", help="resample this return series instead of running a backtest")
+    parser.add_argument("--method", choices=METHODS + ("both",), default="both")
+    parser.add_argument("--sims", type=int, default=20000, help="simulated paths per method")
+    parser.add_argument("--block", type=int, default=5, help="bootstrap block length in returns")
+    parser.add_argument("--ruin", type=float, default=0.5, help="drawdown from the start that counts as ruin")
+    parser.add_argument("--chunk", type=int, help="paths per chunk (default: ~64 MB of paths)")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes for the chunks")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.returns_file:
+        returns = load_returns_file(args.returns_file)
+    else:
+        if not (args.strategy and args.data):
+            parser.error("a strategy and --data are required without --returns-file")
+        parameters = dict(p.split("=", 1) for p in args.param)
+        object_store = os.path.join(tempfile.gettempdir(), "lean_local_monte_carlo", str(os.getpid()))
+        result = Engine(load_algorithm(args.strategy), args.data, parameters, object_store=object_store,
+                        start=args.start, end=args.end, quiet=True).run()
+        print(result.summary())
+        returns = daily_returns(result) if args.returns == "daily" else trade_returns(result)
+
+    for method in METHODS if args.method == "both" else (args.method,):
+        started = perf_counter()
+        stats = simulate(returns, args.sims, method, args.block, args.ruin, args.chunk, args.workers, args.seed)
+        print(format_report(returns, stats, method, args.ruin))
+        print("  %.2fs" % (perf_counter() - started))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""Several strategies in one process over one shared data feed.
+
+    python -m lean_local.multi "<strategy dir>" "<strategy dir>" ... --data DIR \\
+        [--cash 200000 --weights 0.5,0.5] [--param [N:]name=value ...] [--start --end] \\
+        [--object-store DIR] [--quiet] [--compare]
+
+Each strategy keeps its own algorithm, portfolio and runner, i.e. its own capital sleeve:
+its own SetCash, or `--weights` shares of `--cash`. The subscriptions of all sleeves go
+into one DataFeed, so a series or chain that several strategies subscribe to is read once.
+Chain snapshots are decoded once per canonical symbol, and each contract is built once
+even when the sleeves filter the chain differently. Every slice is then fanned out as a
+per-sleeve view that holds only that sleeve's symbols and its own filtered chains.
+
+--param N:name=value sets a parameter of the N-th strategy (1-based); without N it is
+set for all of them. --compare also runs each strategy alone and checks that the results
+match.
+"""
+import argparse
+from time import perf_counter
+
+from .__main__ import parse_date
+from .datasource import CsvDataSource
+from .engine import AlgorithmRunner, BacktestResult, DataFeed, Engine
+from .loader import load_algorithm
+from .market_data import DataDictionary, Slice
+
+
+class Sleeve:
+    """One strategy of the host: its engine (the algorithm's runtime), algorithm and runner"""
+
+    def __init__(self, name, engine):
+        self.name = name
+        self.engine = engine
+        self.algorithm = engine.create_algorithm()
+        self.runner = AlgorithmRunner(self.algorithm)
+        self.first = self.algorithm._time   # warm-up start; a solo run's bars end after it
+        self.end = self.algorithm._end
+        self.initial_value = None
+
+    def view(self, data):
+        """The part of a shared slice this sleeve subscribes to, or None when there is none"""
+        bars = DataDictionary()
+        quote_bars = DataDictionary()
+        chains = DataDictionary()
+        all_bars = {}
+        bar_views = data.bar_views
+        chain_views = data.chain_views
+        for subscription in self.algorithm._subscriptions:
+            if subscription.option is not None:
+                chain = chain_views.get(subscription.key)
+                if chain is not None:
+                    chains[subscription.symbol] = chain
+                continue
+            pair = bar_views.get(subscription.key)
+            if pair is None:
+                continue
+            symbol = subscription.symbol
+            bar, quote = pair
+            all_bars[symbol] = bar
+            if quote is not None:
+                quote_bars[symbol] = quote
+            else:
+                bars[symbol] = bar
+        if not (all_bars or chains):
+            return None
+        view = Slice(data.Time, bars, quote_bars, chains)
+        view.all_bars = all_bars
+        view.bar_views = bar_views
+        view.chain_views = chain_views
+        return view
+
+
+class StrategyHost:
+    """Runs several algorithm classes side by side over one deduplicated DataFeed"""
+
+    def __init__(self, strategies, data_root=None, source=None, cash=None, weights=None, object_store=None,
+                 start=None, end=None, quiet=False):
+        """strategies: [(name, algorithm class, parameters)]"""
+        self.source = source if source is not None else CsvDataSource(data_root)
+        if weights is not None and len(weights) != len(strategies):
+            raise ValueError("%d weights for %d strategies" % (len(weights), len(strategies)))
+        self.strategies = strategies
+        self.cash = cash
+        self.weights = weights
+        self.object_store = object_store
+        self.start = start
+        self.end = end
+        self.quiet = quiet
+        self.feed = None
+
+    def sleeve_cash(self):
+        """Starting cash of each sleeve (None: the strategy's own SetCash)"""
+        if self.cash is None:
+            return [None] * len(self.strategies)
+        weights = self.weights or [1.0 / len(self.strategies)] * len(self.strategies)
+        return [self.cash * weight for weight in weights]
+
+    def run(self):
+        """BacktestResult per sleeve, in the order of the strategies"""
+        sleeves = []
+        for (name, algorithm_class, parameters), cash in zip(self.strategies, self.sleeve_cash()):
+            engine = Engine(algorithm_class, source=self.source, parameters=parameters,
+                            object_store=self.object_store, start=self.start, end=self.end, quiet=self.quiet,
+                            cash=cash)
+            sleeve = Sleeve(name, engine)
+            sleeve.initial_value = sleeve.algorithm.Portfolio.TotalPortfolioValue
+            sleeves.append(sleeve)
+
+        feed = DataFeed(self.source, min(s.first for s in sleeves), max(s.end for s in sleeves))
+        # Earliest start first: a shared stream starts with the first sleeve that adds it
+        for sleeve in sorted(sleeves, key=lambda s: s.first):
+            sleeve.engine.feed = feed
+            for subscription in sleeve.algorithm._subscriptions:
+                feed.add(subscription, sleeve.first)
+        self.feed = feed
+
+        started = perf_counter()
+        for data in feed:
+            time = data.Time
+            for sleeve in sleeves:
+                if sleeve.first < time <= sleeve.end:
+                    view = sleeve.view(data)
+                    if view is not None:
+                        sleeve.runner.step(view)
+        for sleeve in sleeves:
+            sleeve.runner.finish()
+        elapsed = perf_counter() - started
+        return [BacktestResult(s.algorithm, s.runner, feed, elapsed, s.engine.logs, s.initial_value)
+                for s in sleeves]
+
+
+def combined_equity(results):
+    """[(day, total value)] of the book, carrying each sleeve's last value over days it has none"""
+    days = sorted({day for result in results for day, _ in result.daily_equity})
+    series = [dict(result.daily_equity) for result in results]
+    last = [result.initial_value for result in results]
+    combined = []
+    for day in days:
+        for k, values in enumerate(series):
+            last[k] = values.get(day, last[k])
+        combined.append((day, sum(last)))
+    return combined
+
+
+def parse_parameters(specs, count):
+    """['2:name=value', 'name=value'] -> one parameter dict per strategy"""
+    parameters = [{} for _ in range(count)]
+    for spec in specs:
+        target, _, assignment = spec.partition(":") if ":" in spec.split("=", 1)[0] else ("", "", spec)
+        name, value = assignment.split("=", 1)
+        for k in ([int(target) - 1] if target else range(count)):
+            parameters[k][name] = value
+    return parameters
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m lean_local.multi", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("strategies", nargs="+", help="strategy directories or main.py files")
+    parser.add_argument("--data", required=True, help="data root (see lean_local.datasource)")
+    parser.add_argument("--param", action="append", default=[], metavar="[N:]NAME=VALUE",
+                        help="algorithm parameter, for strategy N (1-based) or all of them")
+    parser.add_argument("--cash", type=float, help="total capital split into sleeves (default: each SetCash)")
+    parser.add_argument("--weights", help="sleeve shares of --cash, ','-separated (default: equal)")
+    parser.add_argument("--start", type=parse_date, help="override start date (YYYY-MM-DD)")
+    parser.add_argument("--end", type=parse_date, help="override end date (YYYY-MM-DD)")
+    parser.add_argument("--object-store", help="ObjectStore directory")
+    parser.add_argument("--quiet", action="store_true", help="do not echo Debug/Log output")
+    parser.add_argument("--compare", action="store_true", help="also run each strategy alone and compare")
+    args = parser.parse_args(argv)
+
+    parameters = parse_parameters(args.param, len(args.strategies))
+    strategies = [(path, load_algorithm(path), parameters[k]) for k, path in enumerate(args.strategies)]
+    weights = [float(w) for w in args.weights.split(",")] if args.weights else None
+    source = CsvDataSource(args.data)
+    host = StrategyHost(strategies, source=source, cash=args.cash, weights=weights,
+                        object_store=args.object_store, start=args.start, end=args.end, quiet=args.quiet)
+    results = host.run()
+    for (name, _, _), result in zip(strategies, results):
+        print("%s: final value %.2f | fees %.2f | orders %d | fills %d | OnData calls %d"
+              % (name, result.final_value, result.fees, result.orders, result.fills, result.on_data_calls))
+    initial = sum(r.initial_value for r in results)
+    final = sum(r.final_value for r in results)
+    equity = combined_equity(results)
+    print("Book: %.2f -> %.2f (%.2f%%) over %d days | shared feed: %d slices, %d data points | %.2fs"
+          % (initial, final, (final / initial - 1) * 100, len(equity), host.feed.slices, host.feed.data_points,
+             results[0].elapsed))
+
+    if args.compare:
+        elapsed = 0.0
+        for (name, algorithm_class, params), shared, cash in zip(strategies, results, host.sleeve_cash()):
+            alone = Engine(algorithm_class, source=source, parameters=params, object_store=args.object_store,
+                           start=args.start, end=args.end, quiet=True, cash=cash).run()
+            elapsed += alone.elapsed
+            print("%s alone: final value %.2f (%s) | %d data points | %.2fs"
+                  % (name, alone.final_value, "same" if abs(alone.final_value - shared.final_value) < 1e-6
+                     else "differs by %.2f" % (shared.final_value - alone.final_value),
+                     alone.data_points, alone.elapsed))
+        print("Separate runs: %.2fs in total" % elapsed)
+
+
+if __name__ == "__main__":
+    main()
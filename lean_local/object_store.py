@@ -0,0 +1,43 @@
+"""Directory-backed ObjectStore."""
+import os
+import tempfile
+
+DEFAULT_ROOT = os.path.join(tempfile.gettempdir(), "lean_local_object_store")
+
+
+class ObjectStore:
+    def __init__(self, root=None):
+        self.root = root or DEFAULT_ROOT
+
+    def GetFilePath(self, key):
+        path = os.path.join(self.root, *key.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+    def ContainsKey(self, key):
+        return os.path.exists(os.path.join(self.root, *key.split("/")))
+
+    def Read(self, key):
+        with open(self.GetFilePath(key)) as f:
+            return f.read()
+
+    def ReadBytes(self, key):
+        with open(self.GetFilePath(key), "rb") as f:
+            return f.read()
+
+    def Save(self, key, text):
+        with open(self.GetFilePath(key), "w") as f:
+            f.write(text)
+        return True
+
+    def SaveBytes(self, key, data):
+        with open(self.GetFilePath(key), "wb") as f:
+            f.write(data)
+        return True
+
+    def Delete(self, key):
+        path = os.path.join(self.root, *key.split("/"))
+        if os.path.exists(path):
+            os.remove(path)
+            return True
+        return False
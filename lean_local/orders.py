@@ -0,0 +1,198 @@
+"""Orders, tickets, order events and fee models."""
+from .enums import OrderStatus, OrderDirection, SecurityType, BrokerageName
+from .symbols import OPTION_TYPES
+
+
+class CashAmount:
+    __slots__ = ("Amount", "Currency")
+
+    def __init__(self, amount, currency="USD"):
+        self.Amount = amount
+        self.Currency = currency
+
+
+class OrderFee:
+    __slots__ = ("Value",)
+
+    def __init__(self, cash_amount):
+        self.Value = cash_amount
+
+
+OrderFee.Zero = OrderFee(CashAmount(0.0, "USD"))
+
+
+class Order:
+    __slots__ = ("Id", "Symbol", "Quantity", "Type", "Status", "Time", "LimitPrice", "StopPrice",
+                 "Tag", "filled", "fill_value", "group", "ratio")
+
+    def __init__(self, order_id, symbol, quantity, order_type, time, limit_price=None,
+                 stop_price=None, tag="", group=None, ratio=None):
+        self.Id = order_id
+        self.Symbol = symbol
+        self.Quantity = quantity
+        self.Type = order_type
+        self.Status = OrderStatus.New
+        self.Time = time
+        self.LimitPrice = limit_price
+        self.StopPrice = stop_price
+        self.Tag = tag
+        self.filled = 0
+        self.fill_value = 0.0
+        self.group = group   # combo group shared by all legs of a combo order
+        self.ratio = ratio   # leg ratio within a combo
+
+    @property
+    def AbsoluteQuantity(self):
+        return abs(self.Quantity)
+
+    @property
+    def Direction(self):
+        return OrderDirection.Buy if self.Quantity > 0 else OrderDirection.Sell
+
+    @property
+    def is_open(self):
+        return self.Status in (OrderStatus.New, OrderStatus.Submitted, OrderStatus.PartiallyFilled)
+
+
+class Leg:
+    """One leg of a combo order: symbol and quantity per unit of the combo"""
+    __slots__ = ("Symbol", "Quantity", "OrderPrice")
+
+    def __init__(self, symbol, quantity, order_price=None):
+        self.Symbol = symbol
+        self.Quantity = quantity
+        self.OrderPrice = order_price
+
+    @staticmethod
+    def Create(symbol, quantity, limit_price=None):
+        return Leg(symbol, quantity, limit_price)
+
+
+class GroupOrderManager:
+    """Shared state of the leg orders making up one combo order"""
+    __slots__ = ("Id", "Quantity", "Count", "LimitPrice", "OrderIds")
+
+    def __init__(self, group_id, count, quantity, limit_price=None):
+        self.Id = group_id
+        self.Quantity = quantity
+        self.Count = count
+        self.LimitPrice = limit_price
+        self.OrderIds = []
+
+
+class OrderTicket:
+    """Handle returned by order methods"""
+
+    def __init__(self, transactions, order):
+        self.transactions = transactions
+        self.order = order
+
+    @property
+    def OrderId(self):
+        return self.order.Id
+
+    @property
+    def Symbol(self):
+        return self.order.Symbol
+
+    @property
+    def Status(self):
+        return self.order.Status
+
+    @property
+    def Quantity(self):
+        return self.order.Quantity
+
+    @property
+    def QuantityFilled(self):
+        return self.order.filled
+
+    @property
+    def AverageFillPrice(self):
+        return self.order.fill_value / self.order.filled if self.order.filled else 0.0
+
+    @property
+    def Tag(self):
+        return self.order.Tag
+
+    def Cancel(self, tag=None):
+        return self.transactions.CancelOrder(self.order.Id, tag)
+
+    def __repr__(self):
+        return "OrderTicket(%d %s %s %s)" % (self.order.Id, self.order.Symbol, self.order.Quantity,
+                                            self.order.Status.name)
+
+
+class OrderEvent:
+    __slots__ = ("OrderId", "Symbol", "Status", "FillPrice", "FillQuantity", "Quantity", "OrderFee",
+                 "Direction", "IsAssignment", "Message", "UtcTime", "LimitPrice", "StopPrice")
+
+    def __init__(self, order, status, time, fill_price=0.0, fill_quantity=0, fee=OrderFee.Zero,
+                 message=""):
+        self.OrderId = order.Id
+        self.Symbol = order.Symbol
+        self.Status = status
+        self.FillPrice = fill_price
+        self.FillQuantity = fill_quantity
+        self.Quantity = order.Quantity
+        self.OrderFee = fee
+        self.Direction = order.Direction
+        self.IsAssignment = False
+        self.Message = message
+        self.UtcTime = time
+        self.LimitPrice = order.LimitPrice
+        self.StopPrice = order.StopPrice
+
+    def __repr__(self):
+        return "OrderEvent(%d %s %s %s @ %s)" % (self.OrderId, self.Symbol, self.Status.name,
+                                               self.FillQuantity, self.FillPrice)
+
+
+class OrderFeeParameters:
+    __slots__ = ("Security", "Order")
+
+    def __init__(self, security, order):
+        self.Security = security
+        self.Order = order
+
+
+class FeeModel:
+    """Base fee model; subclasses override GetOrderFee"""
+
+    def GetOrderFee(self, parameters):
+        return OrderFee(CashAmount(0.0, "USD"))
+
+
+class ConstantFeeModel(FeeModel):
+    def __init__(self, fee, currency="USD"):
+        self.fee = fee
+        self.currency = currency
+
+    def GetOrderFee(self, parameters):
+        return OrderFee(CashAmount(self.fee, self.currency))
+
+
+class InteractiveBrokersFeeModel(FeeModel):
+    """Simplified IB fixed-rate schedule"""
+
+    def GetOrderFee(self, parameters):
+        security = parameters.Security
+        quantity = abs(parameters.Order.Quantity)
+        if security.Type in OPTION_TYPES:
+            fee = 0.65 * quantity
+        elif security.Type == SecurityType.Forex:
+            fee = max(2.0, 0.00002 * quantity * security.Price)
+        else:
+            value = quantity * security.Price
+            fee = min(max(1.0, 0.005 * quantity), 0.01 * value) if value else 0.0
+        return OrderFee(CashAmount(fee, "USD"))
+
+
+def brokerage_fee_model(brokerage_name, security_type=None):
+    """Fee model the brokerage model assigns to a security type"""
+    if brokerage_name == BrokerageName.InteractiveBrokersBrokerage:
+        return InteractiveBrokersFeeModel()
+    # LEAN's default brokerage model charges IB fees on equities and options only
+    if security_type == SecurityType.Equity or security_type in OPTION_TYPES:
+        return InteractiveBrokersFeeModel()
+    return FeeModel()
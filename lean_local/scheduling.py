@@ -0,0 +1,146 @@
+"""DateRules/TimeRules and the scheduled-event manager."""
+from datetime import datetime, time, timedelta
+
+from common.trading_calendar import get_calendar
+
+from .enums import SecurityType
+
+MARKET_OPEN = time(9, 30)
+MARKET_CLOSE = time(16, 0)
+EARLY_CLOSE = time(13, 0)
+
+
+def market_hours(symbol, day):
+    """(open, close) datetimes of the regular session, or None when closed"""
+    if symbol is not None and symbol.SecurityType in (SecurityType.Forex, SecurityType.Crypto, SecurityType.Cfd):
+        if day.weekday() >= 5:
+            return None
+        start = datetime(day.year, day.month, day.day)
+        return start, start + timedelta(days=1)
+    calendar = get_calendar()
+    flags = calendar.flags(day)
+    if flags:
+        if not calendar.is_trading_day(day):
+            return None
+    elif day.weekday() >= 5:
+        return None
+    close = EARLY_CLOSE if calendar.is_early_close(day) else MARKET_CLOSE
+    return datetime.combine(day, MARKET_OPEN), datetime.combine(day, close)
+
+
+class DateRule:
+    def __init__(self, name, predicate):
+        self.name = name
+        self.predicate = predicate
+
+    def matches(self, day):
+        return self.predicate(day)
+
+
+class DateRules:
+    @staticmethod
+    def EveryDay(symbol=None):
+        if symbol is None:
+            return DateRule("EveryDay", lambda day: True)
+        return DateRule("EveryDay(%s)" % symbol, lambda day: market_hours(symbol, day) is not None)
+
+    @staticmethod
+    def WeekStart(symbol=None):
+        def first_of_week(day):
+            if market_hours(symbol, day) is None:
+                return False
+            for back in range(1, day.weekday() + 1):
+                if market_hours(symbol, day - timedelta(days=back)) is not None:
+                    return False
+            return True
+        return DateRule("WeekStart", first_of_week)
+
+    @staticmethod
+    def MonthStart(symbol=None):
+        def first_of_month(day):
+            if market_hours(symbol, day) is None:
+                return False
+            for back in range(1, day.day):
+                if market_hours(symbol, day - timedelta(days=back)) is not None:
+                    return False
+            return True
+        return DateRule("MonthStart", first_of_month)
+
+
+class TimeRule:
+    def __init__(self, name, resolve):
+        self.name = name
+        self.resolve = resolve
+
+    def time_on(self, day):
+        return self.resolve(day)
+
+    def times_on(self, day):
+        """Every firing time on `day` (rules such as Every fire more than once)"""
+        at = self.resolve(day)
+        if at is None:
+            return ()
+        return at if isinstance(at, list) else (at,)
+
+
+class TimeRules:
+    @staticmethod
+    def At(hour, minute, second=0):
+        at = time(hour, minute, second)
+        return TimeRule("At(%s)" % at, lambda day: datetime.combine(day, at))
+
+    @staticmethod
+    def AfterMarketOpen(symbol, minutes_after_open=0):
+        def resolve(day):
+            hours = market_hours(symbol, day)
+            return hours[0] + timedelta(minutes=minutes_after_open) if hours else None
+        return TimeRule("AfterMarketOpen", resolve)
+
+    @staticmethod
+    def BeforeMarketClose(symbol, minutes_before_close=0):
+        def resolve(day):
+            hours = market_hours(symbol, day)
+            return hours[1] - timedelta(minutes=minutes_before_close) if hours else None
+        return TimeRule("BeforeMarketClose", resolve)
+
+    @staticmethod
+    def Every(interval):
+        def resolve(day):
+            start = datetime.combine(day, time(0))
+            count = int(timedelta(days=1) / interval)
+            return [start + interval * k for k in range(count)]
+        return TimeRule("Every(%s)" % interval, resolve)
+
+    @staticmethod
+    def Midnight():
+        return TimeRule("Midnight", lambda day: datetime.combine(day, time(0)))
+
+
+class ScheduledEvent:
+    __slots__ = ("date_rule", "time_rule", "callback", "seq")
+
+    def __init__(self, date_rule, time_rule, callback, seq):
+        self.date_rule = date_rule
+        self.time_rule = time_rule
+        self.callback = callback
+        self.seq = seq
+
+
+class ScheduleManager:
+    def __init__(self):
+        self.events = []
+
+    def On(self, date_rule, time_rule, callback):
+        event = ScheduledEvent(date_rule, time_rule, callback, len(self.events))
+        self.events.append(event)
+        return event
+
+    def occurrences(self, day):
+        """(time, seq, callback) for every event firing on `day`, in time order"""
+        result = []
+        for event in self.events:
+            if event.date_rule.matches(day):
+                for at in event.time_rule.times_on(day):
+                    result.append((at, event.seq, event.callback))
+        result.sort(key=lambda item: (item[0], item[1]))
+        return result
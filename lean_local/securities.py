@@ -0,0 +1,387 @@
+"""Securities, holdings, cash and the portfolio manager."""
+from datetime import timedelta
+from types import SimpleNamespace
+
+import numpy as np
+
+from .enums import OptionRight
+from .orders import FeeModel, brokerage_fee_model
+from .symbols import OPTION_TYPES
+
+USD = SimpleNamespace(Symbol="USD")
+
+
+class Security:
+    __slots__ = ("Symbol", "Type", "Resolution", "Price", "Open", "High", "Low", "Close", "Volume",
+                 "BidPrice", "AskPrice", "FeeModel", "multiplier", "Holdings", "HasData", "Expiry",
+                 "LocalTime")
+
+    def __init__(self, symbol, resolution):
+        self.Symbol = symbol
+        self.Type = symbol.SecurityType
+        self.Resolution = resolution
+        self.Price = 0.0
+        self.Open = self.High = self.Low = self.Close = 0.0
+        self.Volume = 0.0
+        self.BidPrice = 0.0
+        self.AskPrice = 0.0
+        self.FeeModel = FeeModel()
+        self.multiplier = 100 if symbol.SecurityType in OPTION_TYPES else 1
+        self.Holdings = None
+        self.HasData = False
+        self.Expiry = symbol.expiry
+        self.LocalTime = None
+
+    @property
+    def QuoteCurrency(self):
+        return USD
+
+    @property
+    def SymbolProperties(self):
+        return SimpleNamespace(ContractMultiplier=self.multiplier, LotSize=1, MinimumPriceVariation=0.01)
+
+    @property
+    def Invested(self):
+        return self.Holdings.Quantity != 0
+
+    def SetFeeModel(self, fee_model):
+        self.FeeModel = fee_model
+
+    def update_bar(self, bar):
+        self.Open = bar.Open
+        self.High = bar.High
+        self.Low = bar.Low
+        self.Close = self.Price = bar.Close
+        self.Volume = getattr(bar, "Volume", 0.0)
+        self.HasData = True
+
+    def update_quote(self, bid, ask, last=0.0):
+        self.BidPrice = bid
+        self.AskPrice = ask
+        if bid > 0 and ask > 0:
+            self.Close = self.Price = (bid + ask) / 2
+        elif last > 0:
+            self.Close = self.Price = last
+        self.HasData = True
+
+    def __repr__(self):
+        return "Security(%s @ %s)" % (self.Symbol, self.Price)
+
+
+class SecurityHolding:
+    __slots__ = ("Symbol", "security", "Quantity", "AveragePrice", "TotalFees", "NetProfit")
+
+    def __init__(self, security):
+        self.Symbol = security.Symbol
+        self.security = security
+        self.Quantity = 0
+        self.AveragePrice = 0.0
+        self.TotalFees = 0.0
+        self.NetProfit = 0.0
+
+    @property
+    def Invested(self):
+        return self.Quantity != 0
+
+    @property
+    def IsLong(self):
+        return self.Quantity > 0
+
+    @property
+    def IsShort(self):
+        return self.Quantity < 0
+
+    @property
+    def AbsoluteQuantity(self):
+        return abs(self.Quantity)
+
+    @property
+    def Price(self):
+        return self.security.Price
+
+    @property
+    def HoldingsValue(self):
+        return self.Quantity * self.security.Price * self.security.multiplier
+
+    @property
+    def AbsoluteHoldingsValue(self):
+        return abs(self.HoldingsValue)
+
+    @property
+    def HoldingsCost(self):
+        return self.Quantity * self.AveragePrice * self.security.multiplier
+
+    @property
+    def UnrealizedProfit(self):
+        return self.HoldingsValue - self.HoldingsCost
+
+    def apply_fill(self, quantity, price):
+        """Update quantity/average price; returns realized profit"""
+        multiplier = self.security.multiplier
+        realized = 0.0
+        old = self.Quantity
+        new = old + quantity
+        if old == 0 or (old > 0) == (quantity > 0):
+            # Opening or adding
+            self.AveragePrice = (self.AveragePrice * abs(old) + price * abs(quantity)) / abs(new)
+        else:
+            closed = min(abs(quantity), abs(old))
+            direction = 1 if old > 0 else -1
+            realized = (price - self.AveragePrice) * closed * direction * multiplier
+            if new == 0:
+                self.AveragePrice = 0.0
+            elif (new > 0) != (old > 0):
+                # Flipped through zero
+                self.AveragePrice = price
+        self.Quantity = new
+        self.NetProfit += realized
+        return realized
+
+
+class Cash:
+    __slots__ = ("Symbol", "Amount")
+
+    def __init__(self, symbol, amount):
+        self.Symbol = symbol
+        self.Amount = amount
+
+    def AddAmount(self, amount):
+        self.Amount += amount
+        return self.Amount
+
+    def SetAmount(self, amount):
+        self.Amount = amount
+
+
+class CashBook(dict):
+    def __init__(self, amount=0.0):
+        super().__init__()
+        self["USD"] = Cash("USD", amount)
+
+    @property
+    def TotalValueInAccountCurrency(self):
+        return sum(c.Amount for c in self.values())
+
+
+class KeyValuePair:
+    __slots__ = ("Key", "Value")
+
+    def __init__(self, key, value):
+        self.Key = key
+        self.Value = value
+
+
+class SecurityManager(dict):
+    """Symbol -> Security, with LEAN-style helpers"""
+
+    def ContainsKey(self, symbol):
+        return symbol in self
+
+    @property
+    def Keys(self):
+        return list(self.keys())
+
+    @property
+    def Values(self):
+        return list(self.values())
+
+    @property
+    def Count(self):
+        return len(self)
+
+    def __iter__(self):
+        for symbol, security in dict.items(self):
+            yield KeyValuePair(symbol, security)
+
+
+class SecurityPortfolioManager:
+    def __init__(self, securities):
+        self.securities = securities
+        self.CashBook = CashBook()
+        self.invested = {}  # symbol -> holding, only non-zero positions
+        self.TotalFees = 0.0
+        self.realized = 0.0
+
+    def __getitem__(self, symbol):
+        return self.securities[symbol].Holdings
+
+    def __contains__(self, symbol):
+        return symbol in self.securities
+
+    def ContainsKey(self, symbol):
+        return symbol in self.securities
+
+    def __iter__(self):
+        for symbol, security in dict.items(self.securities):
+            yield KeyValuePair(symbol, security.Holdings)
+
+    @property
+    def Keys(self):
+        return list(self.securities.keys())
+
+    @property
+    def Values(self):
+        return [s.Holdings for s in self.securities.values()]
+
+    @property
+    def Cash(self):
+        return self.CashBook["USD"].Amount
+
+    def SetCash(self, amount):
+        self.CashBook["USD"].SetAmount(float(amount))
+
+    @property
+    def Invested(self):
+        return bool(self.invested)
+
+    @property
+    def TotalHoldingsValue(self):
+        return sum(h.HoldingsValue for h in self.invested.values())
+
+    @property
+    def TotalAbsoluteHoldingsCost(self):
+        return sum(abs(h.HoldingsCost) for h in self.invested.values())
+
+    @property
+    def TotalUnrealizedProfit(self):
+        return sum(h.UnrealizedProfit for h in self.invested.values())
+
+    @property
+    def TotalProfit(self):
+        return self.realized
+
+    @property
+    def TotalNetProfit(self):
+        return self.realized - self.TotalFees
+
+    @property
+    def TotalPortfolioValue(self):
+        value = self.CashBook["USD"].Amount
+        for holding in self.invested.values():
+            security = holding.security
+            value += holding.Quantity * security.Price * security.multiplier
+        return value
+
+    @property
+    def MarginRemaining(self):
+        return self.TotalPortfolioValue - sum(abs(h.HoldingsValue) for h in self.invested.values())
+
+    def apply_fill(self, security, quantity, price, fee):
+        holding = security.Holdings
+        self.realized += holding.apply_fill(quantity, price)
+        holding.TotalFees += fee
+        self.TotalFees += fee
+        self.CashBook["USD"].Amount -= quantity * price * security.multiplier + fee
+        if holding.Quantity == 0:
+            self.invested.pop(security.Symbol, None)
+        else:
+            self.invested[security.Symbol] = holding
+
+
+class OptionFilterUniverse:
+    """Records the filter chain; applied numerically to each chain snapshot"""
+
+    def __init__(self):
+        self.min_expiry = 0
+        self.max_expiry = 35
+        self.min_strike = None
+        self.max_strike = None
+        self.rights = None
+
+    def IncludeWeeklys(self):
+        return self
+
+    def WeeklysOnly(self):
+        return self
+
+    def OnlyApplyFilterAtMarketOpen(self):
+        return self
+
+    def Expiration(self, min_expiry, max_expiry):
+        self.min_expiry = min_expiry.days if isinstance(min_expiry, timedelta) else int(min_expiry)
+        self.max_expiry = max_expiry.days if isinstance(max_expiry, timedelta) else int(max_expiry)
+        return self
+
+    def Strikes(self, min_strike, max_strike):
+        self.min_strike = int(min_strike)
+        self.max_strike = int(max_strike)
+        return self
+
+    def CallsOnly(self):
+        self.rights = OptionRight.Call
+        return self
+
+    def PutsOnly(self):
+        self.rights = OptionRight.Put
+        return self
+
+    def select(self, expiry_days, rights, strikes, underlying_price):
+        """Boolean mask over a snapshot's contracts"""
+        mask = (expiry_days >= self.min_expiry) & (expiry_days <= self.max_expiry)
+        if self.rights is not None:
+            mask &= rights == int(self.rights)
+        if self.min_strike is not None and underlying_price > 0 and mask.any():
+            unique = np.unique(strikes[mask])
+            atm = int(np.abs(unique - underlying_price).argmin())
+            lo = unique[max(atm + self.min_strike, 0)]
+            hi = unique[min(atm + self.max_strike, len(unique) - 1)]
+            mask &= (strikes >= lo) & (strikes <= hi)
+        return mask
+
+    def key(self):
+        return (self.min_expiry, self.max_expiry, self.min_strike, self.max_strike, self.rights)
+
+
+class Option:
+    """Object returned by AddIndexOption/AddOption"""
+
+    def __init__(self, symbol, resolution):
+        self.Symbol = symbol
+        self.Resolution = resolution
+        self.filter = OptionFilterUniverse()
+
+    @property
+    def Underlying(self):
+        return self.Symbol.Underlying
+
+    def SetFilter(self, *args):
+        """SetFilter(func) or SetFilter(min_strike, max_strike, min_expiry, max_expiry)"""
+        universe = OptionFilterUniverse()
+        if len(args) == 1:
+            result = args[0](universe)
+            self.filter = result if result is not None else universe
+        else:
+            min_strike, max_strike, min_expiry, max_expiry = args
+            self.filter = universe.Strikes(min_strike, max_strike).Expiration(min_expiry, max_expiry)
+
+
+class BrokerageModelSecurityInitializer:
+    """Applies the brokerage model's fee model and seeds prices"""
+
+    def __init__(self, brokerage_model, security_seeder=None):
+        self.brokerage_model = brokerage_model
+        self.security_seeder = security_seeder
+
+    def Initialize(self, security):
+        security.SetFeeModel(brokerage_fee_model(self.brokerage_model.name, security.Type))
+        if self.security_seeder is not None:
+            self.security_seeder.SeedSecurity(security)
+
+
+class FuncSecuritySeeder:
+    def __init__(self, func):
+        self.func = func
+
+    def SeedSecurity(self, security):
+        for data in self.func(security) or ():
+            security.update_bar(data)
+        return True
+
+
+class BrokerageModel:
+    def __init__(self, name, account_type):
+        self.name = name
+        self.AccountType = account_type
+
+    def __repr__(self):
+        return "BrokerageModel(%s)" % self.name.name
@@ -0,0 +1,18 @@
+"""Local stand-in for LEAN's AlgorithmImports (see lean_local)."""
+from datetime import datetime, date, time, timedelta
+
+import numpy as np
+import pandas as pd
+
+from lean_local.algorithm import QCAlgorithm
+from lean_local.enums import (Resolution, SecurityType, OptionRight, OrderType, OrderStatus, OrderDirection,
+                              BrokerageName, AccountType, Market)
+from lean_local.indicators import (IndicatorDataPoint, SimpleMovingAverage, ExponentialMovingAverage,
+                                   RollingWindow, TradeBarConsolidator, QuoteBarConsolidator)
+from lean_local.market_data import Bar, TradeBar, QuoteBar, Greeks, OptionContract, OptionChain, Slice
+from lean_local.orders import (CashAmount, OrderFee, Order, OrderTicket, OrderEvent, OrderFeeParameters,
+                               FeeModel, ConstantFeeModel, InteractiveBrokersFeeModel, Leg, GroupOrderManager)
+from lean_local.scheduling import DateRules, TimeRules
+from lean_local.securities import (Security, SecurityHolding, OptionFilterUniverse, BrokerageModelSecurityInitializer,
+                                   FuncSecuritySeeder, BrokerageModel)
+from lean_local.symbols import Symbol
@@ -0,0 +1 @@
+from lean_local.enums import BrokerageName
@@ -0,0 +1,3 @@
+from lean_local.enums import (Resolution, SecurityType, OptionRight, OrderType, OrderStatus, OrderDirection,
+                              AccountType, Market)
+from lean_local.symbols import Symbol
@@ -0,0 +1,211 @@
+"""Parameter sweeps over local cores.
+
+    python -m lean_local.sweep "<strategy dir>" --data DIR --grid bp_spread=10,15,20 \\
+        --grid profit_target_pct=0.2,0.25,0.3 [--samples N] [--workers N] [--results FILE]
+
+Every combination (or a random sample of `--samples` combinations) is run as a separate
+backtest with the values passed as algorithm parameters. The parent loads all bars and
+chain days the strategy subscribes to before forking, so workers read the same pages instead
+of parsing their own copies. Each finished run is appended to the results file immediately;
+rerunning the same command skips combinations already in it and retries the ones that
+failed. Rows are tagged with the strategy, dates, data and (when sampling) the seed they
+were run with, so rows from a different setup sharing the file are never mistaken for
+finished runs.
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import tempfile
+import numpy as np
+
+from .__main__ import parse_date
+from .datasource import CsvDataSource
+from .engine import Engine
+from .loader import load_algorithm
+
+TRADING_DAYS = 252
+RANKINGS = {"return": True, "sharpe": True, "max_drawdown": False, "final_value": True}
+
+# Set in the parent before the pool forks; rebuilt per worker where fork is unavailable
+_shared = None
+
+
+class SweepData:
+    """Strategy class and preloaded data shared with the workers"""
+
+    def __init__(self, strategy, data_root, start=None, end=None):
+        self.strategy = strategy
+        self.data_root = data_root
+        self.start = start
+        self.end = end
+        self.algorithm_class = load_algorithm(strategy)
+        self.source = CsvDataSource(data_root)
+
+    def preload(self):
+        """Read every subscribed series and chain day into the source's caches"""
+        engine = Engine(self.algorithm_class, source=self.source, start=self.start, end=self.end, quiet=True)
+        algorithm = engine.create_algorithm()
+        first_day = algorithm.Time.date()
+        for subscription in algorithm._subscriptions:
+            if subscription.option is None:
+                self.source.bars(subscription.symbol, subscription.resolution)
+            else:
+                self.source.preload_chains(subscription.symbol.ticker, first_day, algorithm.EndDate.date())
+
+
+def _init_worker(strategy, data_root, start, end):
+    global _shared
+    if _shared is None:
+        _shared = SweepData(strategy, data_root, start, end)
+
+
+def summarize(result, initial_value):
+    """Ranking metrics from a BacktestResult"""
+    equity = np.array([value for _, value in result.daily_equity], dtype=np.float64)
+    summary = {
+        "final_value": round(result.final_value, 2),
+        "return": round(result.final_value / initial_value - 1, 6),
+        "sharpe": None,
+        "max_drawdown": 0.0,
+        "orders": result.orders,
+        "fees": round(result.fees, 2),
+    }
+    if len(equity) > 1:
+        returns = np.diff(equity) / equity[:-1]
+        std = returns.std(ddof=1)
+        summary["sharpe"] = round(float(returns.mean() / std * np.sqrt(TRADING_DAYS)), 4) if std > 0 else None
+        summary["max_drawdown"] = round(float(np.max(1 - equity / np.maximum.accumulate(equity))), 6)
+    return summary
+
+
+def run_one(parameters):
+    """Worker entry point: one backtest, returned as a results row"""
+    # Per-worker ObjectStore so concurrent runs never write the same files (e.g. trade journals)
+    object_store = os.path.join(tempfile.gettempdir(), "lean_local_sweep", str(os.getpid()))
+    engine = Engine(_shared.algorithm_class, source=_shared.source, parameters=parameters,
+                    start=_shared.start, end=_shared.end, object_store=object_store, quiet=True)
+    try:
+        result = engine.run()
+    except Exception as e:
+        return {"parameters": parameters, "error": "%s: %s" % (type(e).__name__, e)}
+    return {"parameters": parameters, "metrics": summarize(result, result.initial_value),
+            "elapsed_s": round(result.elapsed, 2)}
+
+
+def parse_grid(specs):
+    """['a=1,2', 'b=x;y,z'] -> {'a': ['1', '2'], 'b': ['x', 'y,z']} (';' separates values containing commas)"""
+    grid = {}
+    for spec in specs:
+        name, values = spec.split("=", 1)
+        grid[name] = values.split(";") if ";" in values else values.split(",")
+    return grid
+
+
+def combinations(grid, samples=None, seed=0):
+    names = sorted(grid)
+    combos = [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+    if samples is not None and samples < len(combos):
+        combos = random.Random(seed).sample(combos, samples)
+    return combos
+
+
+def key(parameters):
+    return json.dumps(parameters, sort_keys=True)
+
+
+def setup(strategy, data_root, start=None, end=None, samples=None, seed=0):
+    """What a results row was run with besides its parameters (the seed only matters when sampling)"""
+    run_setup = {"strategy": os.path.abspath(strategy), "start": start and start.strftime("%Y-%m-%d"),
+                 "end": end and end.strftime("%Y-%m-%d"), "data": CsvDataSource(data_root).cache_id}
+    if samples is not None:
+        run_setup["seed"] = seed
+    return run_setup
+
+
+def load_done(path, run_setup):
+    """Finished rows of the results file run with run_setup, by parameter key (failed runs are left out)"""
+    done = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    row = json.loads(line)
+                    if row.get("setup") == run_setup and "error" not in row:
+                        done[key(row["parameters"])] = row
+    return done
+
+
+def rank(rows, by="sharpe"):
+    descending = RANKINGS[by]
+    scored = [r for r in rows if "metrics" in r and r["metrics"].get(by) is not None]
+    return sorted(scored, key=lambda r: r["metrics"][by], reverse=descending)
+
+
+def format_table(rows, names, top=20):
+    header = names + ["return", "sharpe", "max_dd", "orders"]
+    lines = ["  ".join("%-14s" % h for h in header)]
+    for row in rows[:top]:
+        m = row["metrics"]
+        cells = [row["parameters"].get(n, "") for n in names]
+        cells += ["%.2f%%" % (m["return"] * 100), m["sharpe"], "%.2f%%" % (m["max_drawdown"] * 100), m["orders"]]
+        lines.append("  ".join("%-14s" % c for c in cells))
+    return "\n".join(lines)
+
+
+def sweep(strategy, data_root, grid, results, samples=None, seed=0, workers=None, start=None, end=None):
+    """Run the missing combinations; returns every row in the results file"""
+    global _shared
+    run_setup = setup(strategy, data_root, start, end, samples, seed)
+    done = load_done(results, run_setup)
+    pending = [p for p in combinations(grid, samples, seed) if key(p) not in done]
+    finished = 0
+    if pending:
+        context = multiprocessing.get_context("fork") if "fork" in multiprocessing.get_all_start_methods() \
+            else multiprocessing.get_context()
+        if context.get_start_method() == "fork":
+            _shared = SweepData(strategy, data_root, start, end)
+            _shared.preload()
+        with context.Pool(workers or os.cpu_count(), initializer=_init_worker,
+                          initargs=(strategy, data_root, start, end)) as pool, open(results, "a") as out:
+            for row in pool.imap_unordered(run_one, pending):
+                row["setup"] = run_setup
+                out.write(json.dumps(row) + "\n")
+                out.flush()
+                done[key(row["parameters"])] = row
+                finished += 1
+                status = row.get("error") or "return %.2f%%" % (row["metrics"]["return"] * 100)
+                print("%d/%d %s %s" % (finished, len(pending), key(row["parameters"]), status))
+    return list(done.values())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m lean_local.sweep", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("strategy", help="strategy directory or main.py")
+    parser.add_argument("--data", required=True, help="data root (see lean_local.datasource)")
+    parser.add_argument("--grid", action="append", default=[], metavar="NAME=V1,V2,...",
+                        help="parameter values to sweep (repeatable; separate with ';' if values contain ',')")
+    parser.add_argument("--samples", type=int, help="run a random sample of this many combinations")
+    parser.add_argument("--seed", type=int, default=0, help="sampling seed")
+    parser.add_argument("--workers", type=int, help="worker processes (default: all cores)")
+    parser.add_argument("--results", default="sweep_results.jsonl", help="JSONL results file (resumable)")
+    parser.add_argument("--rank-by", choices=sorted(RANKINGS), default="sharpe")
+    parser.add_argument("--top", type=int, default=20, help="rows in the ranked table")
+    parser.add_argument("--start", type=parse_date, help="override start date (YYYY-MM-DD)")
+    parser.add_argument("--end", type=parse_date, help="override end date (YYYY-MM-DD)")
+    args = parser.parse_args(argv)
+
+    grid = parse_grid(args.grid)
+    rows = sweep(args.strategy, args.data, grid, args.results, args.samples, args.seed, args.workers,
+                 args.start, args.end)
+    errors = [r for r in rows if "error" in r]
+    if errors:
+        print("%d runs failed, e.g. %s: %s" % (len(errors), key(errors[0]["parameters"]), errors[0]["error"]))
+    print(format_table(rank(rows, args.rank_by), sorted(grid), args.top))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Interned symbols for securities and option contracts."""
+from datetime import datetime
+from types import SimpleNamespace
+
+from .enums import SecurityType, OptionRight
+
+OPTION_TYPES = (SecurityType.Option, SecurityType.IndexOption)
+
+
+class Symbol:
+    """Immutable, interned security identifier (compare and hash by identity)"""
+    __slots__ = ("Value", "SecurityType", "Underlying", "ticker", "market",
+                 "expiry", "right", "strike", "__weakref__")
+
+    _cache = {}
+
+    def __init__(self, value, security_type, ticker, market, underlying=None,
+                 expiry=None, right=None, strike=None):
+        self.Value = value
+        self.SecurityType = security_type
+        self.ticker = ticker
+        self.market = market
+        self.Underlying = underlying
+        self.expiry = expiry
+        self.right = right
+        self.strike = strike
+
+    @classmethod
+    def Create(cls, ticker, security_type, market="usa"):
+        key = (ticker.upper(), security_type, market)
+        symbol = cls._cache.get(key)
+        if symbol is None:
+            symbol = cls(ticker.upper(), security_type, ticker.upper(), market)
+            cls._cache[key] = symbol
+        return symbol
+
+    @classmethod
+    def CreateCanonicalOption(cls, underlying, target, security_type):
+        """Canonical chain symbol, e.g. ?SPXW"""
+        key = ("?" + target.upper(), security_type, underlying)
+        symbol = cls._cache.get(key)
+        if symbol is None:
+            symbol = cls("?" + target.upper(), security_type, target.upper(),
+                         underlying.market, underlying=underlying)
+            cls._cache[key] = symbol
+        return symbol
+
+    @classmethod
+    def CreateOption(cls, underlying, target, security_type, expiry, right, strike):
+        """Contract symbol; expiry is a date, strike a float"""
+        key = (target, security_type, expiry, right, strike, underlying)
+        symbol = cls._cache.get(key)
+        if symbol is None:
+            value = "%-6s%s%s%08d" % (target.upper(), expiry.strftime("%y%m%d"),
+                                      "C" if right == OptionRight.Call else "P",
+                                      int(round(strike * 1000)))
+            symbol = cls(value, security_type, target.upper(), underlying.market,
+                         underlying=underlying, expiry=expiry, right=right, strike=strike)
+            cls._cache[key] = symbol
+        return symbol
+
+    @property
+    def HasUnderlying(self):
+        return self.Underlying is not None
+
+    @property
+    def IsCanonical(self):
+        return self.Value.startswith("?")
+
+    @property
+    def ID(self):
+        date = datetime(self.expiry.year, self.expiry.month, self.expiry.day) if self.expiry else None
+        return SimpleNamespace(Symbol=self.ticker, Market=self.market, SecurityType=self.SecurityType,
+                               Date=date, OptionRight=self.right, StrikePrice=self.strike)
+
+    def __str__(self):
+        return self.Value
+
+    def __repr__(self):
+        return "Symbol(%s)" % self.Value
+
+    def __reduce__(self):
+        # Re-intern on unpickle so identity comparisons keep working across processes
+        if self.expiry is not None:
+            return (Symbol.CreateOption, (self.Underlying, self.ticker, self.SecurityType,
+                                          self.expiry, self.right, self.strike))
+        if self.Underlying is not None:
+            return (Symbol.CreateCanonicalOption, (self.Underlying, self.ticker, self.SecurityType))
+        return (Symbol.Create, (self.ticker, self.SecurityType, self.market))
@@ -0,0 +1,167 @@
+"""Deterministic synthetic bars and option chains of controllable size.
+
+SyntheticDataSource is a drop-in replacement for CsvDataSource: prices are seeded random
+walks (one seed per symbol, so reruns see identical data; daily bars are aggregated
+from the same minute walk) and option chains
+are priced from the underlying's minute bars with a normal-model approximation.
+"""
+import zlib
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from .datasource import BarSeries, ChainDay, CsvDataSource
+from .enums import Resolution, SecurityType
+from .scheduling import market_hours
+from .symbols import Symbol
+
+# ticker -> (starting price, annualised volatility)
+PRICE_PROFILES = {
+    "SPX": (4200.0, 0.18),
+    "VIX": (18.0, 0.80),
+    "QQQ": (300.0, 0.25),
+    "SQQQ": (30.0, 0.75),
+    "USO": (12.0, 0.40),
+    "EURUSD": (1.12, 0.07),
+}
+DEFAULT_PROFILE = (100.0, 0.30)
+MINUTES_PER_YEAR = 252 * 390
+SQRT_2PI = np.sqrt(2 * np.pi)
+
+
+def normal_cdf(x):
+    """Tanh approximation of the standard normal CDF (abs error < 2e-4)"""
+    return 0.5 * (1.0 + np.tanh(0.7978845608 * (x + 0.044715 * x ** 3)))
+
+
+class SyntheticDataSource(CsvDataSource):
+    """Random-walk bars for any symbol and chains `chain_width` strikes either side of ATM"""
+
+    def __init__(self, start, end, seed=0, chain_width=20, strike_step=5.0, expiry_days=(0,),
+                 chain_every=1, implied_volatility=0.15, half_spread=0.05):
+        super().__init__(None)
+        self.start = start
+        self.end = end
+        self.seed = seed
+        self.chain_width = chain_width
+        self.strike_step = strike_step
+        self.expiry_days = tuple(expiry_days)
+        self.chain_every = chain_every
+        self.implied_volatility = implied_volatility
+        self.half_spread = half_spread
+
+    @property
+    def cache_id(self):
+        return "synthetic-%d-%s-%s" % (self.seed, self.start.strftime("%Y%m%d"), self.end.strftime("%Y%m%d"))
+
+    def has_bars(self, symbol, resolution):
+        return resolution in (Resolution.Minute, Resolution.Daily)
+
+    def _rng(self, *key):
+        return np.random.default_rng([self.seed, zlib.crc32(repr(key).encode())])
+
+    def _sessions(self, symbol):
+        day = self.start.date()
+        while day <= self.end.date():
+            hours = market_hours(symbol, day)
+            if hours is not None:
+                yield hours
+            day += timedelta(days=1)
+
+    def load_bars(self, symbol, resolution):
+        """Minute bars across each session, or one bar per session aggregated from them"""
+        if resolution == Resolution.Daily:
+            return self._daily(symbol)
+        if resolution != Resolution.Minute:
+            return None  # hour bars are aggregated from minute bars
+        sessions = list(self._sessions(symbol))
+        if not sessions:
+            return None
+        ends = np.concatenate([np.arange(np.datetime64(open_, "s") + np.timedelta64(60, "s"),
+                                         np.datetime64(close, "s") + np.timedelta64(1, "s"),
+                                         np.timedelta64(60, "s")) for open_, close in sessions])
+        price, volatility = PRICE_PROFILES.get(symbol.Value, DEFAULT_PROFILE)
+        rng = self._rng(symbol.Value)
+        step = volatility / np.sqrt(MINUTES_PER_YEAR)
+        close = price * np.exp(np.cumsum(rng.normal(0.0, step, len(ends))))
+        open_ = np.concatenate(([price], close[:-1]))
+        wick = np.abs(rng.normal(0.0, step / 2, len(ends))) * close
+        volume = np.zeros(len(ends)) if symbol.SecurityType == SecurityType.Forex \
+            else rng.integers(1000, 100000, len(ends)).astype(np.float64)
+        return BarSeries(symbol, resolution, ends, open_, np.maximum(open_, close) + wick,
+                         np.minimum(open_, close) - wick, close, volume)
+
+    def _daily(self, symbol):
+        """One bar per session from the minute walk, ending at the session close"""
+        base = self.bars(symbol, Resolution.Minute)
+        if base is None or not len(base):
+            return None
+        closes = np.array([close for _, close in self._sessions(symbol)], dtype="datetime64[s]")
+        session = np.searchsorted(closes, base.end64)
+        first = np.concatenate(([0], np.flatnonzero(session[1:] != session[:-1]) + 1))
+        last = np.concatenate((first[1:], [len(session)])) - 1
+        return BarSeries(symbol, Resolution.Daily, closes[session[first]], base.open[first],
+                         np.maximum.reduceat(base.high, first), np.minimum.reduceat(base.low, first),
+                         base.close[last], np.add.reduceat(base.volume, first))
+
+    def _underlying(self, target):
+        """SPX/SPXW chains follow the SPX index, anything else the equity of the same ticker"""
+        if target.upper() in ("SPX", "SPXW"):
+            return Symbol.Create("SPX", SecurityType.Index)
+        return Symbol.Create(target, SecurityType.Equity)
+
+    def _expiries(self, underlying, day):
+        expiries = []
+        for offset in self.expiry_days:
+            expiry = day + timedelta(days=offset)
+            while market_hours(underlying, expiry) is None:
+                expiry += timedelta(days=1)
+            expiries.append(expiry)
+        return expiries
+
+    def load_chain_day(self, target, day):
+        """Quotes for every `chain_every`-th minute of the underlying's session"""
+        underlying = self._underlying(target)
+        series = self.bars(underlying, Resolution.Minute)
+        if series is None or market_hours(underlying, day) is None:
+            return None
+        midnight = datetime(day.year, day.month, day.day)
+        i, j = series.index_range(midnight, midnight + timedelta(days=1))
+        if i == j:
+            return None
+        times = series.end64[i:j:self.chain_every]
+        spot = series.close[i:j:self.chain_every]
+
+        step = self.strike_step
+        offsets = np.arange(-self.chain_width, self.chain_width + 1) * step
+        expiries = self._expiries(underlying, day)
+        n, e, k = len(times), len(expiries), len(offsets)
+
+        # Rows ordered by (time, expiry, right, strike)
+        shape = (n, e, 2, k)
+        atm = np.round(spot / step) * step
+        strike = np.broadcast_to(atm[:, None, None, None] + offsets, shape)
+        s = np.broadcast_to(spot[:, None, None, None], shape)
+        expiry = np.array(expiries, dtype="datetime64[D]")
+        close = expiry.astype("datetime64[s]") + np.timedelta64(16, "h")
+        minutes = np.maximum((close[None, :] - times[:, None]).astype(np.int64) / 60.0, 1.0)
+        t = np.broadcast_to((minutes / MINUTES_PER_YEAR)[:, :, None, None], shape)
+        is_call = np.broadcast_to(np.array([True, False])[None, None, :, None], shape)
+
+        sigma = s * self.implied_volatility * np.sqrt(t)
+        d = (s - strike) / sigma
+        call = (s - strike) * normal_cdf(d) + sigma * np.exp(-0.5 * d * d) / SQRT_2PI
+        mid = np.where(is_call, call, call - (s - strike))
+        mid = np.maximum(mid, 0.05)
+        bid = np.round(np.maximum(mid - self.half_spread, 0.0) / 0.05) * 0.05
+        ask = np.round((mid + self.half_spread) / 0.05) * 0.05
+        delta = np.where(is_call, normal_cdf(d), normal_cdf(d) - 1.0)
+
+        rows = n * e * 2 * k
+        greeks = {"delta": delta.reshape(rows),
+                  "implied_volatility": np.full(rows, self.implied_volatility)}
+        return ChainDay(np.repeat(times, e * 2 * k),
+                        np.broadcast_to(expiry[None, :, None, None], shape).reshape(rows),
+                        np.where(is_call, 0, 1).astype(np.int8).reshape(rows),
+                        np.ascontiguousarray(strike).reshape(rows), bid.reshape(rows), ask.reshape(rows),
+                        mid.reshape(rows), np.full(rows, 1000.0), greeks)
@@ -0,0 +1,233 @@
+"""Order submission, fill simulation and option expiration."""
+from .enums import OrderType, OrderStatus, OptionRight
+from .orders import (Order, OrderTicket, OrderEvent, OrderFee, OrderFeeParameters, CashAmount,
+                     GroupOrderManager)
+from .symbols import OPTION_TYPES
+
+
+class SecurityTransactionManager:
+    """Fills market orders immediately and resting orders against later prices"""
+
+    def __init__(self, algorithm):
+        self.algorithm = algorithm
+        self.orders = {}
+        self.open_orders = {}  # order id -> Order, resting limit/stop orders
+        self.next_id = 1
+        self.next_group_id = 1
+        self.events = 0
+        self.fill_count = 0
+
+    # --- LEAN API -------------------------------------------------------
+
+    def GetOrderById(self, order_id):
+        return self.orders.get(order_id)
+
+    def GetOrders(self, predicate=None):
+        return [o for o in self.orders.values() if predicate is None or predicate(o)]
+
+    def GetOpenOrders(self, symbol=None):
+        return [o for o in self.open_orders.values() if symbol is None or o.Symbol == symbol]
+
+    def GetOpenOrderTickets(self, symbol=None):
+        return [OrderTicket(self, o) for o in self.GetOpenOrders(symbol)]
+
+    def CancelOrder(self, order_id, tag=None):
+        order = self.open_orders.get(order_id)
+        if order is None:
+            return False
+        # Cancelling any leg of a combo cancels the whole combo
+        legs = [self.orders[i] for i in order.group.OrderIds] if order.group is not None else [order]
+        for leg in legs:
+            if self.open_orders.pop(leg.Id, None) is not None:
+                leg.Status = OrderStatus.Canceled
+                self._event(OrderEvent(leg, OrderStatus.Canceled, self.algorithm.Time, message=tag or ""))
+        return True
+
+    def CancelOpenOrders(self, symbol=None, tag=None):
+        cancelled = []
+        for order in list(self.open_orders.values()):
+            if symbol is None or order.Symbol == symbol:
+                self.CancelOrder(order.Id, tag)
+                cancelled.append(OrderTicket(self, order))
+        return cancelled
+
+    @property
+    def OrdersCount(self):
+        return len(self.orders)
+
+    # --- Engine side ----------------------------------------------------
+
+    def _new_order(self, symbol, quantity, order_type, limit_price=None, stop_price=None, tag="",
+                   group=None, ratio=None):
+        order = Order(self.next_id, symbol, quantity, order_type, self.algorithm.Time,
+                      limit_price, stop_price, tag, group, ratio)
+        self.next_id += 1
+        self.orders[order.Id] = order
+        return order
+
+    def _event(self, event):
+        self.events += 1
+        self.algorithm.OnOrderEvent(event)
+
+    def _invalid(self, order, message):
+        order.Status = OrderStatus.Invalid
+        self._event(OrderEvent(order, OrderStatus.Invalid, self.algorithm.Time, message=message))
+        return OrderTicket(self, order)
+
+    def submit(self, symbol, quantity, order_type, limit_price=None, stop_price=None, tag=""):
+        algorithm = self.algorithm
+        order = self._new_order(symbol, quantity, order_type, limit_price, stop_price, tag)
+        if algorithm.IsWarmingUp:
+            return self._invalid(order, "Orders are not allowed during warm-up")
+        if quantity == 0:
+            return self._invalid(order, "Zero quantity")
+        security = algorithm._security(symbol)
+        if security.Price <= 0 and security.BidPrice <= 0 and security.AskPrice <= 0:
+            return self._invalid(order, "No price data for " + str(symbol))
+
+        order.Status = OrderStatus.Submitted
+        self._event(OrderEvent(order, OrderStatus.Submitted, algorithm.Time))
+        if order_type == OrderType.Market:
+            self._fill(order, security, self.market_price(security, quantity))
+        else:
+            self.open_orders[order.Id] = order
+            self.process_order(order, security)
+        return OrderTicket(self, order)
+
+    def submit_combo(self, legs, quantity, order_type, limit_price=None, tag=""):
+        """Leg orders sharing one group; a combo fills all of its legs at once or not at all"""
+        algorithm = self.algorithm
+        group = GroupOrderManager(self.next_group_id, len(legs), quantity, limit_price)
+        self.next_group_id += 1
+        orders = []
+        for leg in legs:
+            order = self._new_order(algorithm._symbol(leg.Symbol), leg.Quantity * quantity, order_type,
+                                    limit_price, tag=tag, group=group, ratio=leg.Quantity)
+            group.OrderIds.append(order.Id)
+            orders.append(order)
+        tickets = [OrderTicket(self, order) for order in orders]
+
+        message = None
+        if algorithm.IsWarmingUp:
+            message = "Orders are not allowed during warm-up"
+        elif quantity == 0 or any(leg.Quantity == 0 for leg in legs):
+            message = "Zero quantity"
+        else:
+            for order in orders:
+                security = algorithm._security(order.Symbol)
+                if security.Price <= 0 and security.BidPrice <= 0 and security.AskPrice <= 0:
+                    message = "No price data for " + str(order.Symbol)
+                    break
+        if message is not None:
+            for order in orders:
+                self._invalid(order, message)
+            return tickets
+
+        for order in orders:
+            order.Status = OrderStatus.Submitted
+            self._event(OrderEvent(order, OrderStatus.Submitted, algorithm.Time))
+        if order_type == OrderType.ComboMarket:
+            self._fill_group(group)
+        else:
+            for order in orders:
+                self.open_orders[order.Id] = order
+            self.process_group(group)
+        return tickets
+
+    def _fill_group(self, group):
+        securities = self.algorithm.Securities
+        for order_id in group.OrderIds:
+            order = self.orders[order_id]
+            security = securities[order.Symbol]
+            self._fill(order, security, self.market_price(security, order.Quantity))
+
+    def process_group(self, group):
+        """Fill a resting combo limit order when its net price reaches the limit.
+
+        The net price is sum(leg ratio * leg price), buying legs at the ask and selling at
+        the bid: a buy combo (Quantity > 0) fills at or below its limit, a sell combo at or above.
+        """
+        securities = self.algorithm.Securities
+        net = 0.0
+        for order_id in group.OrderIds:
+            order = self.orders[order_id]
+            price = self.market_price(securities[order.Symbol], order.Quantity)
+            if price <= 0:
+                return
+            net += order.ratio * price
+        if (group.Quantity > 0 and net <= group.LimitPrice) or (group.Quantity < 0 and net >= group.LimitPrice):
+            self._fill_group(group)
+
+    @staticmethod
+    def market_price(security, quantity):
+        """Buys lift the ask, sells hit the bid; falls back to the last price"""
+        if quantity > 0:
+            return security.AskPrice if security.AskPrice > 0 else security.Price
+        return security.BidPrice if security.BidPrice > 0 else security.Price
+
+    def _fee(self, security, order):
+        return float(security.FeeModel.GetOrderFee(OrderFeeParameters(security, order)).Value.Amount)
+
+    def _fill(self, order, security, price, quantity=None, fee=None, is_assignment=False):
+        quantity = order.Quantity - order.filled if quantity is None else quantity
+        fee = self._fee(security, order) if fee is None else fee
+        self.algorithm.Portfolio.apply_fill(security, quantity, price, fee)
+        order.filled += quantity
+        order.fill_value += quantity * price
+        order.Status = OrderStatus.Filled if order.filled == order.Quantity else OrderStatus.PartiallyFilled
+        self.open_orders.pop(order.Id, None)
+        self.fill_count += 1
+        event = OrderEvent(order, order.Status, self.algorithm.Time, price, quantity,
+                           OrderFee(CashAmount(fee, "USD")))
+        event.IsAssignment = is_assignment
+        self._event(event)
+
+    def process_order(self, order, security):
+        """Try to fill one resting order against the security's current prices"""
+        if order.Type == OrderType.Limit:
+            if order.Quantity > 0:
+                ask = security.AskPrice if security.AskPrice > 0 else security.Price
+                if 0 < ask <= order.LimitPrice:
+                    self._fill(order, security, min(order.LimitPrice, ask))
+            else:
+                bid = security.BidPrice if security.BidPrice > 0 else security.Price
+                if bid >= order.LimitPrice:
+                    self._fill(order, security, max(order.LimitPrice, bid))
+        elif order.Type == OrderType.StopMarket:
+            price = security.Price
+            if (order.Quantity > 0 and price >= order.StopPrice) or (order.Quantity < 0 and 0 < price <= order.StopPrice):
+                self._fill(order, security, self.market_price(security, order.Quantity))
+
+    def process_open_orders(self):
+        if not self.open_orders:
+            return
+        securities = self.algorithm.Securities
+        for order in list(self.open_orders.values()):
+            if order.Id not in self.open_orders:
+                continue
+            if order.group is None:
+                self.process_order(order, securities[order.Symbol])
+            elif order.Id == order.group.OrderIds[0]:
+                self.process_group(order.group)
+
+    def settle_expired(self, day):
+        """Cash-settle or expire option positions whose expiry is before `day`"""
+        portfolio = self.algorithm.Portfolio
+        for symbol, holding in list(portfolio.invested.items()):
+            if symbol.SecurityType not in OPTION_TYPES or symbol.expiry is None or symbol.expiry >= day:
+                continue
+            underlying = self.algorithm.Securities.get(symbol.Underlying)
+            spot = underlying.Price if underlying is not None else 0.0
+            if symbol.right == OptionRight.Call:
+                intrinsic = max(spot - symbol.strike, 0.0)
+            else:
+                intrinsic = max(symbol.strike - spot, 0.0)
+            for order in list(self.open_orders.values()):
+                if order.Symbol == symbol:
+                    self.CancelOrder(order.Id, "Expired")
+            quantity = -holding.Quantity
+            order = self._new_order(symbol, quantity, OrderType.OptionExercise,
+                                    tag="Automatic Exercise" if intrinsic > 0 else "OTM Expiry")
+            holding.security.update_quote(intrinsic, intrinsic, intrinsic)
+            self._fill(order, holding.security, intrinsic, fee=0.0,
+                       is_assignment=intrinsic > 0 and holding.Quantity < 0)
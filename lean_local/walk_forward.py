@@ -0,0 +1,238 @@
+"""Walk-forward ARIMA order selection over local cores.
+
+    python -m lean_local.walk_forward EURUSD --security forex --data DIR \\
+        --orders "1,0,0;2,0,0;3,0,0" --windows 60,120,250 --step 21 [--criterion bic] \\
+        [--bar-days 14] [--workers N] [--cache FILE] [--out FILE]
+
+The log returns of the symbol's daily closes (or of `--bar-days` consolidated bars, as the
+USO strategy uses) are cut into walk-forward periods of `--step` bars. At the end of every
+period each (window, order) candidate is fitted with statsmodels' ARIMA on the last `window`
+returns and scored by AIC, BIC and its one-step-ahead hit-rate over the following period.
+Fits run in a process pool and are memoized in the cache file by (symbol, window end,
+window, order, test bars), so reruns and overlapping grids only fit what is new.
+
+The strategies trade each scheduled (order, window) as a RollingAR, the least-squares AR(p)
+fit of the same last `window` returns, so only ARIMA(p,0,0) orders are accepted.
+
+The output is a JSON schedule: for each period, the candidate chosen with the information
+available at its start (information criteria of the fits ending there, or the hit-rates of
+the previous period for --criterion hit_rate). The strategies load it from the ObjectStore
+with common.order_schedule.OrderSchedule.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from .datasource import CsvDataSource
+from .enums import Resolution, SecurityType
+from .symbols import Symbol
+
+SECURITY_TYPES = {"equity": SecurityType.Equity, "forex": SecurityType.Forex, "index": SecurityType.Index}
+CRITERIA = ("aic", "bic", "hit_rate")
+
+
+def load_returns(data_root, ticker, security_type, bar_days=1):
+    """Log returns of daily closes, or of closes consolidated into `bar_days`-day bars"""
+    series = CsvDataSource(data_root).bars(Symbol.Create(ticker, security_type), Resolution.Daily)
+    if series is None:
+        raise ValueError("no daily bars for %s" % ticker)
+    closes = pd.Series(series.close, index=pd.DatetimeIndex(series.end64))
+    if bar_days > 1:
+        # Same period boundaries as TradeBarConsolidator(timedelta(days=bar_days)), keyed by bar start day
+        days = (np.array([s.date() for s in series.starts], dtype="datetime64[D]")
+                - np.datetime64("0001-01-01", "D")).astype(np.int64)
+        closes = closes.groupby(days // bar_days).tail(1)
+    closes = closes[closes > 0]
+    return np.log(closes).diff().dropna()
+
+
+def parse_orders(text):
+    """'1,0,0;2,0,0' -> [(1, 0, 0), (2, 0, 0)]; the strategies trade pure AR(p) fits only"""
+    orders = [tuple(int(v) for v in spec.split(",")) for spec in text.split(";") if spec.strip()]
+    for order in orders:
+        if len(order) != 3 or order[0] < 1 or order[1] or order[2]:
+            raise ValueError("order %s: only ARIMA(p,0,0) with p >= 1 can be scheduled" % (order,))
+    return orders
+
+
+def cache_key(symbol, end, window, order, test):
+    return "%s|%s|%d|%d,%d,%d|%d" % (symbol, end.isoformat(), window, order[0], order[1], order[2], test)
+
+
+def load_cache(path):
+    cache = {}
+    if path and os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    row = json.loads(line)
+                    cache[row["key"]] = row
+    return cache
+
+
+def fit_one(task):
+    """Worker entry point: fit one window and score its forecasts over the following bars"""
+    key, train, test, order = task
+    from statsmodels.tsa.arima.model import ARIMA
+    row = {"key": key}
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            result = ARIMA(train, order=order, trend="c" if order[1] == 0 else "n").fit()
+            forecasts = result.extend(test).fittedvalues if len(test) else np.zeros(0)
+    except Exception as e:
+        row["error"] = "%s: %s" % (type(e).__name__, e)
+        return row
+    moved = test != 0
+    hits = int(np.sum(np.sign(forecasts[moved]) == np.sign(test[moved])))
+    row.update(aic=float(result.aic), bic=float(result.bic), params=[float(p) for p in result.params],
+               hits=hits, scored=int(moved.sum()))
+    return row
+
+
+class WalkForward:
+    """Periods, candidates and fitted results of one walk-forward run"""
+
+    def __init__(self, symbol, returns, orders, windows, step):
+        self.symbol = symbol
+        self.returns = returns
+        self.orders = orders
+        self.windows = sorted(windows)
+        self.step = step
+        n = len(returns)
+        # Index of the last training return of each period
+        self.ends = list(range(self.windows[-1] - 1, n - 1, step))
+        self.candidates = [(window, order) for window in self.windows for order in orders]
+        self.results = {}
+
+    def tasks(self):
+        """(key, train, test, order) for every period and candidate"""
+        values = self.returns.to_numpy()
+        times = self.returns.index
+        for end in self.ends:
+            test = values[end + 1:end + 1 + self.step]
+            for window, order in self.candidates:
+                key = cache_key(self.symbol, times[end], window, order, len(test))
+                yield key, values[end + 1 - window:end + 1], test, order
+
+    def result(self, end, window, order):
+        test = min(self.step, len(self.returns) - 1 - end)
+        row = self.results.get(cache_key(self.symbol, self.returns.index[end], window, order, test))
+        return row if row is not None and "error" not in row else None
+
+    def score(self, end, criterion, window, order):
+        """Lower is better; None when the candidate cannot be scored at this period end"""
+        if criterion == "hit_rate":
+            k = self.ends.index(end)
+            if k == 0:
+                return None
+            row = self.result(self.ends[k - 1], window, order)
+            return -row["hits"] / row["scored"] if row is not None and row["scored"] else None
+        row = self.result(end, window, order)
+        # Per observation, so windows of different lengths are comparable
+        return row[criterion] / window if row is not None else None
+
+    def schedule(self, criterion):
+        periods = []
+        times = self.returns.index
+        for end in self.ends:
+            scored = [(self.score(end, criterion, window, order), window, order) for window, order in self.candidates]
+            scored = [s for s in scored if s[0] is not None]
+            if not scored:
+                continue
+            score, window, order = min(scored, key=lambda s: s[0])
+            row = self.result(end, window, order)
+            last = min(end + self.step, len(times) - 1)
+            periods.append({"from": times[end].isoformat(), "until": times[last].isoformat(),
+                            "order": list(order), "window": window, "score": round(float(score), 6),
+                            "hits": row["hits"] if row else 0, "scored": row["scored"] if row else 0})
+        return {"symbol": self.symbol, "criterion": criterion, "step": self.step, "periods": periods}
+
+    def hit_rates(self):
+        """Out-of-sample hit-rate of every fixed candidate over all periods"""
+        rates = {}
+        for window, order in self.candidates:
+            rows = [self.result(end, window, order) for end in self.ends]
+            hits = sum(r["hits"] for r in rows if r)
+            scored = sum(r["scored"] for r in rows if r)
+            rates[(window, order)] = hits / scored if scored else None
+        return rates
+
+
+def run(walk, cache_path=None, workers=None):
+    """Fit every (period, candidate) missing from the cache; returns the number fitted"""
+    cache = load_cache(cache_path)
+    pending = [task for task in walk.tasks() if task[0] not in cache]
+    if pending:
+        context = multiprocessing.get_context("fork") if "fork" in multiprocessing.get_all_start_methods() \
+            else multiprocessing.get_context()
+        out = open(cache_path, "a") if cache_path else None
+        try:
+            with context.Pool(workers or os.cpu_count()) as pool:
+                for i, row in enumerate(pool.imap_unordered(fit_one, pending, chunksize=8)):
+                    cache[row["key"]] = row
+                    if out is not None:
+                        out.write(json.dumps(row) + "\n")
+                    if (i + 1) % 100 == 0 or i + 1 == len(pending):
+                        print("%d/%d fits" % (i + 1, len(pending)))
+        finally:
+            if out is not None:
+                out.close()
+    walk.results = cache
+    return len(pending)
+
+
+def format_summary(walk, schedule):
+    periods = schedule["periods"]
+    hits = sum(p["hits"] for p in periods)
+    scored = sum(p["scored"] for p in periods)
+    lines = ["%d periods, schedule hit-rate %.2f%% (%s)" % (len(periods), 100.0 * hits / max(scored, 1),
+                                                          schedule["criterion"])]
+    for (window, order), rate in sorted(walk.hit_rates().items(), key=lambda kv: -(kv[1] or 0)):
+        chosen = sum(1 for p in periods if p["window"] == window and tuple(p["order"]) == order)
+        lines.append("  window %-5d ARIMA%-10s hit-rate %s  chosen %d" % (
+            window, order, "%.2f%%" % (rate * 100) if rate is not None else "n/a", chosen))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m lean_local.walk_forward", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("ticker")
+    parser.add_argument("--security", choices=sorted(SECURITY_TYPES), default="equity")
+    parser.add_argument("--data", required=True, help="data root (see lean_local.datasource)")
+    parser.add_argument("--orders", default="1,0,0;2,0,0;3,0,0", help="(p,d,q) grid, ';'-separated")
+    parser.add_argument("--windows", default="60", help="training windows in bars, ','-separated")
+    parser.add_argument("--step", type=int, default=21, help="bars per walk-forward period")
+    parser.add_argument("--bar-days", type=int, default=1, help="consolidate daily bars into N-day bars")
+    parser.add_argument("--criterion", choices=CRITERIA, default="bic")
+    parser.add_argument("--workers", type=int, help="worker processes (default: all cores)")
+    parser.add_argument("--cache", default="walk_forward_fits.jsonl", help="JSONL fit cache (resumable)")
+    parser.add_argument("--out", help="schedule JSON file (default: walk_forward_<ticker>.json)")
+    args = parser.parse_args(argv)
+
+    try:
+        orders = parse_orders(args.orders)
+    except ValueError as e:
+        parser.error(str(e))
+    returns = load_returns(args.data, args.ticker, SECURITY_TYPES[args.security], args.bar_days)
+    symbol = args.ticker.upper() if args.bar_days == 1 else "%s/%dd" % (args.ticker.upper(), args.bar_days)
+    walk = WalkForward(symbol, returns, orders,
+                       [int(w) for w in args.windows.split(",")], args.step)
+    fitted = run(walk, args.cache, args.workers)
+    schedule = walk.schedule(args.criterion)
+    out = args.out or "walk_forward_%s.json" % args.ticker.lower()
+    with open(out, "w") as f:
+        json.dump(schedule, f, indent=1)
+    print("%d fits (%d cached), schedule written to %s" % (len(walk.ends) * len(walk.candidates),
+                                                         len(walk.ends) * len(walk.candidates) - fitted, out))
+    print(format_summary(walk, schedule))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+"""Tests run against lean_local's stand-ins for the LEAN modules."""
+from lean_local.loader import install_paths
+
+install_paths()
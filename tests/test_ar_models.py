@@ -0,0 +1,58 @@
+import warnings
+
+import numpy as np
+import pytest
+
+from common.ar_models import BatchARFit, RecursiveAR, RollingAR, fit_ar_batch
+
+
+@pytest.mark.parametrize("order, window", [(1, 30), (3, 40)])
+def test_rolling_fit_matches_batch_ols_of_the_window(order, window):
+    values = np.random.default_rng(order).normal(0.0, 0.02, 3 * window + 7)
+    model = RollingAR(order, window)
+    for value in values:
+        model.update(value)
+    rolling = BatchARFit.from_models([model])
+    batch = fit_ar_batch(values[-window:], order=order)
+    for name in ("intercepts", "coefficients", "forecasts", "residual_std", "r_squared"):
+        np.testing.assert_allclose(getattr(rolling, name), getattr(batch, name), rtol=1e-8, atol=1e-12)
+    np.testing.assert_allclose(rolling.scores, batch.scores, rtol=1e-8)
+
+
+def test_models_not_ready_are_invalid():
+    model = RollingAR(1, 10)
+    model.update(0.01)
+    fit = BatchARFit.from_models([model])
+    assert not fit.valid[0]
+    assert np.isnan(fit.forecasts[0])
+    assert fit.scores[0] == 0.0
+
+
+@pytest.mark.parametrize("order", [1, 2, 3])
+def test_recursive_fit_matches_statsmodels_arima(order):
+    arima = pytest.importorskip("statsmodels.tsa.arima.model")
+    rng = np.random.default_rng(order)
+    phi = np.array([0.5, -0.2, 0.1][:order])
+    values = np.zeros(1500)
+    for t in range(order, len(values)):
+        values[t] = 0.001 + phi @ values[t - order:t][::-1] + rng.normal(0.0, 0.01)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        fitted = arima.ARIMA(values, order=(order, 0, 0)).fit()
+    model = RecursiveAR(order, forgetting=1.0).fit(values)
+    # Conditional least squares against exact maximum likelihood: equal up to O(1/n)
+    np.testing.assert_allclose(model.coefficients, fitted.params[1:order + 1], atol=1e-4)
+    np.testing.assert_allclose(model.mean, fitted.params[0], atol=5e-5)
+    np.testing.assert_allclose(model.forecast(), fitted.forecast(1)[0], atol=2e-5)
+
+
+def test_rolling_state_round_trip():
+    values = np.random.default_rng(3).normal(0.0, 0.01, 90)
+    model = RollingAR(2, 40)
+    for value in values:
+        model.update(value)
+    restored = RollingAR(2, 40)
+    assert restored.set_state(model.get_state("m/"), "m/")
+    np.testing.assert_allclose(restored.theta, model.theta, rtol=1e-10)
+    assert restored.forecast() == pytest.approx(model.forecast(), rel=1e-10)
+    assert not RollingAR(2, 40).set_state({}, "m/")
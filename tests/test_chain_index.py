@@ -0,0 +1,60 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+from AlgorithmImports import OptionRight
+
+from common.chain_index import ChainIndex, ChainSide
+
+EXPIRY = datetime(2022, 6, 1, 16)
+
+
+def contract(strike, right=OptionRight.Put):
+    return SimpleNamespace(Symbol="%s%d" % ("P" if right == OptionRight.Put else "C", strike), Strike=float(strike),
+                           Expiry=EXPIRY, Right=right, BidPrice=1.0, AskPrice=1.1)
+
+
+def side(*strikes):
+    # Listed out of order: ChainSide sorts by strike
+    return ChainSide(EXPIRY.date(), OptionRight.Put, [contract(k) for k in reversed(strikes)])
+
+
+def strike(c):
+    return c.Strike if c is not None else None
+
+
+def test_nth_below_at_the_chain_edges():
+    puts = side(4090, 4100, 4110)
+    assert strike(puts.nth_below(4105)) == 4100
+    assert strike(puts.nth_below(4105, 2)) == 4090
+    assert puts.nth_below(4105, 3) is None      # runs off the bottom of the chain
+    assert strike(puts.nth_below(4100)) == 4090  # strictly below a listed strike
+    assert puts.nth_below(4090) is None
+    assert puts.nth_below(4000) is None
+    assert strike(puts.nth_below(5000)) == 4110
+    assert strike(puts.nth_below(5000, 3)) == 4090
+
+
+def test_first_above_at_the_chain_edges():
+    puts = side(4090, 4100, 4110)
+    assert strike(puts.first_above(4000)) == 4090
+    assert strike(puts.first_above(4095)) == 4100
+    assert strike(puts.first_above(4100)) == 4110  # strictly above a listed strike
+    assert puts.first_above(4110) is None
+    assert puts.first_above(5000) is None
+
+
+def test_empty_side_has_no_neighbours():
+    empty = side()
+    assert empty.nth_below(4100) is None
+    assert empty.first_above(4100) is None
+    assert empty.at_strike(4100) is None
+
+
+def test_index_groups_sides_and_finds_symbols():
+    chain = [contract(4100), contract(4090), contract(4100, OptionRight.Call)]
+    index = ChainIndex(chain)
+    assert [c.Strike for c in index.side(EXPIRY.date(), OptionRight.Put).contracts] == [4090, 4100]
+    assert index.side(EXPIRY.date(), OptionRight.Call).at_strike(4100.0000001) is chain[2]
+    assert index.contract("P4090") is chain[1]
+    assert index.contract("P4000") is None
+    assert index.quote("C4100") == (1.0, 1.1)
@@ -0,0 +1,120 @@
+from types import SimpleNamespace
+
+from AlgorithmImports import OrderStatus
+
+from common.combo_orders import CLOSED, ComboOrderManager
+
+
+class Ticket:
+    def __init__(self, algorithm, order_id, symbol):
+        self.algorithm = algorithm
+        self.OrderId = order_id
+        self.Symbol = symbol
+        self.Status = OrderStatus.Submitted
+
+    def Cancel(self, tag=""):
+        self.Status = OrderStatus.Canceled
+        self.algorithm.event(self, 0, 0.0, OrderStatus.Canceled)
+
+
+class BacktestAlgorithm:
+    """Fills market orders, and marketable combo limits, inside the order call as a backtest does"""
+
+    def __init__(self, prices):
+        self.prices = prices
+        self.manager = ComboOrderManager(self)
+        self.next_id = 1
+        self.resting = []
+        self.closed = []
+
+    def event(self, ticket, quantity, price, status):
+        closed = self.manager.on_order_event(SimpleNamespace(
+            OrderId=ticket.OrderId, Symbol=ticket.Symbol, FillQuantity=quantity, FillPrice=price,
+            Status=status, Message=""))
+        if closed is not None:
+            self.closed.append(closed)
+
+    def ticket(self, symbol):
+        ticket = Ticket(self, self.next_id, symbol)
+        self.next_id += 1
+        return ticket
+
+    def fill(self, ticket, quantity):
+        ticket.Status = OrderStatus.Filled
+        self.event(ticket, quantity, self.prices[ticket.Symbol], OrderStatus.Filled)
+
+    def ComboMarketOrder(self, legs, quantity, tag=""):
+        tickets = [self.ticket(leg.Symbol) for leg in legs]
+        for ticket, leg in zip(tickets, legs):
+            self.fill(ticket, leg.Quantity * quantity)
+        return tickets
+
+    def ComboLimitOrder(self, legs, quantity, limit_price, tag=""):
+        tickets = [self.ticket(leg.Symbol) for leg in legs]
+        net = sum(leg.Quantity * self.prices[leg.Symbol] for leg in legs)
+        if (quantity > 0 and net <= limit_price) or (quantity < 0 and net >= limit_price):
+            for ticket, leg in zip(tickets, legs):
+                self.fill(ticket, leg.Quantity * quantity)
+        else:
+            self.resting.append((tickets, legs, quantity))
+        return tickets
+
+    def MarketOrder(self, symbol, quantity, tag=""):
+        ticket = self.ticket(symbol)
+        self.fill(ticket, quantity)
+        return ticket
+
+
+def assert_released(manager):
+    assert manager.structures == {}
+    assert manager.order_structures == {}
+    assert manager.brackets == {}
+    assert manager.leg_structures == {}
+
+
+def test_manual_close_releases_orders_and_bracket():
+    algorithm = BacktestAlgorithm({"A": 2.0, "B": 1.0})
+    manager = algorithm.manager
+    structure = manager.open("Spread", [("A", 1), ("B", -1)], 2, take_profit_pct=0.5, stop_loss_pct=0.5)
+    assert structure.entry_net == 1.0
+    assert manager.brackets == {structure.id: structure.target_ticket}
+
+    manager.close(structure, "manual")
+    assert structure.state == CLOSED
+    assert algorithm.closed == [structure]
+    assert structure.reason == "manual"
+    assert_released(manager)
+
+
+def test_marketable_target_is_our_fill():
+    algorithm = BacktestAlgorithm({"A": 2.0, "B": 1.0})
+    manager = algorithm.manager
+    # A zero profit target is marketable as soon as it is sent, so it fills inside the entry's fill
+    structure = manager.open("Spread", [("A", 1), ("B", -1)], 1, take_profit_pct=0.0)
+    assert structure.state == CLOSED
+    assert structure.reason == "Spread target"
+    assert algorithm.closed == [structure]
+    assert_released(manager)
+
+
+def test_resting_target_then_stop():
+    algorithm = BacktestAlgorithm({"A": 2.0, "B": 1.0})
+    manager = algorithm.manager
+    structure = manager.open("Spread", [("A", 1), ("B", -1)], 1, take_profit_pct=0.5, stop_loss_pct=0.2)
+    algorithm.prices["A"] = 1.5
+    stopped = manager.check_stops(lambda symbol: (algorithm.prices[symbol], algorithm.prices[symbol]))
+    assert stopped == [structure]
+    assert structure.target_ticket is None
+    assert structure.pnl == -0.5
+    assert_released(manager)
+
+
+def test_close_cancels_partially_filled_target():
+    algorithm = BacktestAlgorithm({"A": 2.0, "B": 1.0})
+    manager = algorithm.manager
+    structure = manager.open("Spread", [("A", 1), ("B", -1)], 2, take_profit_pct=0.5)
+    target = structure.target_ticket
+    target.Status = OrderStatus.PartiallyFilled
+    manager.close(structure, "manual")
+    assert target.Status == OrderStatus.Canceled
+    assert_released(manager)
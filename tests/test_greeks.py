@@ -0,0 +1,41 @@
+from datetime import date
+
+import numpy as np
+import pytest
+
+from AlgorithmImports import OptionRight
+
+from common.greeks import ChainGreeks, implied_vol, price
+
+
+@pytest.mark.parametrize("strike, is_call, vol, days", [
+    (6000.0, True, 0.60, 7),    # far out-of-the-money call wing
+    (2500.0, False, 0.70, 7),   # far out-of-the-money put wing
+    (3000.0, True, 0.25, 30),   # deep in-the-money call
+    (5500.0, False, 0.25, 30),  # deep in-the-money put
+    (4200.0, True, 0.15, 1),    # at the money, for reference
+])
+def test_implied_vol_recovers_wing_and_deep_itm_vols(strike, is_call, vol, days):
+    spot, strike, t = 4200.0, np.array([strike]), np.array([days / 365.0])
+    quote = price(spot, strike, t, vol, is_call)
+    iv = implied_vol(quote, spot, strike, t, is_call)
+    assert np.isfinite(iv[0])
+    assert abs(iv[0] - vol) < 1e-5
+
+
+def test_prices_outside_the_bounds_have_no_implied_vol():
+    iv = implied_vol([1100.0, 5000.0], 4200.0, np.array([3000.0, 3000.0]), 30 / 365.0, [True, True])
+    assert np.isnan(iv).all()
+
+
+def test_at_strike_applies_the_delta_filter():
+    strikes = np.array([4190.0, 4200.0, 4210.0])
+    delta = np.array([0.55, 0.45, 0.35])
+    n = len(strikes)
+    chain = ChainGreeks(["c4190", "c4200", "c4210"], strikes, np.full(n, int(OptionRight.Call)),
+                        np.full(n, np.datetime64("2022-06-01", "D")), np.full(n, 0.2), delta,
+                        np.zeros(n), np.zeros(n), np.zeros(n))
+    expiry = date(2022, 6, 1)
+    assert chain.at_strike(OptionRight.Call, 4200.0, expiry) == "c4200"
+    assert chain.at_strike(OptionRight.Call, 4200.0, expiry, max_abs_delta=0.40) is None
+    assert chain.at_strike(OptionRight.Call, 4210.0, expiry, max_abs_delta=0.40) == "c4210"
@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from AlgorithmImports import Resolution
+
+from common.history_cache import HistoryCache
+from lean_local.object_store import ObjectStore
+
+
+def algorithm(root):
+    return SimpleNamespace(ObjectStore=ObjectStore(str(root)))
+
+
+def hours(start, closes):
+    return [(start + timedelta(hours=k), close) for k, close in enumerate(closes)]
+
+
+def test_saved_bars_are_reloaded_per_resolution(tmp_path):
+    cache = HistoryCache(algorithm(tmp_path), "history/qqq", Resolution.Hour)
+    for time, close in hours(datetime(2022, 1, 3, 10), [1.0, 2.0, 3.0]):
+        cache.append("QQQ", time, close)
+    cache.save()
+
+    assert list(HistoryCache(algorithm(tmp_path), "history/qqq", Resolution.Hour).history("QQQ")[1]) == [1, 2, 3]
+    assert len(HistoryCache(algorithm(tmp_path), "history/qqq", Resolution.Daily).history("QQQ")[1]) == 0
+
+
+def test_matching_overlap_is_kept(tmp_path):
+    cache = HistoryCache(algorithm(tmp_path), "history/qqq", Resolution.Hour)
+    bars = hours(datetime(2022, 1, 3, 10), [1.0, 2.0, 3.0, 4.0])
+    for time, close in bars:
+        cache.append("QQQ", time, close)
+    for time, close in bars[1:3]:
+        cache.append("QQQ", time, close)
+    assert list(cache.history("QQQ")[1]) == [1, 2, 3, 4]
+    assert cache.invalidated == 0
+
+
+def test_earlier_or_different_bars_replace_the_cached_tail(tmp_path):
+    cache = HistoryCache(algorithm(tmp_path), "history/qqq", Resolution.Hour)
+    for time, close in hours(datetime(2024, 1, 2, 10), [5.0, 6.0]):
+        cache.append("QQQ", time, close)
+    # A run over an earlier range must not be blocked by the later cached bars
+    for time, close in hours(datetime(2022, 1, 3, 10), [1.0, 2.0]):
+        cache.append("QQQ", time, close)
+    times, closes = cache.history("QQQ")
+    assert list(closes) == [1, 2]
+    assert cache.invalidated == 2
+
+    # The same time with another close (other data) replaces the cached bar and those after it
+    cache.append("QQQ", datetime(2022, 1, 3, 10), 1.5)
+    assert list(cache.history("QQQ")[1]) == [1.5]
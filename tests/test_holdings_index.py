@@ -0,0 +1,66 @@
+from datetime import date
+from types import SimpleNamespace
+
+from AlgorithmImports import OptionRight, OrderStatus, SecurityType, Symbol
+
+from common.holdings_index import HoldingsIndex
+
+SPX = Symbol.Create("SPX", SecurityType.Index)
+PUT = Symbol.CreateOption(SPX, "SPXW", SecurityType.IndexOption, date(2022, 6, 1), OptionRight.Put, 4100.0)
+CALL = Symbol.CreateOption(SPX, "SPXW", SecurityType.IndexOption, date(2022, 6, 1), OptionRight.Call, 4200.0)
+
+
+def fill(holdings, symbol, quantity, status=OrderStatus.PartiallyFilled):
+    holdings.on_order_event(SimpleNamespace(Symbol=symbol, FillQuantity=quantity, Status=status))
+
+
+def test_partial_fills_accumulate_under_one_tag():
+    holdings = HoldingsIndex()
+    holdings.tag(PUT, "BullPut")
+    fill(holdings, PUT, -3)
+    assert holdings.quantity(PUT) == -3
+    assert holdings.legs(strategy="BullPut") == {PUT}
+    assert holdings.has_options()
+
+    # The tag was consumed by the first fill; later partials keep its strategy
+    fill(holdings, PUT, -2, OrderStatus.Filled)
+    assert holdings.quantity(PUT) == -5
+    assert holdings.legs(underlying=SPX, strategy="BullPut") == {PUT}
+    assert holdings.gross_exposure(SPX) == 5
+    assert holdings.net_exposure(SPX) == -5
+    assert holdings.pending_tags == {}
+    assert holdings.option_legs == 1
+
+
+def test_partial_exit_fills_drop_the_symbol_once_flat():
+    holdings = HoldingsIndex()
+    holdings.tag(PUT, "BullPut")
+    holdings.tag(CALL, "BearCall")
+    fill(holdings, PUT, -4, OrderStatus.Filled)
+    fill(holdings, CALL, 2, OrderStatus.Filled)
+    assert holdings.gross_exposure(SPX) == 6
+    assert holdings.net_exposure(SPX) == -2
+
+    fill(holdings, PUT, 1)
+    fill(holdings, PUT, 2)
+    assert holdings.quantity(PUT) == -1
+    assert holdings.gross_exposure(SPX) == 3
+    assert holdings.is_invested(PUT)
+
+    fill(holdings, PUT, 1, OrderStatus.Filled)
+    assert not holdings.is_invested(PUT)
+    assert holdings.legs() == {CALL}
+    assert holdings.legs(strategy="BullPut") == set()
+    assert holdings.gross_exposure(SPX) == 2
+    assert holdings.option_legs == 1
+
+    fill(holdings, CALL, -2, OrderStatus.Filled)
+    assert len(holdings) == 0
+    assert not holdings.has_options()
+    assert holdings.gross_exposure(SPX) == 0 and holdings.net_exposure(SPX) == 0
+
+
+def test_events_without_a_fill_are_ignored():
+    holdings = HoldingsIndex()
+    fill(holdings, PUT, 0, OrderStatus.Submitted)
+    assert len(holdings) == 0
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from common.indicators import RollingMax, RollingMin
+
+
+@pytest.mark.parametrize("cls", [RollingMin, RollingMax])
+@pytest.mark.parametrize("window", [None, 1, 5, 20])
+def test_update_many_matches_per_bar_updates(cls, window):
+    values = np.random.default_rng(7).normal(100.0, 5.0, 120)
+    streamed = cls(window)
+    expected = np.array([streamed.update(v) for v in values])
+    batched = cls(window)
+    # Replays in uneven chunks, including chunks shorter than the window
+    out = np.concatenate([batched.update_many(chunk) for chunk in np.split(values, [3, 4, 30, 90])])
+    np.testing.assert_array_equal(out, expected)
+    assert batched.value == streamed.value
+    assert batched.is_ready == streamed.is_ready
+    # Both continue identically after the replay
+    assert batched.update(50.0) == streamed.update(50.0)
+    assert batched.update(150.0) == streamed.update(150.0)
+
+
+def test_window_drops_old_extremes():
+    low = RollingMin(3)
+    assert [low.update(v) for v in (5, 1, 4, 6, 7)] == [5, 1, 1, 1, 4]
+    high = RollingMax(3)
+    assert [high.update(v) for v in (5, 9, 4, 6, 7)] == [5, 9, 9, 9, 7]
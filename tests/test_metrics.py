@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from common.metrics import PerformanceMetrics, TRADING_DAYS
+
+
+def closing_values(n=300, seed=7):
+    rng = np.random.default_rng(seed)
+    return 100000.0 * np.cumprod(1 + rng.normal(0.0004, 0.012, n))
+
+
+def test_streaming_statistics_match_numpy():
+    values = closing_values()
+    metrics = PerformanceMetrics(100000.0, capacity=16)   # grows past its first allocation
+    for value in values:
+        metrics.end_of_day(value)
+
+    path = np.concatenate(([100000.0], values))
+    returns = np.diff(path) / path[:-1]
+    volatility = returns.std(ddof=1) * np.sqrt(TRADING_DAYS)
+    downside = np.sqrt(np.mean(np.minimum(returns, 0.0) ** 2) * TRADING_DAYS)
+    drawdowns = 1 - path / np.maximum.accumulate(path)
+
+    assert np.array_equal(metrics.daily_values(), values)
+    assert metrics.volatility == pytest.approx(volatility, rel=1e-9)
+    assert metrics.sharpe == pytest.approx(returns.mean() * TRADING_DAYS / volatility, rel=1e-9)
+    assert metrics.sortino == pytest.approx(returns.mean() * TRADING_DAYS / downside, rel=1e-9)
+    assert metrics.max_drawdown == pytest.approx(drawdowns.max(), rel=1e-12)
+    assert metrics.drawdown == pytest.approx(drawdowns[-1], rel=1e-12)
+    assert metrics.total_return == pytest.approx(values[-1] / 100000.0 - 1)
+
+
+def test_intraday_marks_deepen_the_drawdown():
+    metrics = PerformanceMetrics(100.0)
+    metrics.end_of_day(110.0)
+    metrics.mark(88.0)
+    metrics.end_of_day(105.0)
+    assert metrics.max_drawdown == pytest.approx(0.2)
+    assert metrics.drawdown == pytest.approx(1 - 105.0 / 110.0)
+
+
+def test_too_little_history_has_no_sharpe():
+    metrics = PerformanceMetrics(100.0)
+    assert metrics.sharpe is None and metrics.sortino is None
+    metrics.end_of_day(101.0)
+    assert metrics.sharpe is None
+
+
+def test_round_trips_from_fills():
+    metrics = PerformanceMetrics(100000.0)
+    metrics.on_fill("QQQ", 10, 100.0, fee=1.0)
+    metrics.on_fill("QQQ", 10, 110.0, fee=1.0)
+    metrics.on_fill("QQQ", -20, 120.0, fee=2.0)   # average cost 105: +300 less 4 in fees
+    metrics.on_fill("SQQQ", -5, 20.0)
+    metrics.on_fill("SQQQ", 5, 22.0)              # short loses 10
+    assert metrics.trades == 2 and metrics.wins == 1
+    assert metrics.trade_pnl == pytest.approx(286.0)
+    assert metrics.profit_factor == pytest.approx(29.6)
+    assert metrics.fees == pytest.approx(4.0)
+    assert metrics.positions == {}
@@ -0,0 +1,108 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from AlgorithmImports import OptionRight, OrderStatus
+
+from common.chain_index import ChainIndex
+from common.position_book import CLOSING, FREE, OPEN, OPENING, SpreadBook
+
+EXPIRY = datetime(2022, 6, 1, 16)
+
+
+def put(strike, bid, ask):
+    return SimpleNamespace(Symbol="P%d" % strike, Strike=float(strike), Expiry=EXPIRY, Right=OptionRight.Put,
+                           BidPrice=bid, AskPrice=ask)
+
+
+def event(symbol, quantity, price, status=OrderStatus.Filled, message=""):
+    return SimpleNamespace(Symbol=symbol, FillQuantity=quantity, FillPrice=price, Status=status, Message=message)
+
+
+def open_bull_put(book, quantity=2, short_price=2.0, long_price=1.0):
+    """BullPut short P4100 / long P4090, entered at the given fills"""
+    slot = book.open("BullPut", "P4100", "P4090", quantity, short_price, long_price)
+    book.on_order_event(event("P4090", quantity, long_price))
+    book.on_order_event(event("P4100", -quantity, short_price))
+    return slot
+
+
+def test_open_waits_for_both_legs():
+    book = SpreadBook(capacity=1)
+    slot = book.open("BullPut", "P4100", "P4090", 2, 2.0, 1.0)
+    assert book.state[slot] == OPENING
+    assert book.strategy_of("P4100") == "BullPut"
+    assert book.on_fill("P4090", 2, 1.1) is None
+    assert book.state[slot] == OPENING and not book.has_open()
+    book.on_fill("P4100", -2, 1.9)
+    assert book.state[slot] == OPEN
+    assert (book.short_entry[slot], book.long_entry[slot]) == (1.9, 1.1)
+    assert book.leg_count() == 2
+
+    # A second spread grows the columns
+    other = book.open("BearCall", "C4200", "C4210", 1, 1.5, 0.5)
+    assert book.capacity == 2 and other != slot
+    assert book.open_count() == 2
+
+
+def test_exit_fills_close_the_spread_with_its_pnl():
+    book = SpreadBook()
+    slot = open_bull_put(book)
+    book.mark_closing(slot, "PROFIT TARGET")
+    assert book.on_order_event(event("P4090", -2, 0.5)) is None
+    closed = book.on_order_event(event("P4100", 2, 0.8))
+    assert closed.name == "BullPut" and closed.reason == "PROFIT TARGET"
+    assert closed.long_symbol == "P4090" and closed.quantity == 2
+    assert closed.entry_net == pytest.approx(-1.0)
+    assert closed.exit_net == pytest.approx(-0.3)
+    assert closed.pnl == pytest.approx(1.4)
+    assert book.state[slot] == FREE
+    assert book.strategy_of("P4100") is None
+    assert book.leg_count() == 0 and book.open_count() == 0
+
+
+def test_expiry_fills_close_an_open_spread():
+    book = SpreadBook()
+    open_bull_put(book)
+    book.on_order_event(event("P4100", 2, 0.0))
+    closed = book.on_order_event(event("P4090", -2, 0.0))
+    assert closed.reason == "BullPut expiry"
+    assert closed.pnl == pytest.approx(2.0)
+
+
+def test_unfilled_entry_is_released_on_cancel():
+    book = SpreadBook()
+    slot = book.open("BullPut", "P4100", "P4090", 2, 2.0, 1.0)
+    closed = book.on_order_event(event("P4100", 0, 0.0, OrderStatus.Invalid, "Insufficient buying power"))
+    assert closed.reason == "Insufficient buying power" and closed.pnl == 0.0
+    assert book.state[slot] == FREE
+
+
+def test_evaluate_uses_chain_quotes():
+    book = SpreadBook()
+    target = open_bull_put(book, short_price=2.0, long_price=1.0)   # credit 1.0
+    stop = book.open("BullPut", "P4080", "P4070", 1, 2.0, 1.0)
+    book.on_fill("P4070", 1, 1.0)
+    book.on_fill("P4080", -1, 2.0)
+    unquoted = book.open("BullPut", "P4060", "P4050", 1, 2.0, 1.0)
+    book.on_fill("P4050", 1, 1.0)
+    book.on_fill("P4060", -1, 2.0)
+    closing = book.open("BullPut", "P4040", "P4030", 1, 2.0, 1.0)
+    book.on_fill("P4030", 1, 1.0)
+    book.on_fill("P4040", -1, 2.0)
+    book.mark_closing(closing)
+    assert book.state[closing] == CLOSING
+
+    index = ChainIndex([put(4100, 0.9, 1.2), put(4090, 0.7, 0.8),     # costs 0.5 to close: +50%
+                        put(4080, 3.0, 3.5), put(4070, 0.4, 0.5),     # costs 3.1 to close: -210%
+                        put(4060, 1.0, 1.1),                          # long leg missing from the chain
+                        put(4040, 5.0, 6.0), put(4030, 0.1, 0.2)])
+    bids, asks = index.quotes(["P4090", "P9999"])
+    assert list(bids) == [0.7, 0.0] and list(asks) == [0.8, 0.0]
+
+    slots, pnl_pcts, is_profit = book.evaluate(index.quotes, 0.25, 1.0)
+    assert list(slots) == [target, stop]
+    assert pnl_pcts == pytest.approx([0.5, -2.1])
+    assert list(is_profit) == [True, False]
+    assert unquoted not in slots
@@ -0,0 +1,69 @@
+from common.regime import ABOVE, BELOW, RegimeEngine, ThresholdRegime
+
+
+def engine(threshold):
+    """SPX above a refreshed threshold and VIX below 25, recording every change"""
+    regimes = RegimeEngine()
+    regimes.register("spx_options", ThresholdRegime([
+        ("spx", ABOVE, lambda: threshold[0]),
+        ("vix", BELOW, 25),
+    ]))
+    changes = []
+    regimes.add_listener(lambda name, state: changes.append((name, state)))
+    return regimes, changes
+
+
+def test_regime_follows_threshold_crossings():
+    threshold = [4000.0]
+    regimes, changes = engine(threshold)
+    regimes.session_open("day 1")
+    assert not regimes.is_favorable("spx_options")
+
+    regimes.update("vix", 20.0)
+    regimes.update("spx", 4000.0)   # at the threshold is not above it
+    assert changes == []
+    regimes.update("spx", 4000.5)
+    assert changes == [("spx_options", True)]
+
+    regimes.update("spx", 4100.0)   # no crossing, no notification
+    regimes.update("vix", 24.9)
+    assert changes == [("spx_options", True)]
+
+    regimes.update("vix", 25.0)     # at the threshold is not below it
+    assert changes[-1] == ("spx_options", False)
+    regimes.update("vix", 18.0)
+    assert changes[-1] == ("spx_options", True)
+    regimes.update("spx", 3990.0)
+    assert changes[-1] == ("spx_options", False)
+    assert len(changes) == 4
+
+
+def test_thresholds_refresh_once_per_session():
+    threshold = [4000.0]
+    regimes, changes = engine(threshold)
+    regimes.session_open("day 1")
+    regimes.update("vix", 20.0)
+    regimes.update("spx", 4050.0)
+    assert regimes.is_favorable("spx_options")
+
+    # The new boundary only applies from the next session
+    threshold[0] = 4100.0
+    regimes.session_open("day 1")
+    assert regimes.is_favorable("spx_options")
+    regimes.session_open("day 2")
+    assert not regimes.is_favorable("spx_options")
+    assert changes == [("spx_options", True), ("spx_options", False)]
+
+
+def test_missing_threshold_or_input_is_unfavorable():
+    threshold = [None]   # e.g. the SMA is not ready yet
+    regimes, changes = engine(threshold)
+    regimes.session_open("day 1")
+    regimes.update("vix", 20.0)
+    regimes.update("spx", 4050.0)
+    assert not regimes.is_favorable("spx_options")
+    regimes.update("vix", 0.0)    # non-positive inputs count as missing
+    threshold[0] = 4000.0
+    regimes.session_open("day 2")
+    assert not regimes.is_favorable("spx_options")
+    assert changes == []
@@ -0,0 +1,50 @@
+import pytest
+
+from common.stop_monitor import PositionStop, StopMonitor
+
+
+def exits(stop, prices):
+    return [stop.check(price) for price in prices]
+
+
+def test_long_stop_and_take():
+    assert PositionStop(1, 100.0, stop=0.05).stop == pytest.approx(95.0)
+    assert exits(PositionStop(1, 100.0, stop=0.05, take=0.25), [99.0, 95.01, 95.0]) == [None, None, "stop loss"]
+    assert exits(PositionStop(1, 100.0, stop=0.05, take=0.25), [105.0, 124.99, 125.0]) == [None, None, "take profit"]
+
+
+def test_short_stop_and_take():
+    stop = PositionStop(-1, 100.0, stop=0.05, take=0.25)
+    assert (stop.stop, stop.take) == (pytest.approx(105.0), pytest.approx(75.0))
+    assert exits(stop, [104.99, 105.0]) == [None, "stop loss"]
+    assert exits(PositionStop(-1, 100.0, stop=0.05, take=0.25), [80.0, 75.0]) == [None, "take profit"]
+
+
+def test_trailing_stop_follows_the_best_price():
+    # Long: 10% below the running high, which starts at the entry
+    long = PositionStop(1, 100.0, trail=0.10)
+    assert exits(long, [90.5, 120.0, 110.0, 108.0]) == [None, None, None, "trailing stop"]
+
+    # Short: 10% above the running low
+    short = PositionStop(-1, 100.0, trail=0.10)
+    assert exits(short, [109.0, 80.0, 87.0, 88.0]) == [None, None, None, "trailing stop"]
+
+
+def test_stop_wins_over_a_trailing_stop_on_the_same_price():
+    stop = PositionStop(1, 100.0, stop=0.05, trail=0.01)
+    assert stop.check(100.5) is None
+    assert stop.check(94.0) == "stop loss"
+
+
+def test_monitor_fires_once_and_forgets_the_position():
+    fired = []
+    monitor = StopMonitor(None, lambda symbol, price, reason: fired.append((symbol, price, reason)), "hour")
+    monitor.open("QQQ", 100.0, 10, stop=0.05, trail=0.10)
+    monitor.open("SQQQ", 20.0, -5, take=0.10)
+    assert monitor.check("QQQ", 98.0) is None
+    assert monitor.check("QQQ", 94.0) == "stop loss"
+    assert "QQQ" not in monitor
+    assert monitor.check("QQQ", 80.0) is None
+    assert monitor.check("SQQQ", 18.0) == "take profit"
+    assert fired == [("QQQ", 94.0, "stop loss"), ("SQQQ", 18.0, "take profit")]
+    assert monitor.positions == {}
@@ -0,0 +1,27 @@
+import json
+
+from lean_local.sweep import key, load_done, setup
+
+
+def test_seed_is_part_of_the_setup_only_when_sampling(tmp_path):
+    assert "seed" not in setup("strategy", str(tmp_path), seed=3)
+    assert setup("strategy", str(tmp_path), seed=3) == setup("strategy", str(tmp_path), seed=4)
+    assert setup("strategy", str(tmp_path), samples=10, seed=3)["seed"] == 3
+
+
+def test_failed_runs_are_not_done(tmp_path):
+    run_setup = setup("strategy", str(tmp_path))
+    other_setup = setup("other strategy", str(tmp_path))
+    rows = [
+        {"parameters": {"a": "1"}, "metrics": {"return": 0.1}, "setup": run_setup},
+        {"parameters": {"a": "2"}, "error": "ValueError: boom", "setup": run_setup},
+        {"parameters": {"a": "3"}, "metrics": {"return": 0.2}, "setup": other_setup},
+        {"parameters": {"a": "4"}, "error": "ValueError: boom", "setup": run_setup},
+        {"parameters": {"a": "4"}, "metrics": {"return": 0.3}, "setup": run_setup},   # retried
+    ]
+    path = tmp_path / "results.jsonl"
+    path.write_text("".join(json.dumps(row) + "\n" for row in rows))
+
+    done = load_done(str(path), run_setup)
+    assert sorted(done) == [key({"a": "1"}), key({"a": "4"})]
+    assert done[key({"a": "4"})]["metrics"]["return"] == 0.3
@@ -0,0 +1,35 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+from common.trade_journal import TradeJournal, to_frame
+
+
+def test_append_continues_the_journal_and_its_string_table(tmp_path):
+    path = str(tmp_path / "journal")
+    algorithm = SimpleNamespace(Time=datetime(2022, 6, 1, 10, 0))
+    first = TradeJournal(algorithm, path, strategy="A")
+    first.entry("SPY", 10, 400.0, "signal")
+    first.close()
+
+    algorithm.Time = datetime(2022, 6, 2, 10, 0)
+    second = TradeJournal(algorithm, path, strategy="A", append=True)
+    assert second.first_record == 1
+    second.exit("SPY", -10, 410.0, "stop")
+    second.entry("QQQ", 5, 300.0, "signal")
+    second.close()
+
+    frame = to_frame(path)
+    assert list(frame["kind"]) == ["entry", "exit", "entry"]
+    assert list(frame["symbol"]) == ["SPY", "SPY", "QQQ"]
+    assert list(frame["reason"]) == ["signal", "stop", "signal"]
+    assert list(frame["strategy"]) == ["A", "A", "A"]
+
+
+def test_a_new_journal_truncates(tmp_path):
+    path = str(tmp_path / "journal")
+    algorithm = SimpleNamespace(Time=datetime(2022, 6, 1, 10, 0))
+    for _ in range(2):
+        journal = TradeJournal(algorithm, path)
+        journal.entry("SPY", 1, 400.0)
+        journal.close()
+    assert len(to_frame(path)) == 1
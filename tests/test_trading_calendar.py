@@ -0,0 +1,42 @@
+from datetime import date, datetime
+
+import numpy as np
+
+from common.trading_calendar import EARLY_CLOSE, FOMC, TRADING_DAY, get_calendar
+
+
+def test_calendar_is_shared():
+    assert get_calendar() is get_calendar()
+
+
+def test_early_close_flags():
+    calendar = get_calendar()
+    day_after_thanksgiving = date(2022, 11, 25)
+    assert calendar.is_early_close(day_after_thanksgiving)
+    assert calendar.is_trading_day(day_after_thanksgiving)
+    assert calendar.flags(day_after_thanksgiving) & (EARLY_CLOSE | TRADING_DAY) == EARLY_CLOSE | TRADING_DAY
+    assert calendar.is_holiday(date(2022, 11, 24))
+    assert not calendar.is_early_close(date(2022, 11, 24))
+    assert not calendar.is_early_close(date(2022, 11, 28))
+    assert calendar.next_date(date(2022, 1, 1), EARLY_CLOSE) == day_after_thanksgiving
+
+
+def test_fomc_flags():
+    calendar = get_calendar()
+    assert calendar.is_fomc(date(2022, 6, 15))
+    assert calendar.is_fomc(datetime(2022, 6, 15, 14, 0))   # datetimes use their date
+    assert not calendar.is_fomc(date(2022, 6, 14))
+    assert not calendar.is_fomc(date(2022, 6, 16))
+    assert calendar.next_date(date(2022, 6, 1), FOMC) == date(2022, 6, 15)
+    assert calendar.next_date(date(2022, 6, 15), FOMC) == date(2022, 6, 15)
+    assert calendar.next_date(date(2022, 6, 15), FOMC, inclusive=False) == date(2022, 7, 27)
+
+    days = np.array(["2022-06-01", "2022-06-15", "2022-06-16"], dtype="datetime64[D]")
+    expected = np.array(["2022-06-15", "2022-06-15", "2022-07-27"], dtype="datetime64[D]")
+    assert (calendar.next_event(days, FOMC) == expected).all()
+
+
+def test_days_outside_the_calendar_have_no_flags():
+    calendar = get_calendar()
+    assert calendar.flags(date(1900, 1, 2)) == 0
+    assert not calendar.is_trading_day(date(1900, 1, 2))
@@ -0,0 +1,13 @@
+import pytest
+
+from lean_local.walk_forward import parse_orders
+
+
+def test_parse_orders_accepts_pure_ar_orders():
+    assert parse_orders("1,0,0; 3,0,0;") == [(1, 0, 0), (3, 0, 0)]
+
+
+@pytest.mark.parametrize("text", ["1,1,0", "2,0,1", "0,0,0", "1,0"])
+def test_parse_orders_rejects_what_the_strategies_cannot_trade(text):
+    with pytest.raises(ValueError):
+        parse_orders("1,0,0;" + text)
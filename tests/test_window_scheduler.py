@@ -0,0 +1,43 @@
+from datetime import datetime, time
+
+from common.window_scheduler import MINUTES_PER_DAY, WindowScheduler
+
+
+def test_window_boundaries():
+    windows = WindowScheduler()
+    windows.add_window("bull_put", time(9, 31), time(9, 45), include_start=False)
+    windows.add_window("profit_check", time(10, 0), time(15, 59), include_end=False)
+    windows.add_window("bear_call", time(15, 0), time(15, 0))
+
+    assert not windows.is_open("bull_put", time(9, 31))
+    assert windows.is_open("bull_put", time(9, 32))
+    assert windows.is_open("bull_put", time(9, 45))
+    assert not windows.is_open("bull_put", time(9, 46))
+
+    assert not windows.is_open("profit_check", time(9, 59))
+    assert windows.is_open("profit_check", time(10, 0))
+    assert windows.is_open("profit_check", time(15, 58))
+    assert not windows.is_open("profit_check", time(15, 59))
+
+    # Seconds do not matter: the whole minute is inside or outside
+    assert windows.is_open("bear_call", datetime(2022, 6, 1, 15, 0, 59))
+    assert not windows.is_open("bear_call", time(15, 1))
+    assert windows.is_open("profit_check", time(15, 0))
+
+    assert windows.intervals("bull_put") == [(9 * 60 + 32, 9 * 60 + 45)]
+    assert windows.intervals() == [(9 * 60 + 32, 9 * 60 + 45), (10 * 60, 15 * 60 + 58)]
+
+
+def test_dispatch_counts_skipped_minutes():
+    windows = WindowScheduler()
+    windows.add_window("open", time(9, 30), time(9, 31))
+    assert [windows.dispatch(time(9, m)) for m in (29, 30, 31, 32)] == [False, True, True, False]
+    assert (windows.dispatched, windows.skipped) == (2, 2)
+
+
+def test_window_reaching_midnight():
+    windows = WindowScheduler()
+    windows.add_window("late", time(23, 58), time(23, 59))
+    assert windows.is_active(time(23, 59))
+    assert not windows.is_active(time(0, 0))
+    assert windows.intervals("late") == [(MINUTES_PER_DAY - 2, MINUTES_PER_DAY - 1)]